@@ -0,0 +1,58 @@
+"""
+Measures the throughput of the codecs in `pyneuphonic.audio.codecs`.
+
+Run with `python benchmarks/bench_codecs.py`. Each conversion is timed on 20ms frames at 8kHz,
+which is what a telephony bridge converts on every media event, and on one 60 second buffer.
+"""
+
+import timeit
+import numpy as np
+
+from pyneuphonic.audio import codecs
+
+SAMPLING_RATE = 8000
+
+
+def report(name: str, n_samples: int, n_calls: int, seconds: float):
+    audio_seconds = n_samples * n_calls / SAMPLING_RATE
+    print(
+        f"{name:<40} {n_calls / seconds:>12,.0f} calls/s "
+        f"{audio_seconds / seconds:>12,.0f}x real-time"
+    )
+
+
+def main():
+    rng = np.random.default_rng(0)
+
+    for duration_s in [0.02, 60]:
+        n_samples = int(duration_s * SAMPLING_RATE)
+        samples = rng.integers(-32768, 32767, size=n_samples, dtype=np.int16)
+        linear = memoryview(samples.tobytes())
+        n_calls = max(1, int(20_000 * 0.02 / duration_s))
+
+        print(f"\n{duration_s * 1000:g}ms of audio at {SAMPLING_RATE}Hz")
+
+        for encoding in [codecs.PCM_MULAW, codecs.PCM_ALAW]:
+            encoded = memoryview(codecs.encode(samples, encoding).tobytes())
+            encode_out = np.empty(n_samples, dtype=np.uint8)
+            decode_out = np.empty(n_samples, dtype=np.int16)
+
+            seconds = timeit.timeit(
+                lambda: codecs.encode(samples, encoding, out=encode_out), number=n_calls
+            )
+            report(f"encode {encoding}", n_samples, n_calls, seconds)
+
+            seconds = timeit.timeit(
+                lambda: codecs.decode(encoded, encoding, out=decode_out), number=n_calls
+            )
+            report(f"decode {encoding}", n_samples, n_calls, seconds)
+
+            seconds = timeit.timeit(
+                lambda: codecs.transcode(linear, codecs.PCM_LINEAR, encoding),
+                number=n_calls,
+            )
+            report(f"transcode pcm_linear -> {encoding}", n_samples, n_calls, seconds)
+
+
+if __name__ == "__main__":
+    main()
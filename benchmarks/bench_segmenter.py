@@ -0,0 +1,112 @@
+"""
+Measures the throughput and latency of `pyneuphonic.text.SentenceSegmenter`.
+
+Run with `python benchmarks/bench_segmenter.py`. A long transcript in the style of LLM output,
+including abbreviations, decimals and URLs, is split into word-sized tokens and pushed into the
+segmenter one token at a time, as `AsyncTTSWebsocketClient.stream` does. Each paragraph is
+treated as a separate utterance.
+
+For several settings this reports the time taken by each call to `push`, the overall
+throughput, how many tokens are needed before the first segment of an utterance is released
+(which bounds the time to first audio) and the average segment length (longer segments give
+better prosody).
+"""
+
+import re
+import time
+import numpy as np
+
+from pyneuphonic.text import SentenceSegmenter
+
+SENTENCES = [
+    "Sure, I can help with that.",
+    "Dr. Smith said the results were about 3.5% better than last year's, i.e. a clear win.",
+    "You can find the full report at https://example.com/reports/2024.html if you need it.",
+    "First, preheat the oven to 180 degrees; then, mix the flour, sugar and butter together.",
+    "Honestly? I'm not sure, but J. R. R. Tolkien wrote most of it between 1937 and 1949.",
+    "The meeting is at 9:30 a.m. on Jan. 5, so please don't be late!",
+    "That's a great question, and the short answer is yes.",
+    "Prices start at $1,299.99, although discounts of up to 20% are available until Friday.",
+]
+
+N_PARAGRAPHS = 2_000
+SENTENCES_PER_PARAGRAPH = 6
+
+SETTINGS = [
+    dict(first_segment_chars=15, min_chars=60, growth=1.5),
+    dict(first_segment_chars=1, min_chars=1, growth=1.0),
+    dict(first_segment_chars=40, min_chars=120, growth=1.5),
+    dict(first_segment_chars=100, min_chars=200, growth=1.0),
+]
+
+
+def transcript():
+    rng = np.random.default_rng(0)
+    paragraphs = []
+
+    for _ in range(N_PARAGRAPHS):
+        indices = rng.integers(0, len(SENTENCES), size=SENTENCES_PER_PARAGRAPH)
+        paragraphs.append(" ".join(SENTENCES[i] for i in indices))
+
+    return paragraphs
+
+
+def tokenize(text: str):
+    """Split text roughly as an LLM tokenizer would, into words with their leading space."""
+    return re.findall(r"\s*[\w']+|\s*[^\w\s]", text)
+
+
+def run(paragraphs, **settings):
+    segmenter = SentenceSegmenter(**settings)
+    push_times = []
+    first_segment_tokens = []
+    segment_lengths = []
+
+    for paragraph in paragraphs:
+        first_segment = None
+
+        for i, token in enumerate(tokenize(paragraph)):
+            start = time.perf_counter()
+            segments = segmenter.push(token)
+            push_times.append(time.perf_counter() - start)
+
+            if segments and first_segment is None:
+                first_segment = i + 1
+
+            segment_lengths += [len(segment) for segment in segments]
+
+        tail = segmenter.flush()
+        if tail:
+            segment_lengths.append(len(tail))
+
+        segmenter.reset()
+        first_segment_tokens.append(first_segment or i + 1)
+
+    push_times = np.array(push_times) * 1e6
+    n_chars = sum(len(paragraph) for paragraph in paragraphs)
+
+    print(
+        f"{str(settings):<62} "
+        f"{n_chars / push_times.sum():>6.1f}M chars/s "
+        f"p50 {np.percentile(push_times, 50):>5.1f}us "
+        f"p99 {np.percentile(push_times, 99):>5.1f}us "
+        f"first segment {np.mean(first_segment_tokens):>5.1f} tokens "
+        f"mean segment {np.mean(segment_lengths):>5.0f} chars"
+    )
+
+
+def main():
+    paragraphs = transcript()
+    n_chars = sum(len(paragraph) for paragraph in paragraphs)
+    n_tokens = sum(len(tokenize(paragraph)) for paragraph in paragraphs)
+
+    print(
+        f"{n_chars:,} characters, {n_tokens:,} tokens, {len(paragraphs):,} utterances\n"
+    )
+
+    for settings in SETTINGS:
+        run(paragraphs, **settings)
+
+
+if __name__ == "__main__":
+    main()
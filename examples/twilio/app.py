@@ -5,6 +5,7 @@ import json
 import base64
 from pyneuphonic import Neuphonic, WebsocketEvents, AgentConfig
 from pyneuphonic.models import APIResponse, TTSResponse
+from pyneuphonic.audio import FrameRechunker
 import os
 from twilio.twiml.voice_response import VoiceResponse, Connect
 from fastapi.responses import HTMLResponse
@@ -43,25 +44,28 @@ async def agent_websocket(  # noqa: C901
     client = Neuphonic(api_key=os.getenv("NEUPHONIC_API_KEY"))
     neuphonic_agent_websocket = client.agents.AsyncWebsocketClient()
 
+    # Twilio expects 20ms frames of 8kHz mu-law audio
+    rechunker = FrameRechunker(frame_ms=20, sampling_rate=8000, encoding="pcm_mulaw")
+
     async def on_message(message: APIResponse[TTSResponse]):
         """Handles messages that are returned from the Neuphonic server to the websocket client."""
         if stream_sid is not None and message.data.type == "audio_response":
             # Forward audio to the users's phone
-            await websocket.send_json(
-                {
-                    "event": "media",
-                    "streamSid": stream_sid,
-                    "media": {
-                        "payload": base64.b64encode(message.data.audio).decode("utf-8")
-                    },
-                }
-            )
+            for frame in rechunker.push(message.data.audio):
+                await websocket.send_json(
+                    {
+                        "event": "media",
+                        "streamSid": stream_sid,
+                        "media": {"payload": base64.b64encode(frame).decode("utf-8")},
+                    }
+                )
         elif message.data.type == "user_transcript":
             logging.info(f"user_transcript: {message.data.text}")
         elif message.data.type == "llm_response":
             logging.info(f"llm_response: {message.data.text}")
         elif message.data.type == "stop_audio_response":
             # If the user interrupts then stop playing any currently queued audio
+            rechunker.reset()
             if stream_sid is not None:
                 await websocket.send_json(
                     {
@@ -1,5 +1,4 @@
-from pyneuphonic import Neuphonic, WebsocketEvents, save_audio
-from pyneuphonic.models import APIResponse, TTSResponse
+from pyneuphonic import Neuphonic, save_audio
 import os
 import asyncio
 
@@ -10,19 +9,15 @@ async def main():
     ws = client.tts.AsyncWebsocketClient()
     audio_bytes = bytearray()
 
-    # Attach event handlers. Check WebsocketEvents enum for all valid events.
-    async def on_message(message: APIResponse[TTSResponse]):
-        # add the audio we recieve to the bytearray so we can save it later
-        nonlocal audio_bytes
-        audio_bytes += message.data.audio
-
-    ws.on(WebsocketEvents.MESSAGE, on_message)  # attach the event handler
-
     await ws.open()
-    await ws.send(
+    utterance = await ws.send(
         "Hello, world! This is an example of saving audio to a file.", autocomplete=True
     )
-    await asyncio.sleep(3)  # wait until we recieve all of the messages from the server
+
+    # the handle yields the messages for this utterance, and stops once they have all arrived
+    async for message in utterance:
+        audio_bytes += message.data.audio
+
     await ws.close()  # close the websocket
 
     # save audio to a file
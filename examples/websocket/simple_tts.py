@@ -32,7 +32,8 @@ async def main():
         if user_text.lower() == "quit":
             break
 
-        await ws.send(user_text, autocomplete=True)
+        utterance = await ws.send(user_text, autocomplete=True)
+        await utterance.done  # wait for all of the audio before prompting again
 
     await ws.close()  # close the websocket and terminate the audio resources
 
@@ -8,6 +8,7 @@ Use this example for greater flexibility in handling events and interacting with
 from pyneuphonic import Neuphonic, WebsocketEvents
 from pyneuphonic.player import AsyncAudioPlayer, AsyncAudioRecorder
 from pyneuphonic.models import APIResponse, AgentResponse, AgentConfig
+from pyneuphonic.audio import VoiceActivityDetector
 
 import os
 import asyncio
@@ -20,27 +21,48 @@ async def main():
     player = AsyncAudioPlayer()
 
     # passing in the websocket object will automatically forward audio to the server
-    # passing in the player will ensure that the recorder is paused while the speaker is playing
+    # passing in the player with half_duplex=True pauses the recorder while the speaker is playing,
+    # which avoids the agent hearing itself on devices without echo cancellation
+    # the voice activity detector drops silence so that only speech is sent to the server
     # sampling_rate=16000 is used for quicker speech recognition
-    recorder = AsyncAudioRecorder(sampling_rate=16000, websocket=ws, player=player)
-
-    async def on_message(message: APIResponse[AgentResponse]):
-        # server will return 3 types of messages: audio_response, user_transcript, llm_response
-        if message.data.type == "audio_response":
-            await player.play(message.data.audio)
-        elif message.data.type == "user_transcript":
-            print(f"User: {message.data.text}")
-        elif message.data.type == "llm_response":
-            print(f"Agent: {message.data.text}")
-        elif message.data.type == "stop_audio_response":
-            # Stop any currently playing audio, as the user has interrupted
-            await player.stop_playback()
+    recorder = AsyncAudioRecorder(
+        sampling_rate=16000,
+        websocket=ws,
+        player=player,
+        vad=VoiceActivityDetector(sampling_rate=16000),
+        send_window_ms=100,
+        half_duplex=True,
+    )
+
+    # server will return 4 types of messages: audio_response, user_transcript, llm_response
+    # and stop_audio_response. Handlers can be registered for each type of message.
+    async def on_audio_response(message: APIResponse[AgentResponse]):
+        await player.play(message.data.audio)
+
+    async def on_stop_audio_response(message: APIResponse[AgentResponse]):
+        # Stop any currently playing audio, as the user has interrupted
+        await player.confirm_interruption()
+
+    def on_user_transcript(message: APIResponse[AgentResponse]):
+        print(f"User: {message.data.text}")
+
+    def on_llm_response(message: APIResponse[AgentResponse]):
+        print(f"Agent: {message.data.text}")
 
     async def on_close():
         await player.close()
         await recorder.close()
 
-    ws.on(WebsocketEvents.MESSAGE, on_message)
+    # a higher priority ensures interruptions are handled before anything else
+    ws.on(
+        WebsocketEvents.MESSAGE,
+        on_stop_audio_response,
+        message_type="stop_audio_response",
+        priority=10,
+    )
+    ws.on(WebsocketEvents.MESSAGE, on_audio_response, message_type="audio_response")
+    ws.on(WebsocketEvents.MESSAGE, on_user_transcript, message_type="user_transcript")
+    ws.on(WebsocketEvents.MESSAGE, on_llm_response, message_type="llm_response")
     ws.on(WebsocketEvents.CLOSE, on_close)
 
     await player.open()
@@ -9,6 +9,17 @@ logging.basicConfig(
 
 from pyneuphonic.agents import Agent
 from pyneuphonic.client import Neuphonic
-from pyneuphonic.models import TTSConfig, WebsocketEvents, AgentConfig
+from pyneuphonic.models import (
+    TTSConfig,
+    WebsocketEvents,
+    AgentConfig,
+    OverflowPolicy,
+    ReconnectPolicy,
+    FlushPolicy,
+    StreamPolicy,
+    RoutingPolicy,
+    GovernorPolicy,
+    Priority,
+)
 from pyneuphonic.player import AudioPlayer, AsyncAudioPlayer, AsyncAudioRecorder
 from pyneuphonic._utils import save_audio, async_save_audio
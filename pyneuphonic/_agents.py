@@ -127,5 +127,7 @@ class Agents(Endpoint):
             id=agent_id, endpoint="/agents/", message="Failed to delete agent."
         )
 
-    def AsyncWebsocketClient(self):
-        return AsyncAgentWebsocketClient(api_key=self._api_key, base_url=self._base_url)
+    def AsyncWebsocketClient(self, **kwargs):
+        return AsyncAgentWebsocketClient(
+            api_key=self._api_key, base_url=self._base_url, **kwargs
+        )
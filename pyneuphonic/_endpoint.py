@@ -1,4 +1,6 @@
+import certifi
 import httpx
+import ssl
 from typing import Optional
 from pyneuphonic.models import APIResponse
 
@@ -34,18 +36,39 @@ class Endpoint:
     def base_url(self):
         return self._base_url
 
-    def _is_localhost(self):
-        return True if "localhost" in self.base_url else False
+    def _is_localhost(self, base_url: Optional[str] = None):
+        return True if "localhost" in (base_url or self.base_url) else False
 
     @property
     def http_url(self):
-        prefix = "http" if self._is_localhost() else "https"
-        return f"{prefix}://{self.base_url}"
+        return self._http_url()
 
     @property
     def ws_url(self):
-        prefix = "ws" if self._is_localhost() else "wss"
-        return f"{prefix}://{self.base_url}"
+        return self._ws_url()
+
+    @property
+    def ssl_context(self):
+        return self._ssl_context()
+
+    def _http_url(self, base_url: Optional[str] = None) -> str:
+        """Returns the HTTP URL for `base_url`, by default the endpoint's own."""
+        prefix = "http" if self._is_localhost(base_url) else "https"
+        return f"{prefix}://{base_url or self.base_url}"
+
+    def _ws_url(self, base_url: Optional[str] = None) -> str:
+        """Returns the websocket URL for `base_url`, by default the endpoint's own."""
+        prefix = "ws" if self._is_localhost(base_url) else "wss"
+        return f"{prefix}://{base_url or self.base_url}"
+
+    def _ssl_context(self, base_url: Optional[str] = None):
+        ssl_context = (
+            None
+            if self._is_localhost(base_url)
+            else ssl.create_default_context(cafile=certifi.where())
+        )
+
+        return ssl_context
 
     def raise_for_status(self, response: httpx.Response, message: Optional[str] = None):
         """
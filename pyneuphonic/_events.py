@@ -0,0 +1,133 @@
+import heapq
+import inspect
+from bisect import insort
+from collections import Counter
+from itertools import count
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+
+from pyneuphonic.models import WebsocketEvents
+
+# (negated priority, subscription order, handler), so that sorting puts the highest priority
+# first and handlers with equal priority run in the order they were subscribed
+_Subscription = Tuple[int, int, Callable]
+
+
+class EventDispatcher:
+    """
+    Dispatches websocket events to any number of subscribers.
+
+    Handlers are subscribed either to a `WebsocketEvents` member, or to messages of a specific
+    type (e.g. the `type` of an `AgentResponse`). Looking up the handlers for an event is a
+    single dictionary lookup, and each list of handlers is kept sorted by priority as handlers
+    are subscribed, so nothing is sorted when an event is dispatched. Handlers can be plain
+    functions or coroutine functions.
+    """
+
+    def __init__(self):
+        self._subscriptions: Dict[Hashable, List[_Subscription]] = {}
+        self._order = count()
+        # number of handlers per event, including typed message handlers
+        self._counts = Counter()
+
+    @staticmethod
+    def _key(event: WebsocketEvents, message_type: Optional[str]) -> Hashable:
+        return event if message_type is None else (event, message_type)
+
+    def subscribe(
+        self,
+        event: WebsocketEvents,
+        handler: Callable,
+        message_type: Optional[str] = None,
+        priority: int = 0,
+    ):
+        """
+        Subscribe a handler to an event.
+
+        Parameters
+        ----------
+        event : WebsocketEvents
+            The event to handle.
+        handler : Callable
+            The function or coroutine function to call when the event occurs.
+        message_type : str, optional
+            Only valid for `WebsocketEvents.MESSAGE`. If set, the handler is only called for
+            messages whose `data.type` is equal to this, e.g. `stop_audio_response`.
+        priority : int
+            Handlers with a higher priority are called first. By default 0.
+        """
+        if message_type is not None and event != WebsocketEvents.MESSAGE:
+            raise ValueError("`message_type` can only be set for message events.")
+
+        # copy on write, so that handlers can subscribe while an event is being dispatched
+        key = self._key(event, message_type)
+        subscriptions = list(self._subscriptions.get(key, []))
+        insort(subscriptions, (-priority, next(self._order), handler))
+
+        self._subscriptions[key] = subscriptions
+        self._counts[event] += 1
+
+    def unsubscribe(
+        self,
+        event: WebsocketEvents,
+        handler: Callable,
+        message_type: Optional[str] = None,
+    ):
+        """Remove a handler previously added with `subscribe`."""
+        key = self._key(event, message_type)
+        subscriptions = self._subscriptions.get(key, [])
+
+        self._subscriptions[key] = [
+            subscription for subscription in subscriptions if subscription[2] != handler
+        ]
+        self._counts[event] -= len(subscriptions) - len(self._subscriptions[key])
+
+    def has_handlers(self, event: WebsocketEvents) -> bool:
+        """Returns True if any handler, including a typed message handler, is subscribed."""
+        return self._counts[event] > 0
+
+    def _handlers(self, event: WebsocketEvents, message_type: Optional[str]):
+        handlers = self._subscriptions.get(event, [])
+
+        if message_type is None:
+            return handlers
+
+        typed_handlers = self._subscriptions.get((event, message_type), [])
+
+        if not typed_handlers:
+            return handlers
+        elif not handlers:
+            return typed_handlers
+
+        return heapq.merge(handlers, typed_handlers)
+
+    async def emit(
+        self, event: WebsocketEvents, *args: Any, message_type: Optional[str] = None
+    ):
+        """
+        Call every handler subscribed to an event, in priority order.
+
+        Parameters
+        ----------
+        event : WebsocketEvents
+            The event that occurred.
+        *args
+            The arguments to call each handler with.
+        message_type : str, optional
+            The type of the message, for `WebsocketEvents.MESSAGE` events. Handlers subscribed to
+            this type are called as well as those subscribed to all messages.
+        """
+        for _, _, handler in self._handlers(event, message_type):
+            result = handler(*args)
+
+            if inspect.isawaitable(result):
+                await result
+
+    def emit_sync(
+        self, event: WebsocketEvents, *args: Any, message_type: Optional[str] = None
+    ):
+        """
+        See `emit`. Calls the handlers from a thread without an event loop, so they must be
+        plain functions.
+        """
+        for _, _, handler in self._handlers(event, message_type):
+            handler(*args)
@@ -0,0 +1,364 @@
+import asyncio
+import threading
+import time
+from collections import deque
+from typing import Dict, Optional, Tuple
+
+from pyneuphonic.models import GovernorMetrics, GovernorPolicy, Priority
+
+# status codes with which the server says it is overloaded
+THROTTLE_STATUS_CODES = (429, 503)
+
+# the order in which queued requests are admitted, lowest first
+_RANKS = {Priority.INTERACTIVE: 0, Priority.NORMAL: 1, Priority.BULK: 2}
+
+
+class _Waiter:
+    """A request waiting in the queue, woken by another thread when it may be admitted."""
+
+    def __init__(self, priority: Priority):
+        self.priority = priority
+        self.queued_at = time.monotonic()
+        self._event = threading.Event()
+
+    def notify(self):
+        self._event.set()
+
+    def wait(self, timeout: Optional[float]):
+        self._event.wait(timeout)
+        self._event.clear()
+
+
+class _AsyncWaiter:
+    """See _Waiter. Woken safely from any thread, by scheduling the wake-up on its loop."""
+
+    def __init__(self, priority: Priority):
+        self.priority = priority
+        self.queued_at = time.monotonic()
+        self._loop = asyncio.get_running_loop()
+        self._event = asyncio.Event()
+
+    def notify(self):
+        self._loop.call_soon_threadsafe(self._event.set)
+
+    async def wait(self, timeout: Optional[float]):
+        try:
+            await asyncio.wait_for(self._event.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+
+        self._event.clear()
+
+
+class Slot:
+    """
+    Admission of one request by a `Governor`. Use it as a context manager, or an async context
+    manager, around the request: entering waits until the request is admitted, and exiting
+    frees its place.
+
+    Parameters
+    ----------
+    governor : Governor, optional
+        The governor admitting the request. If None, the request is admitted immediately.
+    kind : str
+        The kind of request, e.g. `sse` or `websocket`. Latencies are only compared with those
+        of the same kind.
+    priority : Priority
+        How urgently the request is needed, which orders it in the queue. By default
+        `Priority.NORMAL`.
+    """
+
+    def __init__(
+        self,
+        governor: Optional["Governor"],
+        kind: str,
+        priority: Priority = Priority.NORMAL,
+    ):
+        self._governor = governor
+        self.kind = kind
+        self.priority = priority
+
+        self._admitted_at: Optional[float] = None
+        self._responded = False
+
+    def first_byte(self):
+        """
+        Report that the request has started responding, to measure its latency. Only the first
+        call has any effect.
+        """
+        if self._governor is not None and not self._responded:
+            self._responded = True
+            self._governor._observe(self.kind, time.monotonic() - self._admitted_at)
+
+    def throttled(self):
+        """Report that the server responded with 429 or 503."""
+        if self._governor is not None:
+            self._governor._throttle()
+
+    def __enter__(self) -> "Slot":
+        if self._governor is not None:
+            self._governor._acquire(self)
+
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if self._governor is not None:
+            self._governor._release()
+
+    async def __aenter__(self) -> "Slot":
+        if self._governor is not None:
+            await self._governor._acquire_async(self)
+
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        if self._governor is not None:
+            self._governor._release()
+
+
+class Governor:
+    """
+    Limits the rate and concurrency of the requests made with one API key, so that bursts of
+    traffic queue locally rather than overloading the server. One instance is shared by all of
+    the clients created from a `Neuphonic` client, and can be used from several threads and
+    event loops at once.
+
+    Parameters
+    ----------
+    policy : GovernorPolicy
+        The limits, and how the concurrency limit adapts.
+    """
+
+    def __init__(self, policy: GovernorPolicy = GovernorPolicy()):
+        self.policy = policy
+
+        self._lock = threading.Lock()
+        # requests waiting to be admitted, oldest first for each priority
+        self._waiters = {priority: deque() for priority in Priority}
+        self._in_flight = 0
+        self._limit = float(policy.initial_limit)
+
+        self._tokens = float(policy.burst)
+        self._refilled_at = time.monotonic()
+
+        self._latencies: Dict[str, deque] = {}
+        # smoothed latency, which is also the least time between two reductions of the limit
+        self._round_trip = 0.1
+        self._reduced_at = 0.0
+
+        self._metrics = GovernorMetrics()
+
+    @property
+    def metrics(self) -> GovernorMetrics:
+        """Returns metrics describing how requests are being limited."""
+        with self._lock:
+            return self._metrics.model_copy(
+                update={
+                    "limit": int(self._limit),
+                    "in_flight": self._in_flight,
+                    "queued": self._queued(),
+                }
+            )
+
+    def slot(self, kind: str, priority: Priority = Priority.NORMAL) -> Slot:
+        """
+        Returns a `Slot` to wrap a request in, e.g.
+
+        >>> with governor.slot('sse', Priority.INTERACTIVE) as slot:
+        >>>     response = ...
+        >>>     slot.first_byte()
+        """
+        return Slot(self, kind, priority)
+
+    def _queued(self) -> int:
+        return sum(len(waiters) for waiters in self._waiters.values())
+
+    def _next_waiter(self):
+        """
+        Returns the request to admit next: the most urgent, counting a request as one priority
+        more urgent for every `promote_after` seconds it has waited, up to
+        `Priority.INTERACTIVE`, and then the oldest. Requests kept out by the `reserved` room,
+        however long they have waited, come after those that fit, so they don't hold them up.
+        """
+        now = time.monotonic()
+        best, best_key = None, None
+
+        for waiters in self._waiters.values():
+            if waiters:
+                waiter = waiters[0]
+                promotions = int((now - waiter.queued_at) / self.policy.promote_after)
+                key = (
+                    self._in_flight >= self._capacity(waiter.priority),
+                    max(0, _RANKS[waiter.priority] - promotions),
+                    waiter.queued_at,
+                )
+
+                if best is None or key < best_key:
+                    best, best_key = waiter, key
+
+        return best
+
+    def _capacity(self, priority: Priority) -> int:
+        """Returns the number of requests of `priority` that may be in flight."""
+        limit = int(self._limit)
+
+        if priority is Priority.BULK:
+            return max(1, limit - self.policy.reserved)
+
+        return limit
+
+    def _refill(self, now: float):
+        if self.policy.rate is not None:
+            self._tokens = min(
+                self.policy.burst,
+                self._tokens + (now - self._refilled_at) * self.policy.rate,
+            )
+
+        self._refilled_at = now
+
+    def _try_admit(self, waiter) -> Tuple[bool, Optional[float]]:
+        """
+        Admit `waiter` if it is next in the queue and within the limits. Otherwise
+        returns how long it can wait before trying again, or None to wait to be woken.
+        """
+        if self._next_waiter() is not waiter:
+            return False, None
+
+        if self._in_flight >= self._capacity(waiter.priority):
+            return False, None
+
+        if self.policy.rate is not None:
+            self._refill(time.monotonic())
+
+            if self._tokens < 1:
+                return False, (1 - self._tokens) / self.policy.rate
+
+            self._tokens -= 1
+
+        self._waiters[waiter.priority].popleft()
+        self._in_flight += 1
+
+        return True, None
+
+    def _enqueue(self, waiter):
+        with self._lock:
+            self._waiters[waiter.priority].append(waiter)
+            self._metrics.max_queued = max(self._metrics.max_queued, self._queued())
+
+    def _admitted(self, slot: Slot, waiter):
+        slot._admitted_at = time.monotonic()
+
+        with self._lock:
+            self._metrics.queue_wait = slot._admitted_at - waiter.queued_at
+            self._metrics.max_queue_wait = max(
+                self._metrics.max_queue_wait, self._metrics.queue_wait
+            )
+            # the next request may fit within the limits too
+            self._wake_next()
+
+    def _abandon(self, waiter):
+        with self._lock:
+            if waiter in self._waiters[waiter.priority]:
+                self._waiters[waiter.priority].remove(waiter)
+
+            self._wake_next()
+
+    def _time_left(self, queued_at: float) -> Optional[float]:
+        if self.policy.max_wait is None:
+            return None
+
+        time_left = self.policy.max_wait - (time.monotonic() - queued_at)
+
+        if time_left <= 0:
+            raise TimeoutError(
+                f"Request waited longer than {self.policy.max_wait} seconds to be sent."
+            )
+
+        return time_left
+
+    def _acquire(self, slot: Slot):
+        waiter = _Waiter(slot.priority)
+        self._enqueue(waiter)
+
+        try:
+            while True:
+                with self._lock:
+                    admitted, delay = self._try_admit(waiter)
+
+                if admitted:
+                    break
+
+                waiter.wait(_shortest(delay, self._time_left(waiter.queued_at)))
+        except BaseException:
+            self._abandon(waiter)
+            raise
+
+        self._admitted(slot, waiter)
+
+    async def _acquire_async(self, slot: Slot):
+        waiter = _AsyncWaiter(slot.priority)
+        self._enqueue(waiter)
+
+        try:
+            while True:
+                with self._lock:
+                    admitted, delay = self._try_admit(waiter)
+
+                if admitted:
+                    break
+
+                await waiter.wait(_shortest(delay, self._time_left(waiter.queued_at)))
+        except BaseException:
+            self._abandon(waiter)
+            raise
+
+        self._admitted(slot, waiter)
+
+    def _release(self):
+        with self._lock:
+            self._in_flight -= 1
+            self._wake_next()
+
+    def _wake_next(self):
+        waiter = self._next_waiter()
+
+        if waiter is not None:
+            waiter.notify()
+
+    def _observe(self, kind: str, latency: float):
+        with self._lock:
+            latencies = self._latencies.setdefault(
+                kind, deque(maxlen=self.policy.window)
+            )
+            fastest = min(latencies, default=latency)
+            latencies.append(latency)
+
+            self._round_trip = 0.8 * self._round_trip + 0.2 * latency
+
+            if latency > self.policy.latency_tolerance * fastest:
+                self._reduce()
+            else:
+                self._limit = min(self.policy.max_limit, self._limit + 1 / self._limit)
+                self._wake_next()
+
+    def _throttle(self):
+        with self._lock:
+            self._metrics.throttled += 1
+            self._reduce()
+
+    def _reduce(self):
+        """Multiply the limit by `backoff`, at most once per round trip."""
+        now = time.monotonic()
+
+        if now - self._reduced_at < self._round_trip:
+            return
+
+        self._reduced_at = now
+        self._limit = max(self.policy.min_limit, self._limit * self.policy.backoff)
+
+
+def _shortest(*timeouts: Optional[float]) -> Optional[float]:
+    """Returns the shortest of the timeouts that are set, or None if none are."""
+    timeouts = [timeout for timeout in timeouts if timeout is not None]
+
+    return min(timeouts) if timeouts else None
@@ -0,0 +1,242 @@
+import asyncio
+import queue
+import threading
+from typing import AsyncIterator, Iterator, Optional
+
+from pyneuphonic.models import APIResponse, TTSResponse
+
+_END = object()  # queued once the source has been read in full
+
+
+class _Failure:
+    """Queued in place of a message if reading the source fails, to be raised by the consumer."""
+
+    def __init__(self, exception: BaseException):
+        self.exception = exception
+
+
+class ReadAheadBase:
+    """
+    Reads the messages of a response ahead of its consumer into a bounded buffer, so that the
+    network is read as fast as the server sends rather than at the pace of the consumer, e.g.
+    an audio player writing each chunk in real time. Iterate over it as you would the response.
+
+    Parameters
+    ----------
+    max_messages : int
+        The most messages to buffer. Reading stops while the buffer is full.
+    bytes_per_second : float, optional
+        The number of bytes in a second of audio, used to report `buffered_seconds`.
+    """
+
+    def __init__(self, max_messages: int, bytes_per_second: Optional[float] = None):
+        self.max_messages = max_messages
+        self._bytes_per_second = bytes_per_second
+
+        self._buffered_messages = 0
+        self._buffered_bytes = 0
+        self._exhausted = False
+
+    @property
+    def buffered_messages(self) -> int:
+        """The number of messages that have been read but not consumed yet."""
+        return self._buffered_messages
+
+    @property
+    def buffered_bytes(self) -> int:
+        """The number of bytes of audio that have been read but not consumed yet."""
+        return self._buffered_bytes
+
+    @property
+    def buffered_seconds(self) -> Optional[float]:
+        """
+        How far ahead of the consumer reading is, in seconds of audio. None if the size of the
+        audio isn't known, e.g. for a compressed `output_format`.
+        """
+        if not self._bytes_per_second:
+            return None
+
+        return self._buffered_bytes / self._bytes_per_second
+
+    @property
+    def exhausted(self) -> bool:
+        """True once the whole response has been read."""
+        return self._exhausted
+
+    def _count(self, item, sign: int):
+        if isinstance(item, APIResponse):
+            self._buffered_messages += sign
+            self._buffered_bytes += sign * len(item.data.audio or b"")
+
+
+class ReadAhead(ReadAheadBase):
+    """
+    See ReadAheadBase. The response is read on a background thread. Call `close` if you stop
+    iterating before the end of the response, to release the connection.
+
+    Parameters
+    ----------
+    source : Iterator[APIResponse[TTSResponse]]
+        The response to read, e.g. from `SSEClient.send`.
+    max_messages : int
+        See ReadAheadBase.
+    bytes_per_second : float, optional
+        See ReadAheadBase.
+    """
+
+    def __init__(
+        self,
+        source: Iterator[APIResponse[TTSResponse]],
+        max_messages: int = 64,
+        bytes_per_second: Optional[float] = None,
+    ):
+        super().__init__(max_messages=max_messages, bytes_per_second=bytes_per_second)
+
+        self._queue = queue.Queue(maxsize=max_messages)
+        self._lock = threading.Lock()  # held while the counts are updated
+        self._closed = threading.Event()
+
+        self._thread = threading.Thread(target=self._read, args=(source,), daemon=True)
+        self._thread.start()
+
+    def _put(self, item) -> bool:
+        """Queue an item, waiting for space. Returns False if closed in the meantime."""
+        while not self._closed.is_set():
+            # the consumer takes items without the lock, so this can't hold it up
+            with self._lock:
+                try:
+                    self._queue.put(item, timeout=0.1)
+                except queue.Full:
+                    continue
+
+                self._count(item, 1)
+                return True
+
+        return False
+
+    def _read(self, source: Iterator[APIResponse[TTSResponse]]):
+        try:
+            for message in source:
+                if not self._put(message):
+                    break
+            else:
+                self._exhausted = True
+        except Exception as e:
+            self._put(_Failure(e))
+        finally:
+            if hasattr(source, "close"):
+                source.close()
+
+            self._put(_END)
+
+    def __iter__(self) -> Iterator[APIResponse[TTSResponse]]:
+        return self
+
+    def __next__(self) -> APIResponse[TTSResponse]:
+        return self.next()
+
+    def next(self, timeout: Optional[float] = None) -> APIResponse[TTSResponse]:
+        """
+        Returns the next message, waiting up to `timeout` seconds for it to be read.
+
+        Raises
+        ------
+        StopIteration
+            If the whole response has been consumed.
+        TimeoutError
+            If no message is read within `timeout` seconds.
+        """
+        try:
+            item = self._queue.get(timeout=timeout)
+        except queue.Empty:
+            raise TimeoutError(f"No message was read within {timeout} seconds.")
+
+        if item is _END:
+            # keep the end marker, so that iterating again also stops
+            self._queue.put(item)
+            raise StopIteration
+
+        with self._lock:
+            self._count(item, -1)
+
+        if isinstance(item, _Failure):
+            raise item.exception
+
+        return item
+
+    def close(self):
+        """Stop reading the response, and release the connection."""
+        self._closed.set()
+
+
+class AsyncReadAhead(ReadAheadBase):
+    """
+    See ReadAheadBase. The response is read by a background task, so this must be created from
+    within a running event loop. Call `aclose` if you stop iterating before the end of the
+    response, to release the connection.
+
+    Parameters
+    ----------
+    source : AsyncIterator[APIResponse[TTSResponse]]
+        The response to read, e.g. from `AsyncSSEClient.send`.
+    max_messages : int
+        See ReadAheadBase.
+    bytes_per_second : float, optional
+        See ReadAheadBase.
+    """
+
+    def __init__(
+        self,
+        source: AsyncIterator[APIResponse[TTSResponse]],
+        max_messages: int = 64,
+        bytes_per_second: Optional[float] = None,
+    ):
+        super().__init__(max_messages=max_messages, bytes_per_second=bytes_per_second)
+
+        self._queue = asyncio.Queue(maxsize=max_messages)
+        self._task = asyncio.get_running_loop().create_task(self._read(source))
+
+    async def _put(self, item):
+        await self._queue.put(item)
+        self._count(item, 1)
+
+    async def _read(self, source: AsyncIterator[APIResponse[TTSResponse]]):
+        try:
+            async for message in source:
+                await self._put(message)
+
+            self._exhausted = True
+        except Exception as e:
+            await self._put(_Failure(e))
+        finally:
+            if hasattr(source, "aclose"):
+                await source.aclose()
+
+        await self._put(_END)
+
+    def __aiter__(self) -> AsyncIterator[APIResponse[TTSResponse]]:
+        return self
+
+    async def __anext__(self) -> APIResponse[TTSResponse]:
+        item = await self._queue.get()
+
+        if item is _END:
+            # keep the end marker, so that iterating again also stops
+            self._queue.put_nowait(item)
+            raise StopAsyncIteration
+
+        self._count(item, -1)
+
+        if isinstance(item, _Failure):
+            raise item.exception
+
+        return item
+
+    async def aclose(self):
+        """Stop reading the response, and release the connection."""
+        self._task.cancel()
+
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
@@ -0,0 +1,302 @@
+import asyncio
+import logging
+import math
+import queue
+import threading
+import time
+from collections import deque
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple, TypeVar
+
+from pyneuphonic.models import RegionStats, RoutingPolicy
+
+logger = logging.getLogger("pyneuphonic")
+
+T = TypeVar("T")
+
+# the kinds of request whose latencies are measured separately, as they aren't comparable
+SSE = "sse"
+WEBSOCKET = "websocket"
+
+
+class Regions:
+    """
+    Several regional deployments of the API, and the latencies recently measured for each.
+    Requests are routed to the fastest healthy region, hedged to the next fastest if the policy
+    asks for it, and fail over to the other regions if they fail.
+
+    One instance is shared by all of the clients created from a `Neuphonic` client, and can be
+    used from several threads and event loops at once.
+
+    Parameters
+    ----------
+    base_urls : List[str]
+        The base URLs of the regions, most preferred first.
+    policy : RoutingPolicy
+        How requests are routed and hedged.
+    """
+
+    def __init__(self, base_urls: List[str], policy: RoutingPolicy = RoutingPolicy()):
+        if not base_urls:
+            raise ValueError("At least one base URL is required.")
+
+        self.base_urls = list(base_urls)
+        self.policy = policy
+
+        self._latencies: Dict[Tuple[str, str], deque] = {}
+        self._unhealthy_until = {base_url: 0.0 for base_url in self.base_urls}
+        self._lock = threading.Lock()
+
+    def _samples(self, base_url: str, kind: str) -> deque:
+        key = (base_url, kind)
+
+        if key not in self._latencies:
+            self._latencies[key] = deque(maxlen=self.policy.window)
+
+        return self._latencies[key]
+
+    def _healthy(self, base_url: str) -> bool:
+        return time.monotonic() >= self._unhealthy_until[base_url]
+
+    def record(self, base_url: str, kind: str, latency: float):
+        """Record the latency of a request to a region, which also marks it healthy again."""
+        with self._lock:
+            self._samples(base_url, kind).append(latency)
+            self._unhealthy_until[base_url] = 0.0
+
+    def fail(self, base_url: str):
+        """Avoid a region for `cooldown` seconds after a request to it has failed."""
+        with self._lock:
+            self._unhealthy_until[base_url] = time.monotonic() + self.policy.cooldown
+
+        logger.warning(
+            f"Request to {base_url} failed, avoiding it for {self.policy.cooldown} seconds."
+        )
+
+    def ranked(self, kind: str) -> List[str]:
+        """
+        Returns the base URLs in the order requests should try them: healthy regions first,
+        those not measured yet before the rest, then by median latency.
+        """
+        with self._lock:
+
+            def key(index: int):
+                base_url = self.base_urls[index]
+                samples = self._samples(base_url, kind)
+                median = _percentile(samples, 0.5) if samples else 0.0
+
+                return not self._healthy(base_url), bool(samples), median, index
+
+            order = sorted(range(len(self.base_urls)), key=key)
+
+        return [self.base_urls[index] for index in order]
+
+    def hedge_delay(self, base_url: str, kind: str) -> float:
+        """Returns the number of seconds to wait for a request before hedging it."""
+        with self._lock:
+            samples = self._samples(base_url, kind)
+
+            if len(samples) < self.policy.min_samples:
+                return self.policy.hedge_delay
+
+            return _percentile(samples, self.policy.hedge_percentile)
+
+    def stats(self, kind: str = SSE) -> List[RegionStats]:
+        """
+        Returns the latencies recently measured for each region, for either `sse` requests or
+        `websocket` opens.
+        """
+        stats = []
+
+        for base_url in self.base_urls:
+            with self._lock:
+                samples = list(self._samples(base_url, kind))
+                healthy = self._healthy(base_url)
+
+            stats.append(
+                RegionStats(
+                    base_url=base_url,
+                    healthy=healthy,
+                    samples=len(samples),
+                    median_latency=_percentile(samples, 0.5) if samples else None,
+                    hedge_delay=self.hedge_delay(base_url, kind),
+                )
+            )
+
+        return stats
+
+    def _hedge_after(self, ranked: List[str], kind: str) -> Optional[float]:
+        """Returns the delay before the first request is hedged, or None if it isn't."""
+        if not self.policy.hedge or len(ranked) < 2 or not self._healthy(ranked[1]):
+            return None
+
+        return self.hedge_delay(ranked[0], kind)
+
+    def _outrun(self, started: Dict[str, float], kind: str):
+        """
+        Record the time taken so far by requests that lost a race, as their latency is at least
+        that, so that a region that keeps losing isn't treated as unmeasured.
+        """
+        with self._lock:
+            for base_url, at in started.items():
+                self._samples(base_url, kind).append(time.monotonic() - at)
+
+    def race(
+        self,
+        kind: str,
+        attempt: Callable[[str], T],
+        discard: Callable[[T], None],
+    ) -> Tuple[str, T]:
+        """
+        Make a request to the fastest region, hedging and failing over as set by the policy.
+        Each request is made on its own thread.
+
+        Parameters
+        ----------
+        kind : str
+            Either `sse` or `websocket`, the kind of latency to measure.
+        attempt : Callable[[str], T]
+            Makes the request to the given base URL, returning once it has produced audio or,
+            for a websocket, opened.
+        discard : Callable[[T], None]
+            Releases the result of a request that lost the race.
+
+        Returns
+        -------
+        Tuple[str, T]
+            The base URL of the region that responded first, and the result of its request.
+        """
+        ranked = self.ranked(kind)
+        results = queue.Queue()
+        started: Dict[str, float] = {}  # when each request in flight was made
+
+        def run(base_url: str):
+            try:
+                result = attempt(base_url)
+            except Exception as e:
+                results.put((base_url, None, e))
+            else:
+                results.put((base_url, result, None))
+
+        def launch():
+            base_url = ranked.pop(0)
+            started[base_url] = time.monotonic()
+            threading.Thread(target=run, args=(base_url,), daemon=True).start()
+
+        delay = self._hedge_after(ranked, kind)
+        launch()
+        error = None
+
+        while started:
+            try:
+                base_url, result, e = results.get(timeout=delay)
+            except queue.Empty:
+                logger.debug(f"Hedging {kind} request to {ranked[0]}.")
+                launch()
+                delay = None
+                continue
+
+            latency = time.monotonic() - started.pop(base_url)
+
+            if e is None:
+                self.record(base_url, kind, latency)
+                self._outrun(started, kind)
+                _discard_remaining(results, len(started), discard)
+
+                return base_url, result
+
+            self.fail(base_url)
+            error = e
+
+            if not started and ranked:
+                launch()
+                delay = None
+
+        raise error
+
+    async def async_race(
+        self,
+        kind: str,
+        attempt: Callable[[str], Awaitable[T]],
+        discard: Callable[[T], Awaitable[None]],
+    ) -> Tuple[str, T]:
+        """
+        See `race`. Each request is made in its own task, and the requests that lose the race
+        are cancelled.
+        """
+        ranked = self.ranked(kind)
+        tasks: Dict[asyncio.Task, str] = {}
+        started: Dict[str, float] = {}
+
+        def launch():
+            base_url = ranked.pop(0)
+            started[base_url] = time.monotonic()
+            tasks[asyncio.create_task(attempt(base_url))] = base_url
+
+        delay = self._hedge_after(ranked, kind)
+        launch()
+        error = None
+
+        try:
+            while tasks:
+                done, _ = await asyncio.wait(
+                    tasks, timeout=delay, return_when=asyncio.FIRST_COMPLETED
+                )
+
+                if not done:
+                    logger.debug(f"Hedging {kind} request to {ranked[0]}.")
+                    launch()
+                    delay = None
+                    continue
+
+                for task in done:
+                    base_url = tasks.pop(task)
+                    latency = time.monotonic() - started.pop(base_url)
+
+                    if task.exception() is None:
+                        self.record(base_url, kind, latency)
+                        self._outrun(started, kind)
+
+                        return base_url, task.result()
+
+                    self.fail(base_url)
+                    error = task.exception()
+
+                if not tasks and ranked:
+                    launch()
+                    delay = None
+        finally:
+            # also reached if the race itself is cancelled
+            await _cancel_remaining(tasks, discard)
+
+        raise error
+
+
+def _percentile(samples, q: float) -> float:
+    ordered = sorted(samples)
+
+    return ordered[max(0, math.ceil(q * len(ordered)) - 1)]
+
+
+def _discard_remaining(results: queue.Queue, in_flight: int, discard: Callable):
+    """Discard the results of requests that are still running once they have finished."""
+    if not in_flight:
+        return
+
+    def drain():
+        for _ in range(in_flight):
+            _, result, e = results.get()
+
+            if e is None:
+                discard(result)
+
+    threading.Thread(target=drain, daemon=True).start()
+
+
+async def _cancel_remaining(tasks: Dict[asyncio.Task, str], discard: Callable):
+    """Cancel the requests that are still running, discarding any that have finished."""
+    for task in tasks:
+        task.cancel()
+
+    for outcome in await asyncio.gather(*tasks, return_exceptions=True):
+        if not isinstance(outcome, BaseException):
+            await discard(outcome)
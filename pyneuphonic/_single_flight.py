@@ -0,0 +1,236 @@
+import asyncio
+import threading
+from typing import AsyncIterator, Callable, Dict, Hashable, Iterator, List, Optional
+
+from pyneuphonic.models import APIResponse, TTSResponse
+
+_PENDING = object()  # returned for a message that hasn't been received yet
+
+
+class Flight:
+    """
+    One request in flight, whose messages are shared by every caller that asked for it. The
+    messages are kept as they are received, and each caller reads them through its own cursor,
+    from the first message onwards. The same message objects are passed to every caller, so
+    they shouldn't be modified.
+
+    Once every cursor has been closed, e.g. because each caller stopped listening part way
+    through, the request is abandoned: it stops being read, which closes its response, and
+    the flight can't be joined any more.
+
+    Parameters
+    ----------
+    on_done : Callable[[], None], optional
+        Called once every message has been received, or receiving them has failed.
+    """
+
+    def __init__(self, on_done: Optional[Callable[[], None]] = None):
+        self._on_done = on_done
+        self._messages: List[APIResponse[TTSResponse]] = []
+        self._done = False
+        # set before `on_done` is called, so that it is only called once
+        self._finishing = False
+        self._error: Optional[BaseException] = None
+        # the number of callers reading the flight, and set once all of them have left early
+        self._cursors = 0
+        self._abandoned = False
+
+        # held while messages are added, and used to wake synchronous cursors
+        self._condition = threading.Condition()
+        # events of asynchronous cursors waiting for a message, with the loop of each
+        self._listeners = []
+        self._task = None  # reading the messages, if they are read asynchronously
+
+    def _put(self, message: Optional[APIResponse[TTSResponse]], error=None):
+        """
+        Add a message, or finish the flight if `message` is None. Does nothing once the flight
+        has finished.
+        """
+        if message is None:
+            with self._condition:
+                finishing, self._finishing = self._finishing, True
+
+            if finishing:
+                return
+
+            if self._on_done is not None:
+                # before any cursor sees the end, so that requests made after it start afresh
+                self._on_done()
+
+        with self._condition:
+            if self._done:
+                return
+
+            if message is None:
+                self._done = True
+                self._error = error
+            else:
+                self._messages.append(message)
+
+            self._condition.notify_all()
+            listeners, self._listeners = self._listeners, []
+
+        for loop, event in listeners:
+            loop.call_soon_threadsafe(event.set)
+
+    def start(self, messages: Iterator[APIResponse[TTSResponse]]):
+        """Start reading `messages` into the flight, on a background thread."""
+        threading.Thread(target=self._pump, args=(messages,), daemon=True).start()
+
+    def start_async(self, messages: AsyncIterator[APIResponse[TTSResponse]]):
+        """Start reading `messages` into the flight, in a background task."""
+        self._task = asyncio.get_running_loop().create_task(self._async_pump(messages))
+
+    def _pump(self, messages: Iterator[APIResponse[TTSResponse]]):
+        error = None
+
+        try:
+            for message in messages:
+                if self._abandoned:
+                    # a blocked read can't be interrupted, so this stops at the next message
+                    messages.close()
+                    break
+
+                self._put(message)
+        except Exception as e:
+            error = e
+        finally:
+            self._put(None, error)
+
+    async def _async_pump(self, messages: AsyncIterator[APIResponse[TTSResponse]]):
+        error = None
+
+        try:
+            async for message in messages:
+                self._put(message)
+        except asyncio.CancelledError:
+            # e.g. the loop is shutting down, rather than every cursor having left
+            error = ConnectionError("The request was cancelled before it finished.")
+            raise
+        except Exception as e:
+            error = e
+        finally:
+            self._put(None, error)
+
+    def _join(self) -> bool:
+        """Count a new cursor, returning False if the flight has been abandoned."""
+        with self._condition:
+            if self._abandoned:
+                return False
+
+            self._cursors += 1
+
+            return True
+
+    def _leave(self):
+        """Stop counting a cursor, abandoning the request if it was the last to leave."""
+        with self._condition:
+            self._cursors -= 1
+            self._abandoned = self._cursors == 0 and not self._done
+
+        if not self._abandoned:
+            return
+
+        if self._task is not None:
+            self._task.get_loop().call_soon_threadsafe(self._task.cancel)
+
+        self._put(None)
+
+    def _get(self, index: int):
+        """
+        Returns the message at `index`, `_PENDING` if it hasn't been received yet, or None if
+        there are no more messages.
+        """
+        if index < len(self._messages):
+            return self._messages[index]
+
+        if not self._done:
+            return _PENDING
+
+        if self._error is not None:
+            raise self._error
+
+        return None
+
+    def cursor(self) -> Iterator[APIResponse[TTSResponse]]:
+        """
+        Yields every message of the flight, waiting for those still to come. Each caller that
+        joined the flight has to read it through exactly one cursor, and leaves the flight once
+        the cursor is exhausted or closed.
+        """
+        index = 0
+
+        try:
+            while True:
+                with self._condition:
+                    self._condition.wait_for(lambda: self._get(index) is not _PENDING)
+                    message = self._get(index)
+
+                if message is None:
+                    return
+
+                index += 1
+                yield message
+        finally:
+            self._leave()
+
+    async def async_cursor(self) -> AsyncIterator[APIResponse[TTSResponse]]:
+        """See `cursor`."""
+        index = 0
+
+        try:
+            while True:
+                with self._condition:
+                    message = self._get(index)
+
+                    if message is _PENDING:
+                        event = asyncio.Event()
+                        self._listeners.append((asyncio.get_running_loop(), event))
+
+                if message is _PENDING:
+                    await event.wait()
+                    continue
+
+                if message is None:
+                    return
+
+                index += 1
+                yield message
+        finally:
+            self._leave()
+
+
+class SingleFlight:
+    """
+    Coalesces identical requests made while one is already in flight, so that the server is
+    only asked once and every caller is sent the same messages. One instance is shared by all of
+    the clients created from a `Neuphonic` client.
+    """
+
+    def __init__(self):
+        self._flights: Dict[Hashable, Flight] = {}
+        self._lock = threading.Lock()
+
+    def join(self, key: Hashable):
+        """
+        Returns the flight for `key`, and True if the caller is the first to ask for it, in which
+        case it has to start the flight. The flight is forgotten once all of its messages have
+        arrived, or once every caller has left it, so later requests are made afresh.
+        """
+        with self._lock:
+            flight = self._flights.get(key)
+
+            if flight is not None and flight._join():
+                return flight, False
+
+            flight = Flight(on_done=lambda: self._land(key, flight))
+            flight._join()
+            self._flights[key] = flight
+
+        return flight, True
+
+    def _land(self, key: Hashable, flight: Flight):
+        with self._lock:
+            # an abandoned flight may already have been replaced
+            if self._flights.get(key) is flight:
+                del self._flights[key]
@@ -1,13 +1,154 @@
+import asyncio
 import httpx
 import json
+import logging
+import time
 from typing import Generator, AsyncGenerator, Optional, Union
 from pyneuphonic._endpoint import Endpoint
-from pyneuphonic.models import TTSConfig, APIResponse, TTSResponse, to_dict
+from pyneuphonic._governor import THROTTLE_STATUS_CODES, Governor, Slot
+from pyneuphonic._read_ahead import ReadAhead, AsyncReadAhead
+from pyneuphonic._regions import SSE, Regions
+from pyneuphonic._single_flight import SingleFlight
+from pyneuphonic._utils import _count_visible, _drop_visible
+from pyneuphonic.audio.codecs import sample_width
+from pyneuphonic.models import (
+    TTSConfig,
+    APIResponse,
+    TTSResponse,
+    Priority,
+    SSEMetrics,
+    StreamPolicy,
+    to_dict,
+)
+
+logger = logging.getLogger("pyneuphonic")
+
+# failures after which the remaining text is requested again
+_RETRYABLE = (TimeoutError, asyncio.TimeoutError, httpx.TransportError)
+
+
+class _Resumption:
+    """
+    Tracks the progress of a response under a `StreamPolicy`: the deadline for its next message,
+    and the text that is left to synthesise if it has to be requested again.
+    """
+
+    def __init__(self, text: str, policy: StreamPolicy, metrics: SSEMetrics):
+        self.text = text
+        self.policy = policy
+        self._metrics = metrics
+
+        self._started = time.monotonic()
+        self._last_message = self._started
+        self._failed_at: Optional[float] = None  # set until a retry produces a message
+
+        self._retries = 0
+        self._first = True  # whether the current request has yet to produce a message
+        self._synthesised = 0  # non-whitespace characters of `text` synthesised so far
+
+    def _time_left(self) -> Optional[float]:
+        if self.policy.total_timeout is None:
+            return None
+
+        return self.policy.total_timeout - (time.monotonic() - self._started)
+
+    def deadline(self) -> float:
+        """Returns the number of seconds to wait for the next message."""
+        timeout = (
+            self.policy.first_byte_timeout if self._first else self.policy.chunk_timeout
+        )
+        time_left = self._time_left()
+
+        if time_left is None:
+            return timeout
+
+        if time_left <= 0:
+            raise TimeoutError(
+                f"The response took longer than {self.policy.total_timeout} seconds."
+            )
+
+        return min(timeout, time_left)
+
+    def received(self, message: APIResponse[TTSResponse]):
+        self._first = False
+        self._last_message = time.monotonic()
+        self._synthesised += _count_visible(message.data.text or "")
+
+        if self._failed_at is not None:
+            self._metrics.time_lost += self._last_message - self._failed_at
+            self._failed_at = None
+
+    def retry(self, exception: BaseException) -> bool:
+        """
+        Returns True if the response should be requested again after `exception`, in which case
+        `text` is trimmed to the text that hasn't been synthesised yet.
+        """
+        remaining = _drop_visible(self.text, self._synthesised).lstrip()
+        time_left = self._time_left()
+
+        if (
+            self._retries >= self.policy.max_retries
+            or not remaining
+            or (time_left is not None and time_left <= 0)
+        ):
+            return False
+
+        self._retries += 1
+        self._metrics.retries += 1
+
+        if self._failed_at is None:
+            self._failed_at = self._last_message
+
+        logger.warning(
+            f"SSE response stalled or failed ({type(exception).__name__}), requesting the "
+            f"remaining {len(remaining)} characters again (retry {self._retries})."
+        )
+
+        self.text = remaining
+        self._synthesised = 0
+        self._first = True
+
+        return True
 
 
 class SSEClientBase(Endpoint):
     """Contains shared functions used by both the SSEClient and the AsyncSSE Client."""
 
+    def __init__(
+        self,
+        *args,
+        regions: Optional[Regions] = None,
+        governor: Optional[Governor] = None,
+        flights: Optional[SingleFlight] = None,
+        **kwargs,
+    ):
+        super().__init__(*args, **kwargs)
+        self._metrics = SSEMetrics()
+        # if set, each request goes to the fastest of several regional deployments
+        self._regions = regions
+        # if set, limits the requests made with the API key
+        self._governor = governor
+        # the requests in flight that identical requests can share
+        self._flights = flights or SingleFlight()
+
+    def _slot(self, kind: str, priority: Priority) -> Slot:
+        """Returns the slot a request has to wait for, which is immediate without a governor."""
+        return Slot(self._governor, kind, priority)
+
+    @property
+    def metrics(self) -> SSEMetrics:
+        """Returns metrics describing how often responses have been resumed or shared."""
+        return self._metrics.model_copy()
+
+    def _join(self, text: str, tts_config: TTSConfig):
+        """Returns the flight for a request, and True if it has to be started."""
+        flight, first = self._flights.join((text, tts_config.model_dump_json()))
+
+        if not first:
+            self._metrics.coalesced += 1
+
+        return flight, first
+
     def _parse_message(self, message: str) -> Optional[APIResponse[TTSResponse]]:
         """
         Parse each response from the server and return it as an APIResponse object.
@@ -32,6 +173,16 @@ class SSEClientBase(Endpoint):
 
         return message
 
+    def _bytes_per_second(self, tts_config: TTSConfig) -> Optional[float]:
+        """Returns the number of bytes in a second of the audio returned, if it is raw PCM."""
+        if tts_config.output_format is not None:
+            return None
+
+        try:
+            return tts_config.sampling_rate * sample_width(tts_config.encoding)
+        except (TypeError, ValueError):
+            return None
+
 
 class SSEClient(SSEClientBase):
     def jwt_auth(self) -> None:
@@ -66,7 +217,11 @@ class SSEClient(SSEClientBase):
         text: str,
         tts_config: Union[TTSConfig, dict] = TTSConfig(),
         timeout: float = 20,
-    ) -> Generator[APIResponse[TTSResponse], None, None]:
+        read_ahead: Optional[int] = None,
+        stream_policy: Optional[StreamPolicy] = None,
+        priority: Priority = Priority.NORMAL,
+        coalesce: bool = False,
+    ) -> Union[Generator[APIResponse[TTSResponse], None, None], ReadAhead]:
         """
         Send a text to the TTS (text-to-speech) service and receive a stream of APIResponse messages.
 
@@ -79,30 +234,164 @@ class SSEClient(SSEClientBase):
             will be parsed into a TTSConfig.
         timeout : Optional[float]
             The timeout in seconds for the request.
+        read_ahead : Optional[int]
+            If set, the response is read on a background thread, up to this many messages ahead
+            of the consumer, so that a slow consumer doesn't slow down the network. By default
+            None, in which case the response is read as it is iterated over.
+        stream_policy : Optional[StreamPolicy]
+            If set, deadlines are enforced on the first message, on the gap between messages and
+            on the whole response, and a response that misses one or fails part way through is
+            resumed by requesting the remaining text again. The messages of the new response
+            continue on from the old one. See `metrics` for the number of retries. By default
+            None, in which case only `timeout` applies.
+        priority : Priority
+            How urgently the audio is needed. If the requests made with the API key are limited
+            by a governor, see `GovernorPolicy`, more urgent requests are sent first, and
+            `Priority.BULK` requests leave room for the others. By default `Priority.NORMAL`.
+        coalesce : bool
+            If True, and an identical request, i.e. for the same text and `tts_config`, is
+            already in flight, its response is shared rather than asking the server again. Every
+            caller receives all of the messages, from the first, through its own iterator over
+            the same message objects, which shouldn't be modified. The request is made
+            straight away, rather than once iterating starts, and the request in flight keeps
+            its own `stream_policy` and `priority`. It is abandoned once every caller has
+            closed its iterator. By default False.
 
-        Yields
-        ------
-        Generator[APIResponse[TTSResponse], None, None]
-            A generator yielding APIResponse messages.
+        Returns
+        -------
+        Union[Generator[APIResponse[TTSResponse], None, None], ReadAhead]
+            A generator yielding APIResponse messages or, if `read_ahead` is set, a `ReadAhead`
+            that yields the same messages and reports how far ahead it has read.
         """
         if not isinstance(tts_config, TTSConfig):
             tts_config = TTSConfig(**tts_config)
 
         assert isinstance(text, str), "`text` should be an instance of type `str`."
 
+        if stream_policy is None:
+            messages = self._stream(text, tts_config, timeout, priority)
+        else:
+            messages = self._resume(text, tts_config, timeout, stream_policy, priority)
+
+        if coalesce:
+            messages = self._coalesce(text, tts_config, messages)
+
+        if read_ahead is None:
+            return messages
+
+        return ReadAhead(
+            messages,
+            max_messages=read_ahead,
+            bytes_per_second=self._bytes_per_second(tts_config),
+        )
+
+    def _stream(
+        self, text: str, tts_config: TTSConfig, timeout: float, priority: Priority
+    ) -> Generator[APIResponse[TTSResponse], None, None]:
+        # admitted before racing, so that the latency of each region doesn't include queueing
+        with self._slot(SSE, priority) as slot:
+            if self._regions is None:
+                yield from self._request(slot, self.base_url, text, tts_config, timeout)
+            else:
+                yield from self._race(slot, text, tts_config, timeout)
+
+    def _race(
+        self, slot: Slot, text: str, tts_config: TTSConfig, timeout: float
+    ) -> Generator[APIResponse[TTSResponse], None, None]:
+        def first(base_url: str):
+            messages = self._request(slot, base_url, text, tts_config, timeout)
+
+            try:
+                return messages, next(messages, None)
+            except BaseException:
+                messages.close()
+                raise
+
+        base_url, (messages, message) = self._regions.race(
+            SSE, first, lambda result: result[0].close()
+        )
+
+        if message is None:
+            return
+
+        yield message
+
+        try:
+            yield from messages
+        except _RETRYABLE:
+            self._regions.fail(base_url)
+            raise
+
+    def _coalesce(
+        self,
+        text: str,
+        tts_config: TTSConfig,
+        messages: Generator[APIResponse[TTSResponse], None, None],
+    ) -> Generator[APIResponse[TTSResponse], None, None]:
+        flight, first = self._join(text, tts_config)
+
+        if first:
+            flight.start(messages)
+
+        return flight.cursor()
+
+    def _request(
+        self,
+        slot: Slot,
+        base_url: str,
+        text: str,
+        tts_config: TTSConfig,
+        timeout: float,
+    ) -> Generator[APIResponse[TTSResponse], None, None]:
+        """Make a request admitted by `slot`, reporting its outcome to the governor."""
         with httpx.stream(
             method="POST",
-            url=f"{self.http_url}/sse/speak/{tts_config.lang_code}",
+            url=f"{self._http_url(base_url)}/sse/speak/{tts_config.lang_code}",
             headers=self.headers,
             json={"text": text, **to_dict(tts_config)},
             timeout=timeout,
         ) as response:
+            if response.status_code in THROTTLE_STATUS_CODES:
+                slot.throttled()
+
             for message in response.iter_lines():
                 parsed_message = self._parse_message(message)
 
                 if parsed_message is not None:
+                    slot.first_byte()
                     yield parsed_message
 
+    def _resume(
+        self,
+        text: str,
+        tts_config: TTSConfig,
+        timeout: float,
+        policy: StreamPolicy,
+        priority: Priority,
+    ) -> Generator[APIResponse[TTSResponse], None, None]:
+        resumption = _Resumption(text, policy, self._metrics)
+
+        while True:
+            # read on a background thread, so that a stalled read can be given up on
+            response = ReadAhead(
+                self._stream(resumption.text, tts_config, timeout, priority), 1
+            )
+
+            try:
+                while True:
+                    try:
+                        message = response.next(timeout=resumption.deadline())
+                    except StopIteration:
+                        return
+
+                    resumption.received(message)
+                    yield message
+            except _RETRYABLE as e:
+                if not resumption.retry(e):
+                    raise
+            finally:
+                response.close()
+
 
 class AsyncSSEClient(SSEClientBase):
     async def jwt_auth(self) -> None:
@@ -119,27 +408,155 @@ class AsyncSSEClient(SSEClientBase):
             jwt_token = response.json()["data"]["jwt_token"]
             self.headers["Authorization"] = f"Bearer: {jwt_token}"
 
-    async def send(
+    def send(
         self,
         text: str,
         tts_config: Union[TTSConfig, dict] = TTSConfig(),
         timeout: float = 20,
-    ) -> AsyncGenerator[APIResponse[TTSResponse], None]:
+        read_ahead: Optional[int] = None,
+        stream_policy: Optional[StreamPolicy] = None,
+        priority: Priority = Priority.NORMAL,
+        coalesce: bool = False,
+    ) -> Union[AsyncGenerator[APIResponse[TTSResponse], None], AsyncReadAhead]:
+        """
+        See SSEClient.send. If `read_ahead` is set, the response is read by a background task
+        and an `AsyncReadAhead` is returned, and if `coalesce` is set, the request is made by a
+        background task, so in either case this must be called from within a running event loop.
+        """
         if not isinstance(tts_config, TTSConfig):
             tts_config = TTSConfig(**tts_config)
 
         assert isinstance(text, str), "`text` should be an instance of type `str`."
 
+        if stream_policy is None:
+            messages = self._stream(text, tts_config, timeout, priority)
+        else:
+            messages = self._resume(text, tts_config, timeout, stream_policy, priority)
+
+        if coalesce:
+            messages = self._coalesce(text, tts_config, messages)
+
+        if read_ahead is None:
+            return messages
+
+        return AsyncReadAhead(
+            messages,
+            max_messages=read_ahead,
+            bytes_per_second=self._bytes_per_second(tts_config),
+        )
+
+    async def _stream(
+        self, text: str, tts_config: TTSConfig, timeout: float, priority: Priority
+    ) -> AsyncGenerator[APIResponse[TTSResponse], None]:
+        # admitted before racing, so that the latency of each region doesn't include queueing
+        async with self._slot(SSE, priority) as slot:
+            if self._regions is None:
+                messages = self._request(slot, self.base_url, text, tts_config, timeout)
+            else:
+                messages = self._race(slot, text, tts_config, timeout)
+
+            try:
+                async for message in messages:
+                    yield message
+            finally:
+                await messages.aclose()
+
+    async def _race(
+        self, slot: Slot, text: str, tts_config: TTSConfig, timeout: float
+    ) -> AsyncGenerator[APIResponse[TTSResponse], None]:
+        async def first(base_url: str):
+            messages = self._request(slot, base_url, text, tts_config, timeout)
+
+            try:
+                return messages, await anext(messages, None)
+            except BaseException:
+                await messages.aclose()
+                raise
+
+        base_url, (messages, message) = await self._regions.async_race(
+            SSE, first, lambda result: result[0].aclose()
+        )
+
+        if message is None:
+            return
+
+        yield message
+
+        try:
+            async for message in messages:
+                yield message
+        except _RETRYABLE:
+            self._regions.fail(base_url)
+            raise
+        finally:
+            await messages.aclose()
+
+    def _coalesce(
+        self,
+        text: str,
+        tts_config: TTSConfig,
+        messages: AsyncGenerator[APIResponse[TTSResponse], None],
+    ) -> AsyncGenerator[APIResponse[TTSResponse], None]:
+        flight, first = self._join(text, tts_config)
+
+        if first:
+            flight.start_async(messages)
+
+        return flight.async_cursor()
+
+    async def _request(
+        self,
+        slot: Slot,
+        base_url: str,
+        text: str,
+        tts_config: TTSConfig,
+        timeout: float,
+    ) -> AsyncGenerator[APIResponse[TTSResponse], None]:
+        """See SSEClient._request."""
         async with httpx.AsyncClient() as client:
             async with client.stream(
                 method="POST",
-                url=f"{self.http_url}/sse/speak/{tts_config.lang_code}",
+                url=f"{self._http_url(base_url)}/sse/speak/{tts_config.lang_code}",
                 headers=self.headers,
                 json={"text": text, **to_dict(tts_config)},
                 timeout=timeout,
             ) as response:
+                if response.status_code in THROTTLE_STATUS_CODES:
+                    slot.throttled()
+
                 async for message in response.aiter_lines():
                     parsed_message = self._parse_message(message)
 
                     if parsed_message is not None:
+                        slot.first_byte()
                         yield parsed_message
+
+    async def _resume(
+        self,
+        text: str,
+        tts_config: TTSConfig,
+        timeout: float,
+        policy: StreamPolicy,
+        priority: Priority,
+    ) -> AsyncGenerator[APIResponse[TTSResponse], None]:
+        resumption = _Resumption(text, policy, self._metrics)
+
+        while True:
+            response = self._stream(resumption.text, tts_config, timeout, priority)
+
+            try:
+                while True:
+                    try:
+                        message = await asyncio.wait_for(
+                            response.__anext__(), resumption.deadline()
+                        )
+                    except StopAsyncIteration:
+                        return
+
+                    resumption.received(message)
+                    yield message
+            except _RETRYABLE as e:
+                if not resumption.retry(e):
+                    raise
+            finally:
+                await response.aclose()
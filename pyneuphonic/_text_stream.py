@@ -0,0 +1,240 @@
+import asyncio
+import re
+import time
+from typing import TYPE_CHECKING, AsyncIterable, Iterable, List, Optional, Union
+
+from pyneuphonic.models import FlushPolicy, TTSConfig
+from pyneuphonic.text import SentenceSegmenter
+
+if TYPE_CHECKING:
+    from pyneuphonic._websocket import AsyncTTSWebsocketClient
+
+# punctuation that ends a clause or sentence, optionally followed by closing quotes or brackets
+_CLAUSE_END = re.compile(r"[.!?;:,…。！？；：、，][\"'”’»)\]]*\s*$")
+
+
+class TextStream:
+    """
+    A session for streaming text, such as the tokens generated by an LLM, into an
+    `AsyncTTSWebsocketClient`. Create one with `AsyncTTSWebsocketClient.stream`.
+
+    Text is buffered and sent in as few messages as the flush policy allows. Each utterance is
+    ended with `complete` (or by `feed`), which returns a future that resolves once the last of
+    its audio has been received. Utterances are not waited for, so the text of the next
+    utterance is sent while the audio of the previous one is still arriving. Leaving the
+    `async with` block completes any unfinished utterance and waits for all of their audio.
+
+    Parameters
+    ----------
+    ws : AsyncTTSWebsocketClient
+        The open websocket to send text through.
+    flush_policy : FlushPolicy, optional
+        When buffered text is sent. By default `FlushPolicy()`.
+    timeout : float, optional
+        How long to wait, in seconds, for the audio of each utterance once it has been
+        completed. If it has not all arrived by then, e.g. because the text acknowledged by the
+        server does not match the text sent, the utterance's future fails with
+        `asyncio.TimeoutError`. By default 30. None waits indefinitely.
+    segmenter : SentenceSegmenter, optional
+        Splits the text into the segments that are sent. By default, if `flush_policy.segmenter`
+        is set, a `SentenceSegmenter` for the `lang_code` the websocket was opened with.
+    """
+
+    def __init__(
+        self,
+        ws: "AsyncTTSWebsocketClient",
+        flush_policy: Optional[FlushPolicy] = None,
+        timeout: Optional[float] = 30.0,
+        segmenter: Optional[SentenceSegmenter] = None,
+    ):
+        self.ws = ws
+        self.flush_policy = flush_policy if flush_policy is not None else FlushPolicy()
+        self.timeout = timeout
+
+        if segmenter is None and self.flush_policy.segmenter:
+            config = ws._config if ws._config is not None else TTSConfig()
+            lang_code = (
+                config.get("lang_code", "en")
+                if isinstance(config, dict)
+                else config.lang_code
+            )
+            segmenter = SentenceSegmenter(lang_code=lang_code)
+
+        self._segmenter = segmenter
+
+        self._buffer: List[str] = []
+        self._buffered_chars = 0
+        self._buffered_at = None  # when the oldest buffered text was written
+        self._flush_timer: Optional[asyncio.Task] = None
+        self._utterance_open = False  # text has been written since the last `complete`
+        self._utterances: List[asyncio.Future] = []
+
+    async def __aenter__(self) -> "TextStream":
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        if exc_type is not None:
+            self._cancel_flush_timer()
+            return
+
+        if self._utterance_open:
+            await self.complete()
+
+        await self.wait()
+
+    def _should_flush(self) -> bool:
+        if self._buffered_chars >= self.flush_policy.max_chars:
+            return True
+
+        if time.perf_counter() - self._buffered_at >= self.flush_policy.max_delay:
+            return True
+
+        return (
+            self.flush_policy.clause_boundaries
+            and _CLAUSE_END.search(self._buffer[-1]) is not None
+        )
+
+    def _cancel_flush_timer(self):
+        timer, self._flush_timer = self._flush_timer, None
+
+        if timer is not None and timer is not asyncio.current_task():
+            timer.cancel()
+
+    async def _flush_after(self, delay: float):
+        await asyncio.sleep(delay)
+        await self.flush()
+
+    def _take(self) -> str:
+        self._cancel_flush_timer()
+
+        if self._segmenter is not None:
+            text = self._segmenter.flush()
+        else:
+            text = "".join(self._buffer)
+            self._buffer.clear()
+            self._buffered_chars = 0
+
+        self._buffered_at = None
+
+        return text
+
+    async def write(self, text: str):
+        """
+        Add text to the current utterance. The text is sent once the flush policy allows, or once
+        the segmenter completes a segment. Either way, buffered text is also sent once it has
+        waited `flush_policy.max_delay` seconds, even if nothing else is written, e.g. when an
+        LLM stalls mid-sentence.
+
+        Parameters
+        ----------
+        text : str
+            The text to add, e.g. a single LLM token.
+        """
+        if not text:
+            return
+
+        self._utterance_open = True
+
+        if self._buffered_at is None:
+            self._buffered_at = time.perf_counter()
+
+        if self._segmenter is not None:
+            return await self._write_segmented(text)
+
+        self._buffer.append(text)
+        self._buffered_chars += len(text)
+
+        if self._should_flush():
+            await self.flush()
+        else:
+            self._start_flush_timer()
+
+    async def _write_segmented(self, text: str):
+        segments = self._segmenter.push(text)
+
+        if segments:
+            # the text left in the segmenter waits `max_delay` from now
+            self._cancel_flush_timer()
+            self._buffered_at = time.perf_counter() if len(self._segmenter) else None
+
+            await self.ws.send({"text": "".join(segments)})
+
+        if len(self._segmenter):
+            self._start_flush_timer()
+
+    def _start_flush_timer(self):
+        """Send the buffered text once it has waited `max_delay`, if nothing sends it sooner."""
+        if self._flush_timer is None:
+            delay = self.flush_policy.max_delay - (
+                time.perf_counter() - self._buffered_at
+            )
+            self._flush_timer = asyncio.ensure_future(
+                self._flush_after(max(0.0, delay))
+            )
+
+    async def flush(self):
+        """Send any buffered text immediately."""
+        text = self._take()
+
+        if text:
+            await self.ws.send({"text": text})
+
+    async def complete(self) -> asyncio.Future:
+        """
+        End the current utterance, sending any buffered text with the completion signal.
+
+        Returns
+        -------
+        asyncio.Future
+            Resolves once the audio for the utterance has been received.
+        """
+        utterance = await self.ws.send(
+            {"text": f"{self._take()} <STOP>"}, timeout=self.timeout
+        )
+        self._utterance_open = False
+
+        if self._segmenter is not None:
+            # start the next utterance with a short segment again
+            self._segmenter.reset()
+
+        self._utterances.append(utterance.done)
+
+        return utterance.done
+
+    async def feed(
+        self, tokens: Union[str, Iterable[str], AsyncIterable[str]]
+    ) -> asyncio.Future:
+        """
+        Send a whole utterance and complete it.
+
+        Parameters
+        ----------
+        tokens : Union[str, Iterable[str], AsyncIterable[str]]
+            The text of the utterance, e.g. the token stream of an LLM. The tokens are sent as
+            they arrive, coalesced according to the flush policy.
+
+        Returns
+        -------
+        asyncio.Future
+            Resolves once the audio for the utterance has been received. This does not need to
+            be awaited before feeding the next utterance.
+        """
+        if isinstance(tokens, str):
+            tokens = [tokens]
+
+        if hasattr(tokens, "__aiter__"):
+            async for token in tokens:
+                await self.write(token)
+        else:
+            for token in tokens:
+                await self.write(token)
+
+        return await self.complete()
+
+    async def wait(self):
+        """Wait until the audio for every completed utterance has been received."""
+        utterances, self._utterances = self._utterances, []
+
+        if utterances:
+            # each utterance fails by itself if its audio takes longer than `self.timeout`
+            await asyncio.gather(*utterances)
@@ -1,12 +1,41 @@
-import wave
+import re
 from typing import Optional, Iterator, Union, AsyncIterator
 from pyneuphonic.models import APIResponse, TTSResponse
+from pyneuphonic.audio.codecs import StreamingTranscoder, PCM_LINEAR
+from pyneuphonic.audio.containers import demux
+from pyneuphonic.audio.resampler import Resampler
+from pyneuphonic.audio.stream import AsyncAudioStream, AudioStream
+from pyneuphonic.audio.wav import AsyncWavWriter, WavWriter
+
+
+def _demux(audio_bytes, output_format: str, sampling_rate: int, encoding: str):
+    """
+    Returns the raw audio in `audio_bytes`, sent in a container `output_format`. Streams are
+    demuxed as they are read, and streams that are already `AudioStream`s are returned as they
+    are.
+    """
+    if isinstance(audio_bytes, (bytes, bytearray)):
+        return b"".join(demux([audio_bytes], output_format))
+
+    if isinstance(audio_bytes, AsyncIterator):
+        stream = AsyncAudioStream(audio_bytes, sampling_rate, encoding)
+    elif isinstance(audio_bytes, Iterator):
+        stream = AudioStream(audio_bytes, sampling_rate, encoding)
+    else:
+        return audio_bytes
+
+    return stream.demux(output_format)
 
 
 def save_audio(
-    audio_bytes: Union[bytes, bytearray, Iterator[APIResponse[TTSResponse]]],
+    audio_bytes: Union[
+        bytes, bytearray, Iterator[APIResponse[TTSResponse]], AudioStream
+    ],
     file_path: str,
     sampling_rate: Optional[int] = 24000,
+    encoding: str = PCM_LINEAR,
+    output_sampling_rate: Optional[int] = None,
+    output_format: Optional[str] = None,
 ):
     """
     Takes in an audio buffer and saves it to a .wav file.
@@ -14,36 +43,63 @@ def save_audio(
     Parameters
     ----------
     audio_bytes
-        The audio buffer to save. This is all the bytes returned from the server.
+        The audio buffer to save. This is all the bytes returned from the server. If it is an
+        `AudioStream`, its own sampling rate and encoding are used, rather than `sampling_rate`
+        and `encoding`.
     file_path
         The file path you want to save the audio to.
     sampling_rate
         The sample rate of the audio you want to save. Default is 24000.
+    encoding
+        The encoding of the audio, e.g. `pcm_mulaw` if that was requested in the `TTSConfig`.
+        The audio is always saved as 16-bit PCM. Default is `pcm_linear`.
+    output_sampling_rate
+        If set, the audio is resampled to this rate before it is saved. Default is None.
+    output_format
+        The `output_format` requested in the `TTSConfig`, if any, e.g. `wav`. The container is
+        stripped from the audio before it is saved. Not used for an `AudioStream`, which
+        `AudioStream.from_response` has already demuxed. Default is None.
     """
+    if output_format is not None:
+        audio_bytes = _demux(audio_bytes, output_format, sampling_rate, encoding)
+
+    if isinstance(audio_bytes, AudioStream):
+        if output_sampling_rate is not None:
+            audio_bytes = audio_bytes.resample(output_sampling_rate)
+
+        return audio_bytes.save(file_path)
+
+    transcoder = StreamingTranscoder(encoding, PCM_LINEAR)
+    resampler = Resampler(sampling_rate, output_sampling_rate or sampling_rate)
+
     if isinstance(audio_bytes, bytes) or isinstance(audio_bytes, bytearray):
-        with wave.open(file_path, "wb") as wav_file:
-            wav_file.setnchannels(1)
-            wav_file.setsampwidth(2)
-            wav_file.setframerate(sampling_rate)
-            wav_file.writeframes(bytes(audio_bytes))
+        with WavWriter(file_path, resampler.output_rate) as wav_file:
+            wav_file.write(resampler.process(transcoder.convert(audio_bytes)))
+            wav_file.write(resampler.flush())
     elif isinstance(audio_bytes, Iterator):
-        with wave.open(file_path, "wb") as wav_file:
-            wav_file.setnchannels(1)
-            wav_file.setsampwidth(2)
-            wav_file.setframerate(sampling_rate)
+        with WavWriter(file_path, resampler.output_rate) as wav_file:
             for message in audio_bytes:
                 if not isinstance(message, APIResponse[TTSResponse]):
                     raise ValueError(
                         "`audio_bytes` must be an Iterator yielding an object of type"
                         "`pyneuphonic.models.APIResponse[TTSResponse]`"
                     )
-                wav_file.writeframes(message.data.audio)
+                wav_file.write(
+                    resampler.process(transcoder.convert(message.data.audio))
+                )
+
+            wav_file.write(resampler.flush())
 
 
 async def async_save_audio(
-    audio_bytes: Union[bytes, bytearray, AsyncIterator[APIResponse[TTSResponse]]],
+    audio_bytes: Union[
+        bytes, bytearray, AsyncIterator[APIResponse[TTSResponse]], AsyncAudioStream
+    ],
     file_path: str,
     sampling_rate: Optional[int] = 24000,
+    encoding: str = PCM_LINEAR,
+    output_sampling_rate: Optional[int] = None,
+    output_format: Optional[str] = None,
 ):
     """
     Takes in an audio buffer and saves it to a .wav file.
@@ -51,27 +107,67 @@ async def async_save_audio(
     Parameters
     ----------
     audio_bytes
-        The audio buffer to save. This is all the bytes returned from the server.
+        The audio buffer to save. This is all the bytes returned from the server. If it is an
+        `AudioStream`, its own sampling rate and encoding are used, rather than `sampling_rate`
+        and `encoding`.
     file_path
         The file path you want to save the audio to.
     sample_rate
         The sample rate of the audio you want to save. Default is 24000.
+    encoding
+        The encoding of the audio, e.g. `pcm_mulaw` if that was requested in the `TTSConfig`.
+        The audio is always saved as 16-bit PCM. Default is `pcm_linear`.
+    output_sampling_rate
+        If set, the audio is resampled to this rate before it is saved. Default is None.
+    output_format
+        The `output_format` requested in the `TTSConfig`, if any, e.g. `wav`. The container is
+        stripped from the audio before it is saved. Not used for an `AudioStream`, which
+        `AudioStream.from_response` has already demuxed. Default is None.
     """
+    if output_format is not None:
+        audio_bytes = _demux(audio_bytes, output_format, sampling_rate, encoding)
+
+    if isinstance(audio_bytes, AsyncAudioStream):
+        if output_sampling_rate is not None:
+            audio_bytes = audio_bytes.resample(output_sampling_rate)
+
+        return await audio_bytes.save(file_path)
+
+    transcoder = StreamingTranscoder(encoding, PCM_LINEAR)
+    resampler = Resampler(sampling_rate, output_sampling_rate or sampling_rate)
+
     if isinstance(audio_bytes, bytes) or isinstance(audio_bytes, bytearray):
-        with wave.open(file_path, "wb") as wav_file:
-            wav_file.setnchannels(1)
-            wav_file.setsampwidth(2)
-            wav_file.setframerate(sampling_rate)
-            wav_file.writeframes(bytes(audio_bytes))
+        async with AsyncWavWriter(file_path, resampler.output_rate) as wav_file:
+            await wav_file.write(resampler.process(transcoder.convert(audio_bytes)))
+            await wav_file.write(resampler.flush())
     elif isinstance(audio_bytes, AsyncIterator):
-        with wave.open(file_path, "wb") as wav_file:
-            wav_file.setnchannels(1)
-            wav_file.setsampwidth(2)
-            wav_file.setframerate(sampling_rate)
+        async with AsyncWavWriter(file_path, resampler.output_rate) as wav_file:
             async for message in audio_bytes:
                 if not isinstance(message, APIResponse[TTSResponse]):
                     raise ValueError(
                         "`audio_bytes` must be an AsyncIterator yielding an object of type"
                         "`pyneuphonic.models.APIResponse[TTSResponse]`"
                     )
-                wav_file.writeframes(message.data.audio)
+                await wav_file.write(
+                    resampler.process(transcoder.convert(message.data.audio))
+                )
+
+            await wav_file.write(resampler.flush())
+
+
+def _count_visible(text: str) -> int:
+    """Returns the number of non-whitespace characters in `text`."""
+    return len(text) - sum(1 for character in text if character.isspace())
+
+
+def _drop_visible(text: str, n: int) -> str:
+    """
+    Returns `text` with its first `n` non-whitespace characters, and any whitespace before
+    them, removed.
+    """
+    if n <= 0:
+        return text
+
+    match = re.match(rf"(?:\s*\S){{{n}}}", text)
+
+    return text[match.end() :] if match else ""
@@ -0,0 +1,118 @@
+import asyncio
+import concurrent.futures
+import queue
+from typing import AsyncIterator, Iterator, Optional, Union
+
+from pyneuphonic.models import APIResponse, TTSResponse
+
+
+class UtteranceBase:
+    """
+    A handle on one utterance sent to a TTS websocket client, i.e. the text sent up to and
+    including a `<STOP>`. It is returned by `send(..., autocomplete=True)` and `complete`.
+
+    Messages received on the websocket are matched to the utterance they belong to, by the text
+    each chunk of audio was synthesised from, so several utterances can be queued on the same
+    connection. The messages for the utterance are passed to any message handlers as usual, but
+    are delivered through the handle rather than `receive`. They are kept by the handle until
+    they are iterated over, or until the handle is discarded.
+    """
+
+    _messages: Union[asyncio.Queue, queue.Queue]
+    done: Union[asyncio.Future, concurrent.futures.Future]
+
+    def __init__(self):
+        # the number of characters sent up to the end of the utterance, once it is completed
+        self._end: Optional[int] = None
+        self._timer = None  # fails the utterance if its audio takes too long to arrive
+
+    def _put(self, message: APIResponse[TTSResponse]):
+        self._messages.put_nowait(message)
+
+    def _finish(self, exception: Optional[BaseException] = None):
+        if self.done.done():
+            return
+
+        if self._timer is not None:
+            self._timer.cancel()
+
+        if exception is None:
+            self.done.set_result(None)
+        else:
+            self.done.set_exception(exception)
+            # the error is raised by iterating, so it shouldn't also be logged as unretrieved
+            self.done.exception()
+
+        self._messages.put_nowait(None)
+
+
+class Utterance(UtteranceBase):
+    """
+    See UtteranceBase. Returned by `TTSWebsocketClient`. Iterate over the handle to receive the
+    messages for this utterance only, e.g.
+
+    >>> utterance = ws.send('Hello, world!', autocomplete=True)
+    >>> for message in utterance:
+    >>>     audio += message.data.audio
+
+    or call `done.result()` to block until all of its audio has arrived.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._messages = queue.Queue()
+
+        self.done = concurrent.futures.Future()
+        """Resolves once all of the audio for the utterance has been received."""
+
+    def __iter__(self) -> Iterator[APIResponse[TTSResponse]]:
+        return self
+
+    def __next__(self) -> APIResponse[TTSResponse]:
+        message = self._messages.get()
+
+        if message is None:
+            # keep the end marker for any other iterator, and raise the error if the audio
+            # didn't all arrive
+            self._messages.put_nowait(None)
+            self.done.result()
+
+            raise StopIteration
+
+        return message
+
+
+class AsyncUtterance(UtteranceBase):
+    """
+    See UtteranceBase. Returned by `AsyncTTSWebsocketClient`. Iterate over the handle to
+    receive the messages for this utterance only, e.g.
+
+    >>> utterance = await ws.send('Hello, world!', autocomplete=True)
+    >>> async for message in utterance:
+    >>>     audio += message.data.audio
+
+    or await `done` to wait until all of its audio has arrived.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._messages = asyncio.Queue()
+
+        self.done = asyncio.get_running_loop().create_future()
+        """Resolves once all of the audio for the utterance has been received."""
+
+    def __aiter__(self) -> AsyncIterator[APIResponse[TTSResponse]]:
+        return self
+
+    async def __anext__(self) -> APIResponse[TTSResponse]:
+        message = await self._messages.get()
+
+        if message is None:
+            # keep the end marker for any other iterator, and raise the error if the audio
+            # didn't all arrive
+            self._messages.put_nowait(None)
+            await self.done
+
+            raise StopAsyncIteration
+
+        return message
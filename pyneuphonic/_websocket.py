@@ -1,14 +1,22 @@
 import asyncio
+import concurrent.futures
+import functools
+import inspect
+import logging
+import queue
+import re
+import threading
+import time
 import websockets
-from typing import Callable, Union
+import websockets.sync.client
+from collections import deque
+from typing import Callable, Iterator, Optional, Union
 import json
-import ssl
-import certifi
 from abc import ABC, abstractmethod
 
 from pyneuphonic._endpoint import Endpoint
+from pyneuphonic._events import EventDispatcher
 from pyneuphonic.models import (
-    WebsocketEventHandlers,
     TTSConfig,
     APIResponse,
     TTSResponse,
@@ -16,11 +24,199 @@ from pyneuphonic.models import (
     BaseConfig,
     AgentConfig,
     AgentResponse,
+    OverflowPolicy,
+    WebsocketMetrics,
+    ReconnectPolicy,
+    ReconnectEvent,
+    FlushPolicy,
+    Priority,
 )
+from pyneuphonic._text_stream import TextStream
+from pyneuphonic._governor import THROTTLE_STATUS_CODES, Governor, Slot
+from pyneuphonic._regions import WEBSOCKET, Regions
+from pyneuphonic._utterance import AsyncUtterance, Utterance, UtteranceBase
+from pyneuphonic._utils import _count_visible, _drop_visible
+from pyneuphonic.text import SentenceSegmenter
 from pydantic import BaseModel
 
+logger = logging.getLogger("pyneuphonic")
 
-class AsyncWebsocketBase(Endpoint, ABC):
+
+class WebsocketBase(Endpoint):
+    """
+    State shared by the synchronous and asynchronous websocket clients: the event handlers, the
+    overflow and reconnect policies, the metrics, and the steps of resuming a dropped session
+    that don't depend on whether the connection is read by a thread or a task.
+
+    Parameters
+    ----------
+    api_key : str
+        The API key for authentication.
+    base_url : str
+        The base URL for the websocket connection.
+    overflow_policy : OverflowPolicy
+        What to do with a received message when the queue is full. By default
+        `OverflowPolicy.BLOCK`, which stops reading from the socket until there is space.
+    reconnect_policy : ReconnectPolicy, optional
+        If set, the client reconnects automatically when the connection drops, and
+        `WebsocketEvents.RECONNECT` handlers are called with a `ReconnectEvent` once the session
+        has been resumed. By default None, in which case a dropped connection closes the client.
+    """
+
+    def __init__(
+        self,
+        api_key: str,
+        base_url: str,
+        overflow_policy: OverflowPolicy = OverflowPolicy.BLOCK,
+        reconnect_policy: Optional[ReconnectPolicy] = None,
+    ):
+        super().__init__(api_key=api_key, base_url=base_url)
+
+        self.dispatcher = EventDispatcher()
+        self.overflow_policy = overflow_policy
+        self.reconnect_policy = reconnect_policy
+
+        self._metrics = WebsocketMetrics()
+
+        self._ws = None
+        self._config = None
+        # the standby connection, or the task or future dialling it
+        self._standby = None
+        self._closing = False
+
+    def on(
+        self,
+        event: WebsocketEvents,
+        handler: Callable,
+        message_type: Optional[str] = None,
+        priority: int = 0,
+    ):
+        """
+        Register an event handler for a specific websocket event. Any number of handlers can be
+        registered for each event.
+
+        Parameters
+        ----------
+        event : WebsocketEvents
+            The event to handle.
+        handler : Callable
+            The function or coroutine function to call when the event occurs.
+        message_type : str, optional
+            Only valid for `WebsocketEvents.MESSAGE`. If set, the handler is only called for
+            messages of this type, e.g. `audio_response` or `stop_audio_response` on the agent
+            websocket.
+        priority : int, optional
+            Handlers with a higher priority are called before other handlers for the same
+            message, e.g. so that interruptions are handled before anything else. By default 0.
+
+        Raises
+        ------
+        ValueError
+            If the event is not a valid WebsocketEvents.
+        """
+        if event not in WebsocketEvents:
+            raise ValueError(f'Event "{event}" is not a valid event.')
+
+        self.dispatcher.subscribe(
+            event, handler, message_type=message_type, priority=priority
+        )
+
+    def off(
+        self,
+        event: WebsocketEvents,
+        handler: Callable,
+        message_type: Optional[str] = None,
+    ):
+        """
+        Remove an event handler registered with `on`.
+
+        Parameters
+        ----------
+        event : WebsocketEvents
+            The event the handler was registered for.
+        handler : Callable
+            The handler to remove.
+        message_type : str, optional
+            The message type the handler was registered for, if any.
+        """
+        self.dispatcher.unsubscribe(event, handler, message_type=message_type)
+
+    def _resumable(self) -> bool:
+        """Returns True if a dropped connection is to be replaced rather than closing the client."""
+        # once closing, whether by `close` or after running out of attempts, nothing resumes
+        return self.reconnect_policy is not None and not self._closing
+
+    def _make_room(self, message_queue) -> bool:
+        """
+        Apply `self.overflow_policy` before putting a message on a full queue. Returns False if
+        the message is to be dropped.
+        """
+        if not message_queue.full():
+            return True
+
+        if self.overflow_policy == OverflowPolicy.DROP_NEWEST:
+            self._metrics.messages_dropped += 1
+            return False
+
+        if self.overflow_policy == OverflowPolicy.DROP_OLDEST:
+            try:
+                message_queue.get_nowait()
+            except (queue.Empty, asyncio.QueueEmpty):
+                pass
+            else:
+                message_queue.task_done()
+
+            self._metrics.messages_dropped += 1
+
+        return True
+
+    def _record_queue_depth(self, depth: int):
+        self._metrics.max_queue_depth = max(self._metrics.max_queue_depth, depth)
+
+    @staticmethod
+    def _if_open(ws):
+        """Returns `ws` if it is a connection that is still open, otherwise None."""
+        if ws is None or getattr(ws, "close_code", None) is not None:
+            return None
+
+        return ws
+
+    def _attempt_failed(self, attempts: int, error: Exception) -> float:
+        """
+        Called when dialling a replacement connection fails. Returns how long to wait before
+        the next attempt, or raises `error` once the policy's attempts have run out.
+        """
+        if attempts >= self.reconnect_policy.max_attempts:
+            logger.error(f"Reconnection failed after {attempts} attempts: {error}")
+            raise error
+
+        return self.reconnect_policy.delay(attempts)
+
+    def _reconnected(
+        self,
+        dropped_at: float,
+        attempts: int,
+        used_standby: bool,
+        replayed_text: Optional[str],
+    ) -> ReconnectEvent:
+        """Record that a dropped session has been resumed, and returns the event to emit."""
+        recovery_latency = time.perf_counter() - dropped_at
+        self._metrics.reconnects += 1
+        self._metrics.recovery_latency = recovery_latency
+
+        return ReconnectEvent(
+            attempts=attempts,
+            recovery_latency=recovery_latency,
+            used_standby=used_standby,
+            replayed_text=replayed_text,
+        )
+
+    @staticmethod
+    def _encode(message: Union[str, dict]) -> str:
+        return message if isinstance(message, str) else json.dumps(message)
+
+
+class AsyncWebsocketBase(WebsocketBase, ABC):
     """
     Abstract base class for asynchronous websocket clients.
 
@@ -33,6 +229,16 @@ class AsyncWebsocketBase(Endpoint, ABC):
     response_type : BaseModel
         The type of response expected from the websocket. This will be one of TTSResponse and
         AgentResponse.
+    max_queue_size : int
+        The maximum number of received messages that can wait to be handled, either by the
+        message handler or by `receive`. By default 1024.
+    overflow_policy : OverflowPolicy
+        What to do with a received message when the queue is full. By default
+        `OverflowPolicy.BLOCK`, which stops reading from the socket until there is space.
+    reconnect_policy : ReconnectPolicy, optional
+        If set, the client reconnects automatically when the connection drops, and
+        `WebsocketEvents.RECONNECT` handlers are called with a `ReconnectEvent` once the session
+        has been resumed. By default None, in which case a dropped connection closes the client.
     """
 
     def __init__(
@@ -40,29 +246,45 @@ class AsyncWebsocketBase(Endpoint, ABC):
         api_key: str,
         base_url: str,
         response_type: BaseModel,
+        max_queue_size: int = 1024,
+        overflow_policy: OverflowPolicy = OverflowPolicy.BLOCK,
+        reconnect_policy: Optional[ReconnectPolicy] = None,
     ):
-        super().__init__(api_key=api_key, base_url=base_url)
+        super().__init__(
+            api_key=api_key,
+            base_url=base_url,
+            overflow_policy=overflow_policy,
+            reconnect_policy=reconnect_policy,
+        )
 
-        self.event_handlers = WebsocketEventHandlers()
-        self.message_queue = asyncio.Queue()
+        # messages are queued here if no message handler is set, to be picked up by `receive`
+        self.message_queue = asyncio.Queue(maxsize=max_queue_size)
+        # messages are queued here, with the time they were received, to be passed to the
+        # message handler by `_dispatch`, so that a slow handler does not stop the socket from
+        # being read
+        self._dispatch_queue = asyncio.Queue(maxsize=max_queue_size)
 
-        self._ws = None
         self._tasks = []
 
+        # held while a message is sent, and while a dropped session is being resumed, so that
+        # nothing is sent on the new connection before the replayed messages
+        self._send_lock = asyncio.Lock()
+
         self.response_type = response_type
 
     @property
-    def ssl_context(self):
-        ssl_context = (
-            None
-            if self._is_localhost()
-            else ssl.create_default_context(cafile=certifi.where())
+    def metrics(self) -> WebsocketMetrics:
+        """Returns metrics describing how quickly received messages are being handled."""
+        return self._metrics.model_copy(
+            update={
+                "queue_depth": self._dispatch_queue.qsize() + self.message_queue.qsize()
+            }
         )
 
-        return ssl_context
-
     @abstractmethod
-    def url(self, config: Union[BaseConfig, dict]) -> str:
+    def url(
+        self, config: Union[BaseConfig, dict], base_url: Optional[str] = None
+    ) -> str:
         """
         Construct the URL for the websocket connection.
 
@@ -71,6 +293,8 @@ class AsyncWebsocketBase(Endpoint, ABC):
         config : Union[BaseConfig, dict]
             Configuration for the websocket connection. This is required to extract the query
             parameters.
+        base_url : str, optional
+            The base URL of the region to connect to. By default `base_url`.
 
         Returns
         -------
@@ -79,27 +303,6 @@ class AsyncWebsocketBase(Endpoint, ABC):
         """
         pass
 
-    def on(self, event: WebsocketEvents, handler: Callable):
-        """
-        Register an event handler for a specific websocket event.
-
-        Parameters
-        ----------
-        event : WebsocketEvents
-            The event to handle.
-        handler : Callable
-            The function to call when the event occurs.
-
-        Raises
-        ------
-        ValueError
-            If the event is not a valid WebsocketEvents.
-        """
-        if event not in WebsocketEvents:
-            raise ValueError(f'Event "{event}" is not a valid event.')
-
-        setattr(self.event_handlers, event.value, handler)
-
     @abstractmethod
     async def open(self, config: Union[BaseConfig, dict]):
         """
@@ -111,44 +314,178 @@ class AsyncWebsocketBase(Endpoint, ABC):
         config : Union[BaseConfig, dict]
             Configuration for the websocket connection.
         """
+        self._config = config
+        self._closing = False
+
         try:
-            self._ws = await websockets.connect(
-                self.url(config),
-                ssl=self.ssl_context,
-                additional_headers=self.headers,
-            )
+            self._ws = await self._connect()
         except Exception as exce:
             raise Exception(
                 "Connection to Neuphonic server failed, please check your configuration."
             )
 
-        if self.event_handlers.open is not None:
-            await self.event_handlers.open()
+        await self.dispatcher.emit(WebsocketEvents.OPEN)
+
+        dispatch_task = asyncio.create_task(self._dispatch())
+        self._tasks.append(dispatch_task)
 
         receive_task = asyncio.create_task(self._receive())
         self._tasks.append(receive_task)
 
+        self._dial_standby()
+
+    async def _connect(self):
+        """Dial a new connection using the configuration passed to `open`."""
+        return await self._dial(self.base_url)
+
+    async def _dial(self, base_url: str):
+        """Dial a new connection to the region at `base_url`."""
+        return await websockets.connect(
+            self.url(self._config, base_url),
+            ssl=self._ssl_context(base_url),
+            additional_headers=self.headers,
+        )
+
+    def _dial_standby(self):
+        """Start dialling a standby connection in the background, if the policy asks for one."""
+        if self.reconnect_policy is not None and self.reconnect_policy.standby:
+            self._standby = asyncio.create_task(self._connect())
+
+    async def _take_standby(self):
+        """Returns the standby connection if it is still open, otherwise None."""
+        standby, self._standby = self._standby, None
+
+        if standby is None:
+            return None
+
+        try:
+            # if the standby is still being dialled it is further along than a new connection
+            return self._if_open(await standby)
+        except Exception:
+            return None
+
+    async def _reconnect(self):
+        """
+        Replace a dropped connection and resume the session. The standby connection is used if
+        there is one, otherwise a new connection is dialled with exponential backoff.
+        """
+        dropped_at = time.perf_counter()
+
+        ws = await self._take_standby()
+        used_standby = ws is not None
+        attempts = 0
+
+        while ws is None:
+            attempts += 1
+
+            try:
+                ws = await self._connect()
+            except Exception as e:
+                await asyncio.sleep(self._attempt_failed(attempts, e))
+
+        async with self._send_lock:
+            self._ws = ws
+            replayed_text = await self._resume()
+
+        event = self._reconnected(dropped_at, attempts, used_standby, replayed_text)
+        self._dial_standby()
+
+        await self.dispatcher.emit(WebsocketEvents.RECONNECT, event)
+
+    async def _resume(self) -> Optional[str]:
+        """
+        Called with the send lock held once a dropped connection has been replaced, to bring the
+        new connection up to date. Returns any text that was sent again.
+        """
+        return None
+
+    def _on_message(self, message: APIResponse) -> bool:
+        """
+        Called with every message as soon as it has been received. Returns True if the message
+        has been delivered elsewhere, in which case it is not queued for `receive`.
+        """
+        return False
+
+    async def _enqueue(self, queue: asyncio.Queue, item):
+        """Put an item on one of the message queues, applying `self.overflow_policy`."""
+        if not self._make_room(queue):
+            return
+
+        await queue.put(item)
+
+        self._record_queue_depth(
+            self._dispatch_queue.qsize() + self.message_queue.qsize()
+        )
+
     async def _receive(self):
         """
-        Receive messages from the websocket and handle them. This is created and launched as an
-        async task when when self.open is called.
+        Receive messages from the websocket and queue them to be handled. This is created and
+        launched as an async task when when self.open is called.
         """
         try:
-            async for message in self._ws:
-                if isinstance(message, str):
-                    message = APIResponse[self.response_type](**json.loads(message))
-
-                    if self.event_handlers.message is not None:
-                        await self.event_handlers.message(message)
-                    else:
-                        await self.message_queue.put(message)
+            while True:
+                try:
+                    async for message in self._ws:
+                        if isinstance(message, str):
+                            received_at = time.perf_counter()
+                            message = APIResponse[self.response_type](
+                                **json.loads(message)
+                            )
+                            self._metrics.messages_received += 1
+
+                            delivered = self._on_message(message)
+
+                            if self.dispatcher.has_handlers(WebsocketEvents.MESSAGE):
+                                await self._enqueue(
+                                    self._dispatch_queue, (received_at, message)
+                                )
+                            elif not delivered:
+                                await self._enqueue(self.message_queue, message)
+
+                    break
+                except (websockets.ConnectionClosedError, OSError):
+                    if not self._resumable():
+                        raise
+
+                    await self._reconnect()
+
+            # let the message handler catch up before signalling that the socket has closed
+            await self._dispatch_queue.join()
         except Exception as e:
             raise Exception("Message from websocket could not be received correctly.")
         finally:
-            if self.event_handlers.close:
-                await self.event_handlers.close()
+            await self.dispatcher.emit(WebsocketEvents.CLOSE)
 
-            await self.close()
+            # if `close` cancelled this task, it is already tearing everything down
+            if not self._closing:
+                await self.close()
+
+    async def _dispatch(self):
+        """
+        Pass queued messages to the message handler, in the order they were received. This is
+        created and launched as an async task when self.open is called.
+        """
+        # a handler may close the client, in which case this task is not cancelled but stops here
+        while not self._closing:
+            received_at, message = await self._dispatch_queue.get()
+
+            lag = time.perf_counter() - received_at
+            self._metrics.handler_lag = lag
+            self._metrics.max_handler_lag = max(self._metrics.max_handler_lag, lag)
+
+            try:
+                await self.dispatcher.emit(
+                    WebsocketEvents.MESSAGE,
+                    message,
+                    message_type=getattr(message.data, "type", None),
+                )
+            except Exception as e:
+                if self.dispatcher.has_handlers(WebsocketEvents.ERROR):
+                    await self.dispatcher.emit(WebsocketEvents.ERROR, e)
+                else:
+                    logger.error(f"Error in websocket message handler: {e}")
+            finally:
+                self._dispatch_queue.task_done()
 
     async def send(self, message: Union[str, dict], *args, **kwargs):
         """
@@ -168,9 +505,30 @@ class AsyncWebsocketBase(Endpoint, ABC):
             message, (str, dict)
         ), "Message must be an instance of str or dict"
 
-        message = message if isinstance(message, str) else json.dumps(message)
+        async with self._send_lock:
+            result = self._on_send(message)
+            await self._write(message)
+
+        return result
+
+    def _on_send(self, message: Union[str, dict]):
+        """
+        Called with every message just before it is sent. Whatever this returns is returned by
+        `send`.
+        """
+        return None
+
+    async def _write(self, message: Union[str, dict]):
+        """Send a message on the current connection."""
+        try:
+            await self._ws.send(self._encode(message))
+            self._metrics.messages_sent += 1
+        except websockets.ConnectionClosed:
+            if not self._resumable():
+                raise
 
-        await self._ws.send(message)
+            # `_receive` notices the dropped connection and resumes the session
+            logger.debug("Websocket message not sent as the connection has dropped.")
 
     async def receive(self):
         """
@@ -186,9 +544,27 @@ class AsyncWebsocketBase(Endpoint, ABC):
 
     async def close(self):
         """
-        Close the websocket connection and cancel all tasks.
+        Close the websocket connection and cancel all tasks. Calling this again while the client is
+        already closing, e.g. from a message handler, has no effect.
         """
+        if self._closing:
+            return
+
+        self._closing = True
+
+        if self._standby is not None:
+            standby, self._standby = self._standby, None
+            standby.cancel()
+
+            try:
+                await (await standby).close()
+            except (asyncio.CancelledError, Exception):
+                pass
+
         for task in self._tasks:
+            if task is asyncio.current_task():
+                continue
+
             task.cancel()
 
             try:
@@ -199,7 +575,673 @@ class AsyncWebsocketBase(Endpoint, ABC):
         await self._ws.close()
 
 
-class AsyncTTSWebsocketClient(AsyncWebsocketBase):
+_STOP = "<STOP>"
+
+
+class _ReplayBuffer:
+    """
+    Text that has been sent to the TTS websocket but has not been synthesised yet.
+
+    The server returns the text each chunk of audio was synthesised from in `TTSResponse.text`,
+    and that text is removed from the front of the buffer by counting non-whitespace characters,
+    so that acknowledgements are not thrown off by the server normalising whitespace.
+    Completion signals are kept as separate segments so that they can be sent again in order.
+    """
+
+    def __init__(self):
+        self._segments = deque()
+
+    def __len__(self) -> int:
+        return len(self._segments)
+
+    @property
+    def text(self) -> str:
+        """The un-synthesised text, with completion signals as `<STOP>`."""
+        return "".join(self._segments)
+
+    def append(self, text: str):
+        for segment in re.split(f"({_STOP})", text):
+            if segment:
+                self._segments.append(segment)
+
+    def acknowledge(self, text: str):
+        n = _count_visible(text)
+
+        while n > 0 and self._segments:
+            segment = self._segments[0]
+
+            if segment == _STOP:
+                self._segments.popleft()
+                continue
+
+            k = _count_visible(segment)
+
+            if k <= n:
+                self._segments.popleft()
+                n -= k
+            else:
+                self._segments[0] = _drop_visible(segment, n)
+                n = 0
+
+        # a completion signal is redundant once everything before it has been synthesised
+        while self._segments and self._segments[0] == _STOP:
+            self._segments.popleft()
+
+    def messages(self):
+        """Returns the messages needed to send the buffered text again."""
+        messages = []
+        text = ""
+
+        for segment in self._segments:
+            if segment == _STOP:
+                messages.append({"text": text + _STOP if text else f" {_STOP}"})
+                text = ""
+            else:
+                text += segment
+
+        if text:
+            messages.append({"text": text})
+
+        return messages
+
+
+class TTSWebsocketClientBase:
+    """
+    Behaviour shared by `TTSWebsocketClient` and `AsyncTTSWebsocketClient`.
+
+    The server returns the text each chunk of audio was synthesised from, so comparing the
+    number of characters sent with the number acknowledged tells us which utterance each
+    message belongs to, when the audio for an utterance has all arrived, and which text has to
+    be sent again if the connection drops.
+    """
+
+    # the handle returned for each utterance, and the error it fails with if its audio takes
+    # too long to arrive
+    _utterance_type = UtteranceBase
+    _timeout_error = TimeoutError
+
+    reconnect_policy: Optional[ReconnectPolicy]
+
+    def __init__(
+        self,
+        *args,
+        regions: Optional[Regions] = None,
+        governor: Optional[Governor] = None,
+        priority: Priority = Priority.NORMAL,
+        **kwargs,
+    ):
+        super().__init__(*args, **kwargs)
+
+        # if set, connections are opened to the fastest of several regional deployments
+        self._regions = regions
+        # if set, limits the connections opened with the API key
+        self._governor = governor
+        self.priority = priority
+        self._replay_buffer = _ReplayBuffer()
+
+        self._sent_chars = 0
+        self._acknowledged_chars = 0
+        # utterances that are still receiving audio, oldest first
+        self._utterances = deque()
+
+    def url(
+        self, config: Union[TTSConfig, dict], base_url: Optional[str] = None
+    ) -> str:
+        """
+        See AsyncWebsocketClientBase.url
+        """
+        if not isinstance(config, TTSConfig):
+            config = TTSConfig(**config)
+
+        return (
+            f"{self._ws_url(base_url)}/speak/{config.lang_code}"
+            f"?{config.to_query_params()}"
+        )
+
+    def _on_send(self, message: Union[str, dict]) -> Optional[UtteranceBase]:
+        text = message if isinstance(message, str) else message.get("text")
+
+        if not text:
+            return None
+
+        if self.reconnect_policy is not None:
+            self._replay_buffer.append(text)
+
+        utterance = None
+
+        for segment in re.split(f"({_STOP})", text):
+            if segment == _STOP:
+                utterance = self._open_utterance()
+                utterance._end = self._sent_chars
+            elif _count_visible(segment) > 0:
+                self._open_utterance()
+                self._sent_chars += _count_visible(segment)
+
+        self._finish_acknowledged()
+
+        return utterance
+
+    def _open_utterance(self) -> UtteranceBase:
+        """Returns the utterance that text is being sent for, starting one if needed."""
+        if not self._utterances or self._utterances[-1]._end is not None:
+            self._utterances.append(self._utterance_type())
+
+        return self._utterances[-1]
+
+    def _finish_acknowledged(self):
+        """Finish the utterances whose audio has all been received."""
+        while (
+            self._utterances
+            and self._utterances[0]._end is not None
+            and self._utterances[0]._end <= self._acknowledged_chars
+        ):
+            self._utterances.popleft()._finish()
+
+    def _on_message(self, message: APIResponse[TTSResponse]) -> bool:
+        delivered = False
+
+        # the message belongs to the utterance that its first character was sent in
+        for utterance in self._utterances:
+            if utterance._end is None or utterance._end > self._acknowledged_chars:
+                utterance._put(message)
+                delivered = True
+                break
+
+        if not message.data.text:
+            return delivered
+
+        if self._replay_buffer:
+            self._replay_buffer.acknowledge(message.data.text)
+
+        # text the server adds can't be allowed to count towards text that hasn't been sent yet
+        self._acknowledged_chars = min(
+            self._acknowledged_chars + _count_visible(message.data.text),
+            self._sent_chars,
+        )
+
+        self._finish_acknowledged()
+
+        return delivered
+
+    def _expire(self, utterance: UtteranceBase):
+        if utterance not in self._utterances:
+            return
+
+        self._utterances.remove(utterance)
+        utterance._finish(
+            self._timeout_error(
+                "Timed out waiting for audio; the text acknowledged by the server may not "
+                "match the text sent."
+            )
+        )
+
+        # carry on counting from the end of this utterance, so that later utterances aren't
+        # thrown out by the characters that went missing
+        self._acknowledged_chars = max(self._acknowledged_chars, utterance._end)
+        self._finish_acknowledged()
+
+    def _fail_utterances(self):
+        """Fail every utterance that is still waiting for audio, as the client has closed."""
+        while self._utterances:
+            self._utterances.popleft()._finish(
+                Exception("Websocket closed before all audio was received.")
+            )
+
+    def _replay(self):
+        """Returns the messages needed to resume the session on a new connection, and their text."""
+        if not self._replay_buffer:
+            return [], None
+
+        return self._replay_buffer.messages(), self._replay_buffer.text
+
+
+class TTSWebsocketClient(TTSWebsocketClientBase, WebsocketBase):
+    """
+    Synchronous websocket client for Text-to-Speech (TTS) operations, for applications built on
+    threads rather than asyncio. Messages are read by a background thread, so one connection can
+    be kept open and shared across requests, e.g. by the tasks of a worker process, and used
+    from several threads at once.
+
+    Parameters
+    ----------
+    api_key : str
+        The API key for authentication.
+    base_url : str
+        The base URL for the websocket connection.
+    max_queue_size : int
+        The maximum number of received messages that can wait to be picked up by `receive`. By
+        default 1024.
+    overflow_policy : OverflowPolicy
+        What to do with a received message when the queue is full. By default
+        `OverflowPolicy.BLOCK`, which stops reading from the socket until there is space.
+    reconnect_policy : ReconnectPolicy, optional
+        If set, the client reconnects automatically when the connection drops, any text that has
+        not been synthesised is sent again once the session is resumed, and
+        `WebsocketEvents.RECONNECT` handlers are called with a `ReconnectEvent`. By default
+        None, in which case a dropped connection closes the client.
+    regions : Regions, optional
+        If set, each connection is opened to the fastest of several regional deployments, and
+        hedged or failed over as set by their `RoutingPolicy`. Set by `Neuphonic` when it is
+        given several base URLs.
+    governor : Governor, optional
+        If set, each connection waits to be opened until it is within the rate and concurrency
+        limits for the API key. Set by `Neuphonic` when it is given a `GovernorPolicy`.
+    priority : Priority
+        How urgently the audio is needed, which orders the connection against other requests
+        waiting for the governor, including when it reconnects. By default `Priority.NORMAL`.
+    """
+
+    _utterance_type = Utterance
+    _timeout_error = TimeoutError
+
+    def __init__(
+        self,
+        api_key: str,
+        base_url: str,
+        max_queue_size: int = 1024,
+        overflow_policy: OverflowPolicy = OverflowPolicy.BLOCK,
+        reconnect_policy: Optional[ReconnectPolicy] = None,
+        regions: Optional[Regions] = None,
+        governor: Optional[Governor] = None,
+        priority: Priority = Priority.NORMAL,
+    ):
+        super().__init__(
+            api_key=api_key,
+            base_url=base_url,
+            overflow_policy=overflow_policy,
+            reconnect_policy=reconnect_policy,
+            regions=regions,
+            governor=governor,
+            priority=priority,
+        )
+
+        # messages that don't belong to an utterance are queued here, to be picked up by
+        # `receive`
+        self.message_queue = queue.Queue(maxsize=max_queue_size)
+
+        self._reader = None  # the thread reading from the websocket
+
+        # set by `close`, to cut short the backoff between reconnect attempts
+        self._closed = threading.Event()
+        # held while a message is sent, and while a dropped session is being resumed, so that
+        # nothing is sent on the new connection before the replayed messages
+        self._send_lock = threading.Lock()
+        # held while the utterances are updated, by both the reader thread and senders
+        self._lock = threading.Lock()
+
+    @property
+    def metrics(self) -> WebsocketMetrics:
+        """Returns metrics describing how quickly received messages are being picked up."""
+        return self._metrics.model_copy(
+            update={"queue_depth": self.message_queue.qsize()}
+        )
+
+    def on(
+        self,
+        event: WebsocketEvents,
+        handler: Callable,
+        message_type: Optional[str] = None,
+        priority: int = 0,
+    ):
+        """
+        See WebsocketBase.on. Handlers are called on the thread reading from the websocket, so
+        they must be plain functions rather than coroutine functions. `WebsocketEvents.OPEN`,
+        `WebsocketEvents.RECONNECT` and `WebsocketEvents.CLOSE` are emitted, and messages are
+        delivered through utterances and `receive` instead of `WebsocketEvents.MESSAGE`.
+        """
+        if inspect.iscoroutinefunction(handler):
+            raise ValueError(
+                "`TTSWebsocketClient` handlers must be plain functions, use "
+                "`AsyncTTSWebsocketClient` for coroutine functions."
+            )
+
+        if event == WebsocketEvents.MESSAGE:
+            raise ValueError(
+                "`TTSWebsocketClient` delivers messages through utterances and `receive`."
+            )
+
+        super().on(event, handler, message_type=message_type, priority=priority)
+
+    def open(self, tts_config: Union[TTSConfig, dict] = TTSConfig()):
+        """
+        Open the websocket connection, and start reading messages from it in a background
+        thread.
+
+        Parameters
+        ----------
+        tts_config : Union[TTSConfig, dict]
+            Configuration for the websocket connection.
+        """
+        self._config = tts_config
+        self._closing = False
+        self._closed.clear()
+
+        try:
+            self._ws = self._connect()
+        except Exception:
+            raise Exception(
+                "Connection to Neuphonic server failed, please check your configuration."
+            )
+
+        self.dispatcher.emit_sync(WebsocketEvents.OPEN)
+
+        self._reader = threading.Thread(target=self._receive, daemon=True)
+        self._reader.start()
+
+        self._dial_standby()
+
+    def _connect(self):
+        """
+        Dial a new connection using the configuration passed to `open`, to the fastest region if
+        there are several.
+        """
+        # admitted before racing, so that the latency of each region doesn't include queueing
+        with Slot(self._governor, WEBSOCKET, self.priority) as slot:
+            if self._regions is None:
+                return self._admitted_dial(slot, self.base_url)
+
+            _, ws = self._regions.race(
+                WEBSOCKET,
+                functools.partial(self._admitted_dial, slot),
+                lambda ws: ws.close(),
+            )
+
+        return ws
+
+    def _dial(self, base_url: str):
+        """Dial a new connection to the region at `base_url`."""
+        return websockets.sync.client.connect(
+            self.url(self._config, base_url),
+            ssl=self._ssl_context(base_url),
+            additional_headers=self.headers,
+        )
+
+    def _admitted_dial(self, slot: Slot, base_url: str):
+        """See `_dial`. Reports the outcome to the governor through `slot`."""
+        try:
+            ws = self._dial(base_url)
+        except websockets.InvalidStatus as e:
+            if e.response.status_code in THROTTLE_STATUS_CODES:
+                slot.throttled()
+
+            raise
+
+        slot.first_byte()
+
+        return ws
+
+    def _dial_standby(self):
+        """Start dialling a standby connection in the background, if the policy asks for one."""
+        if self.reconnect_policy is None or not self.reconnect_policy.standby:
+            return
+
+        standby = concurrent.futures.Future()
+
+        def dial():
+            try:
+                standby.set_result(self._connect())
+            except Exception as e:
+                standby.set_exception(e)
+
+        threading.Thread(target=dial, daemon=True).start()
+        self._standby = standby
+
+    def _take_standby(self):
+        """Returns the standby connection if it is still open, otherwise None."""
+        standby, self._standby = self._standby, None
+
+        if standby is None:
+            return None
+
+        try:
+            # if the standby is still being dialled it is further along than a new connection
+            return self._if_open(standby.result())
+        except Exception:
+            return None
+
+    def _reconnect(self):
+        """
+        Replace a dropped connection and resume the session. The standby connection is used if
+        there is one, otherwise a new connection is dialled with exponential backoff.
+        """
+        dropped_at = time.perf_counter()
+
+        ws = self._take_standby()
+        used_standby = ws is not None
+        attempts = 0
+
+        while ws is None:
+            attempts += 1
+
+            try:
+                ws = self._connect()
+            except Exception as e:
+                if self._closed.wait(self._attempt_failed(attempts, e)):
+                    return
+
+        with self._send_lock:
+            self._ws = ws
+
+            with self._lock:
+                messages, replayed_text = self._replay()
+
+            for message in messages:
+                self._write(message)
+
+        event = self._reconnected(dropped_at, attempts, used_standby, replayed_text)
+        self._dial_standby()
+
+        self.dispatcher.emit_sync(WebsocketEvents.RECONNECT, event)
+
+    def _receive(self):
+        """Read messages from the websocket until it closes. This runs in `self._reader`."""
+        try:
+            while True:
+                try:
+                    for message in self._ws:
+                        if isinstance(message, str):
+                            self._handle(message)
+
+                    break
+                except (websockets.ConnectionClosedError, OSError):
+                    if not self._resumable():
+                        raise
+
+                    self._reconnect()
+        except Exception as e:
+            if not self._closing:
+                logger.error(
+                    f"Message from websocket could not be received correctly: {e}"
+                )
+        finally:
+            self.dispatcher.emit_sync(WebsocketEvents.CLOSE)
+
+            # if `close` closed the socket, it is already tearing everything down
+            if not self._closing:
+                self.close()
+
+    def _handle(self, message: str):
+        message = APIResponse[TTSResponse](**json.loads(message))
+        self._metrics.messages_received += 1
+
+        with self._lock:
+            delivered = self._on_message(message)
+
+        if not delivered:
+            self._enqueue(message)
+
+    def _enqueue(self, message: APIResponse[TTSResponse]):
+        """Put a message on the message queue, applying `self.overflow_policy`."""
+        if not self._make_room(self.message_queue):
+            return
+
+        while True:
+            try:
+                self.message_queue.put(message, timeout=0.1)
+                break
+            except queue.Full:
+                if self._closing:
+                    return
+
+        self._record_queue_depth(self.message_queue.qsize())
+
+    def send(
+        self,
+        message: Union[str, dict],
+        autocomplete=False,
+        timeout: Optional[float] = 30.0,
+    ) -> Optional[Utterance]:
+        """
+        Send a message through the TTS websocket. This handles autocompletion of messages as well.
+
+        Parameters
+        ----------
+        message : Union[str, dict]
+            The message to send. Must be a string or a dictionary.
+        autocomplete : bool, optional
+            Whether to send an autocomplete '<STOP>' signal, by default False
+        timeout : float, optional
+            How long to wait, in seconds, for the audio of a completed utterance to arrive, after
+            which its `done` future fails with `TimeoutError`. By default 30. None waits
+            indefinitely.
+
+        Returns
+        -------
+        Utterance, optional
+            A handle on the utterance, if the message completed one, i.e. if `autocomplete` is
+            set or the message contains '<STOP>'. The messages for the utterance are delivered
+            through the handle rather than `receive`.
+
+        Raises
+        ------
+        AssertionError
+            If the message is not a string or dictionary.
+        """
+        assert isinstance(
+            message, (str, dict)
+        ), "Message must be an instance of str or dict"
+
+        with self._send_lock:
+            with self._lock:
+                utterance = self._on_send(message)
+
+            self._write(message)
+
+        if autocomplete:
+            utterance = self.complete(timeout=timeout)
+        elif (
+            utterance is not None and timeout is not None and not utterance.done.done()
+        ):
+            utterance._timer = threading.Timer(timeout, self._expire, (utterance,))
+            utterance._timer.daemon = True
+            utterance._timer.start()
+
+        return utterance
+
+    def _write(self, message: Union[str, dict]):
+        """Send a message on the current connection."""
+        try:
+            self._ws.send(self._encode(message))
+            self._metrics.messages_sent += 1
+        except websockets.ConnectionClosed:
+            if not self._resumable():
+                raise
+
+            # `_receive` notices the dropped connection and resumes the session
+            logger.debug("Websocket message not sent as the connection has dropped.")
+
+    def _expire(self, utterance: Utterance):
+        with self._lock:
+            super()._expire(utterance)
+
+    def complete(self, timeout: Optional[float] = 30.0) -> Utterance:
+        """
+        Send a completion signal '<STOP>' through the TTS websocket.
+
+        Parameters
+        ----------
+        timeout : float, optional
+            See `send`.
+
+        Returns
+        -------
+        Utterance
+            A handle on the utterance that has been completed.
+        """
+        return self.send({"text": " <STOP>"}, timeout=timeout)
+
+    def receive(self, timeout: Optional[float] = None) -> APIResponse[TTSResponse]:
+        """
+        Receive a message that doesn't belong to an utterance from the message queue.
+
+        Parameters
+        ----------
+        timeout : float, optional
+            How long to wait for a message, in seconds. By default None, which waits
+            indefinitely.
+
+        Returns
+        -------
+        APIResponse[TTSResponse]
+            The next message in the queue.
+
+        Raises
+        ------
+        queue.Empty
+            If no message arrives within `timeout` seconds.
+        """
+        return self.message_queue.get(timeout=timeout)
+
+    def __iter__(self) -> Iterator[APIResponse[TTSResponse]]:
+        """Yields the messages from `receive` until the client is closed."""
+        while not (self._closing and self.message_queue.empty()):
+            try:
+                yield self.message_queue.get(timeout=0.1)
+            except queue.Empty:
+                continue
+
+    def close(self):
+        """
+        Close the websocket connection and stop the reader thread. Calling this again while the
+        client is already closing has no effect.
+        """
+        if self._closing:
+            return
+
+        self._closing = True
+        self._closed.set()
+
+        if self._standby is not None:
+            standby, self._standby = self._standby, None
+
+            def close_standby(future: concurrent.futures.Future):
+                if future.exception() is None:
+                    future.result().close()
+
+            # the standby connection is closed once it has been dialled
+            standby.add_done_callback(close_standby)
+
+        if self._ws is not None:
+            self._ws.close()
+
+        if self._reader is not None and self._reader is not threading.current_thread():
+            self._reader.join()
+
+        with self._lock:
+            self._fail_utterances()
+
+    def __enter__(self) -> "TTSWebsocketClient":
+        """Open the websocket with the default `TTSConfig`, if it hasn't been opened already."""
+        if self._ws is None or self._closing:
+            self.open()
+
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+class AsyncTTSWebsocketClient(TTSWebsocketClientBase, AsyncWebsocketBase):
     """
     Asynchronous websocket client for Text-to-Speech (TTS) operations.
 
@@ -209,23 +1251,99 @@ class AsyncTTSWebsocketClient(AsyncWebsocketBase):
         The API key for authentication.
     base_url : str
         The base URL for the websocket connection.
+    **kwargs
+        Additional keyword arguments passed to `AsyncWebsocketBase`, e.g. `max_queue_size`,
+        `overflow_policy` and `reconnect_policy`. With a `reconnect_policy`, any text that has
+        not been synthesised when the connection drops is sent again once it is resumed. See
+        `TTSWebsocketClient` for `regions`, `governor` and `priority`.
     """
 
-    def __init__(self, api_key: str, base_url: str):
+    _utterance_type = AsyncUtterance
+    _timeout_error = asyncio.TimeoutError
+
+    def __init__(self, api_key: str, base_url: str, **kwargs):
         super().__init__(
             api_key=api_key,
             base_url=base_url,
             response_type=TTSResponse,
+            **kwargs,
         )
 
-    def url(self, config: Union[TTSConfig, dict]) -> str:
+    def stream(
+        self,
+        flush_policy: Optional[FlushPolicy] = None,
+        timeout: Optional[float] = 30.0,
+        segmenter: Optional[SentenceSegmenter] = None,
+    ) -> TextStream:
         """
-        See AsyncWebsocketClientBase.url
+        Open a session for streaming text, such as the tokens generated by an LLM, into the
+        websocket. Tokens are coalesced into fewer, larger messages according to
+        `flush_policy`, and each utterance can be sent while the audio for the previous one is
+        still arriving.
+
+        Parameters
+        ----------
+        flush_policy : FlushPolicy, optional
+            When buffered text is sent. By default `FlushPolicy()`.
+        timeout : float, optional
+            How long to wait, in seconds, for the audio of each utterance once it has been
+            completed, after which its future fails with `asyncio.TimeoutError`. By default 30.
+            None waits indefinitely.
+        segmenter : SentenceSegmenter, optional
+            Splits the text into segments at sentence and clause boundaries. By default a
+            `SentenceSegmenter` for the `lang_code` the websocket was opened with.
+
+        Returns
+        -------
+        TextStream
+            The session, to be used as an async context manager, e.g.
+
+            >>> async with ws.stream() as stream:
+            >>>     await stream.feed(llm_tokens)
         """
-        if not isinstance(config, TTSConfig):
-            config = TTSConfig(**config)
+        return TextStream(
+            self, flush_policy=flush_policy, timeout=timeout, segmenter=segmenter
+        )
+
+    async def _connect(self):
+        """
+        See AsyncWebsocketBase._connect. Waits until the governor allows the connection, then
+        connects to the fastest region if there are several.
+        """
+        # admitted before racing, so that the latency of each region doesn't include queueing
+        async with Slot(self._governor, WEBSOCKET, self.priority) as slot:
+            if self._regions is None:
+                return await self._admitted_dial(slot, self.base_url)
 
-        return f"{self.ws_url}/speak/{config.lang_code}?{config.to_query_params()}"
+            _, ws = await self._regions.async_race(
+                WEBSOCKET,
+                functools.partial(self._admitted_dial, slot),
+                lambda ws: ws.close(),
+            )
+
+        return ws
+
+    async def _admitted_dial(self, slot: Slot, base_url: str):
+        """See AsyncWebsocketBase._dial. Reports the outcome to the governor through `slot`."""
+        try:
+            ws = await self._dial(base_url)
+        except websockets.InvalidStatus as e:
+            if e.response.status_code in THROTTLE_STATUS_CODES:
+                slot.throttled()
+
+            raise
+
+        slot.first_byte()
+
+        return ws
+
+    async def _resume(self) -> Optional[str]:
+        messages, replayed_text = self._replay()
+
+        for message in messages:
+            await self._write(message)
+
+        return replayed_text
 
     async def open(self, tts_config: Union[TTSConfig, dict] = TTSConfig()):
         """
@@ -233,7 +1351,12 @@ class AsyncTTSWebsocketClient(AsyncWebsocketBase):
         """
         await super().open(tts_config)
 
-    async def send(self, message: Union[str, dict], autocomplete=False):
+    async def send(
+        self,
+        message: Union[str, dict],
+        autocomplete=False,
+        timeout: Optional[float] = 30.0,
+    ) -> Optional[AsyncUtterance]:
         """
         Send a message through the TTS websocket. This handles autocompletion of messages as well.
 
@@ -243,17 +1366,55 @@ class AsyncTTSWebsocketClient(AsyncWebsocketBase):
             The message to send.
         autocomplete : bool, optional
             Whether to send an autocomplete '<STOP>' signal, by default False
+        timeout : float, optional
+            How long to wait, in seconds, for the audio of a completed utterance to arrive, after
+            which its `done` future fails with `asyncio.TimeoutError`. By default 30. None waits
+            indefinitely.
+
+        Returns
+        -------
+        AsyncUtterance, optional
+            A handle on the utterance, if the message completed one, i.e. if `autocomplete` is
+            set or the message contains '<STOP>'. The messages for the utterance are delivered
+            through the handle rather than `receive`, but are still passed to any message
+            handlers.
         """
-        await super().send(message=message)
+        utterance = await super().send(message=message)
 
         if autocomplete:
-            await self.complete()
+            utterance = await self.complete(timeout=timeout)
+        elif (
+            utterance is not None and timeout is not None and not utterance.done.done()
+        ):
+            utterance._timer = asyncio.get_running_loop().call_later(
+                timeout, self._expire, utterance
+            )
+
+        return utterance
 
-    async def complete(self):
+    async def complete(self, timeout: Optional[float] = 30.0) -> AsyncUtterance:
         """
         Send a completion signal '<STOP>' through the TTS websocket.
+
+        Parameters
+        ----------
+        timeout : float, optional
+            See `send`.
+
+        Returns
+        -------
+        AsyncUtterance
+            A handle on the utterance that has been completed.
+        """
+        return await self.send({"text": " <STOP>"}, timeout=timeout)
+
+    async def close(self):
+        """
+        See AsyncWebsocketBase.close
         """
-        await self.send({"text": " <STOP>"})
+        await super().close()
+
+        self._fail_utterances()
 
 
 class AsyncAgentWebsocketClient(AsyncWebsocketBase):
@@ -266,23 +1427,29 @@ class AsyncAgentWebsocketClient(AsyncWebsocketBase):
         The API key for authentication.
     base_url : str
         The base URL for the websocket connection.
+    **kwargs
+        Additional keyword arguments passed to `AsyncWebsocketBase`, e.g. `max_queue_size` and
+        `overflow_policy`.
     """
 
-    def __init__(self, api_key: str, base_url: str):
+    def __init__(self, api_key: str, base_url: str, **kwargs):
         super().__init__(
             api_key=api_key,
             base_url=base_url,
             response_type=AgentResponse,
+            **kwargs,
         )
 
-    def url(self, config: Union[AgentConfig, dict]) -> str:
+    def url(
+        self, config: Union[AgentConfig, dict], base_url: Optional[str] = None
+    ) -> str:
         """
         See AsyncWebsocketClientBase.url
         """
         if not isinstance(config, AgentConfig):
             config = AgentConfig(**config)
 
-        return f"{self.ws_url}/agents?{config.to_query_params()}"
+        return f"{self._ws_url(base_url)}/agents?{config.to_query_params()}"
 
     async def open(self, agent_config: Union[TTSConfig, dict] = AgentConfig()):
         """
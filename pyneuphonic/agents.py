@@ -4,7 +4,8 @@ import aioconsole
 from pyneuphonic.client import Neuphonic
 from pyneuphonic.models import APIResponse, AgentResponse, AgentConfig, WebsocketEvents
 from pyneuphonic.player import AsyncAudioPlayer, AsyncAudioRecorder
-from typing import Callable
+from pyneuphonic.audio import BargeInDetector
+from typing import Callable, Optional
 
 
 class Agent:
@@ -13,6 +14,7 @@ class Agent:
         client: Neuphonic,
         mute: bool = False,
         on_message: Callable = None,
+        barge_in: Optional[BargeInDetector] = None,
         **kwargs,
     ):
         """
@@ -26,6 +28,11 @@ class Agent:
             If True, the agent will not play audio responses. Default is False.
         on_message : callable, optional
             A callback function to handle messages from the server. Default is default_on_message.
+        barge_in : BargeInDetector, optional
+            If set, playback is interrupted locally as soon as the user starts speaking over the
+            agent, rather than waiting for the server to send a `stop_audio_response`. Its
+            sampling rate must be the agent's `incoming_sampling_rate`, which is 16000 by default.
+            Default is None.
         **kwargs
             Additional keyword arguments to configure the agent. See the `AgentConfig` model for a
             full list of agent configuration parameters.
@@ -45,6 +52,7 @@ class Agent:
                 sampling_rate=self.config.incoming_sampling_rate,
                 websocket=self.ws,
                 player=self.player,
+                barge_in=barge_in,
             )
 
         self.on_message_hook = (
@@ -68,30 +76,86 @@ class Agent:
 
     async def on_message(self, message: APIResponse[AgentResponse]):
         """
-        Handle incoming messages from the server.
+        Handle incoming messages from the server. `start` subscribes the handlers below to their
+        message types directly, so this is only needed when passing messages on by hand.
 
         Parameters
         ----------
         message : APIResponse[AgentResponse]
             The message received from the server, containing the type and content.
         """
-        # server will return 3 types of messages: audio_response, user_transcript, llm_response
-        if message.data.type == "audio_response":
-            if not self.mute:
-                await self.player.play(message.data.audio)
-        elif message.data.type == "stop_audio_response":
-            # Stop any currently playing audio as the user has interrupted
-            if not self.mute:
-                await self.player.stop_playback()
+        if not self.mute:
+            if message.data.type == "audio_response":
+                await self.on_audio_response(message)
+            elif message.data.type == "stop_audio_response":
+                await self.on_stop_audio_response(message)
 
         if self.on_message_hook is not None and callable(self.on_message_hook):
             self.on_message_hook(message)
 
+    async def on_audio_response(self, message: APIResponse[AgentResponse]):
+        """
+        Play audio received from the server.
+
+        Parameters
+        ----------
+        message : APIResponse[AgentResponse]
+            An `audio_response` message received from the server.
+        """
+        await self.player.play(message.data.audio)
+
+    async def on_stop_audio_response(self, message: APIResponse[AgentResponse]):
+        """
+        Stop any currently playing audio, as the user has interrupted.
+
+        Parameters
+        ----------
+        message : APIResponse[AgentResponse]
+            A `stop_audio_response` message received from the server.
+        """
+        await self.player.confirm_interruption()
+
+    def _on_llm_response(self, message: APIResponse[AgentResponse]):
+        self._replied.set()
+
+    async def _send_text(self, text: str):
+        """Send text to the agent, then wait for its reply to be printed before returning."""
+        self._replied.clear()
+        await self.ws.send({"text": text})
+
+        try:
+            await asyncio.wait_for(self._replied.wait(), timeout=10)
+        except asyncio.TimeoutError:
+            pass
+
     async def start(self):
         """
         Start the agent, opening necessary connections and handling user input.
         """
-        self.ws.on(WebsocketEvents.MESSAGE, self.on_message)
+        self._replied = asyncio.Event()
+        self.ws.on(
+            WebsocketEvents.MESSAGE,
+            self._on_llm_response,
+            message_type="llm_response",
+        )
+
+        if not self.mute:
+            # interruptions are handled before any other handler sees the message
+            self.ws.on(
+                WebsocketEvents.MESSAGE,
+                self.on_stop_audio_response,
+                message_type="stop_audio_response",
+                priority=10,
+            )
+            self.ws.on(
+                WebsocketEvents.MESSAGE,
+                self.on_audio_response,
+                message_type="audio_response",
+            )
+
+        if self.on_message_hook is not None and callable(self.on_message_hook):
+            self.ws.on(WebsocketEvents.MESSAGE, self.on_message_hook)
+
         self.ws.on(WebsocketEvents.CLOSE, self.on_close)
 
         async def run_agent():
@@ -117,8 +181,7 @@ class Agent:
                     if user_text.lower() == "quit":
                         break
 
-                    await self.ws.send({"text": user_text})
-                    await asyncio.sleep(1)  # simply for formatting
+                    await self._send_text(user_text)
 
             await self.close()
 
@@ -0,0 +1,24 @@
+from pyneuphonic.audio.vad import VoiceActivityDetector, BargeInDetector
+from pyneuphonic.audio.codecs import StreamingTranscoder
+from pyneuphonic.audio.resampler import Resampler, resample
+from pyneuphonic.audio.framing import FrameRechunker, rechunk, async_rechunk
+from pyneuphonic.audio.tee import Tee, AsyncTee, tee, async_tee
+from pyneuphonic.audio.stream import AudioStream, AsyncAudioStream
+from pyneuphonic.audio.arrays import (
+    SampleAccumulator,
+    async_iter_arrays,
+    iter_arrays,
+    to_float32,
+    to_int16,
+)
+from pyneuphonic.audio.effects import (
+    Effect,
+    Fade,
+    Gain,
+    Limiter,
+    LoudnessNormalizer,
+    SilenceTrimmer,
+)
+from pyneuphonic.audio.mixer import Mixer, MixerInput
+from pyneuphonic.audio.wav import WavWriter, AsyncWavWriter
+from pyneuphonic.audio.containers import Demuxer, WavDemuxer, demux, async_demux
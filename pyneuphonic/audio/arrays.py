@@ -0,0 +1,212 @@
+from typing import AsyncIterable, AsyncIterator, Iterable, Iterator, Optional, Union
+
+import numpy as np
+
+from pyneuphonic.audio.codecs import BytesLike, PCM_LINEAR, decode, sample_width
+from pyneuphonic.audio.framing import AudioSource, _audio
+
+# int16 samples are divided by this to normalise them to [-1, 1)
+_FLOAT_SCALE = np.float32(1 / 32768)
+
+
+def to_int16(chunk: AudioSource, encoding: str = PCM_LINEAR) -> np.ndarray:
+    """
+    Returns the samples in a chunk of audio as int16.
+
+    Parameters
+    ----------
+    chunk : Union[bytes, bytearray, memoryview, APIResponse]
+        The audio, or a message whose audio to use.
+    encoding : str
+        The encoding of the audio, by default `pcm_linear`.
+
+    Returns
+    -------
+    np.ndarray
+        The samples. For `pcm_linear` this is a read-only view onto the chunk, so no copy is
+        made, and the chunk must hold a whole number of samples.
+    """
+    return decode(_audio(chunk) or b"", encoding)
+
+
+def to_float32(
+    chunk: AudioSource, encoding: str = PCM_LINEAR, out: Optional[np.ndarray] = None
+) -> np.ndarray:
+    """
+    Returns the samples in a chunk of audio as float32, normalised to [-1, 1).
+
+    Parameters
+    ----------
+    chunk : Union[bytes, bytearray, memoryview, APIResponse]
+        The audio, or a message whose audio to use.
+    encoding : str
+        The encoding of the audio, by default `pcm_linear`.
+    out : np.ndarray, optional
+        A float32 array to write the samples into, which avoids allocating a new array for
+        every chunk. Must be the same length as the number of samples in the chunk.
+
+    Returns
+    -------
+    np.ndarray
+        The normalised samples.
+    """
+    return np.multiply(to_int16(chunk, encoding), _FLOAT_SCALE, out=out)
+
+
+class _Aligner:
+    """
+    Splits a stream of chunks on sample boundaries. Any trailing partial sample is held back
+    and prepended to the next chunk, which is only copied in that case.
+    """
+
+    def __init__(self, encoding: str):
+        self._width = sample_width(encoding)
+        self._remainder = b""
+
+    def push(self, data: BytesLike) -> memoryview:
+        if self._remainder:
+            data = self._remainder + data
+
+        data = memoryview(data).cast("B")
+        n_bytes = len(data) // self._width * self._width
+        self._remainder = bytes(data[n_bytes:])
+
+        return data[:n_bytes]
+
+
+class SampleAccumulator:
+    """
+    Collects a stream of audio into one contiguous int16 array, e.g. a whole utterance.
+
+    The samples are kept in a preallocated buffer that doubles in size whenever it is full, so
+    appending a chunk copies it once, into place, and takes amortised constant time however
+    long the utterance grows.
+
+    >>> accumulator = SampleAccumulator()
+    >>> for message in sse.send('Hello, world!'):
+    >>>     accumulator.append(message)
+    >>> samples = accumulator.samples
+
+    Parameters
+    ----------
+    encoding : str
+        The encoding of the chunks appended, by default `pcm_linear`. They are decoded to int16.
+    capacity : int
+        The number of samples to allocate room for up front, by default 240000, i.e. 10
+        seconds at 24kHz.
+    """
+
+    def __init__(self, encoding: str = PCM_LINEAR, capacity: int = 240000):
+        self.encoding = encoding
+
+        self._aligner = _Aligner(encoding)
+        self._buffer = np.empty(max(1, capacity), dtype=np.int16)
+        self._length = 0
+
+    def __len__(self) -> int:
+        return self._length
+
+    @property
+    def capacity(self) -> int:
+        """The number of samples that fit in the buffer before it has to grow."""
+        return len(self._buffer)
+
+    @property
+    def samples(self) -> np.ndarray:
+        """
+        A view onto the samples collected so far. It is only valid until the next append, which
+        may move the buffer, so call `.copy()` on it if you need to keep it.
+        """
+        return self._buffer[: self._length]
+
+    def to_float32(self) -> np.ndarray:
+        """Returns a new float32 array of the samples collected so far, normalised to [-1, 1)."""
+        return np.multiply(self.samples, _FLOAT_SCALE)
+
+    def _reserve(self, n_samples: int):
+        required = self._length + n_samples
+
+        if required > len(self._buffer):
+            buffer = np.empty(max(required, 2 * len(self._buffer)), dtype=np.int16)
+            buffer[: self._length] = self.samples
+            self._buffer = buffer
+
+    def append(self, chunk: Union[AudioSource, np.ndarray]):
+        """
+        Add a chunk of audio: encoded audio, a message whose audio to use, or an array of
+        samples, which are converted to int16.
+        """
+        if isinstance(chunk, np.ndarray):
+            samples = chunk.astype(np.int16, copy=False)
+        else:
+            samples = decode(self._aligner.push(_audio(chunk) or b""), self.encoding)
+
+        self._reserve(len(samples))
+        self._buffer[self._length : self._length + len(samples)] = samples
+        self._length += len(samples)
+
+    def extend(self, chunks: Iterable[Union[AudioSource, np.ndarray]]):
+        """Add every chunk of audio in `chunks`."""
+        for chunk in chunks:
+            self.append(chunk)
+
+    def clear(self):
+        """Forget the samples collected, keeping the buffer for the next utterance."""
+        self._length = 0
+        self._aligner = _Aligner(self.encoding)
+
+
+def _converter(encoding: str, dtype):
+    """Returns a function that converts aligned chunks to arrays of `dtype`."""
+    if np.dtype(dtype) == np.int16:
+        return lambda data: decode(data, encoding)
+
+    if np.dtype(dtype) == np.float32:
+        return lambda data: to_float32(data, encoding)
+
+    raise ValueError("`dtype` must be either `np.int16` or `np.float32`.")
+
+
+def iter_arrays(
+    stream: Iterable[AudioSource], encoding: str = PCM_LINEAR, dtype=np.int16
+) -> Iterator[np.ndarray]:
+    """
+    Yields the samples in each chunk of an audio stream as an array.
+
+    Parameters
+    ----------
+    stream : Iterable[Union[bytes, APIResponse]]
+        The audio stream, e.g. the output of `SSEClient.send`. Items without audio are skipped.
+    encoding : str
+        The encoding of the audio, by default `pcm_linear`.
+    dtype
+        Either `np.int16` (the default), for which `pcm_linear` audio is yielded as read-only
+        views onto the chunks, or `np.float32`, for samples normalised to [-1, 1).
+
+    Yields
+    ------
+    np.ndarray
+        The samples in each chunk. A sample split across two chunks is yielded with the second.
+    """
+    aligner = _Aligner(encoding)
+    convert = _converter(encoding, dtype)
+
+    for item in stream:
+        data = aligner.push(_audio(item) or b"")
+
+        if data:
+            yield convert(data)
+
+
+async def async_iter_arrays(
+    stream: AsyncIterable[AudioSource], encoding: str = PCM_LINEAR, dtype=np.int16
+) -> AsyncIterator[np.ndarray]:
+    """See `iter_arrays`. Yields the samples in an asynchronous audio stream."""
+    aligner = _Aligner(encoding)
+    convert = _converter(encoding, dtype)
+
+    async for item in stream:
+        data = aligner.push(_audio(item) or b"")
+
+        if data:
+            yield convert(data)
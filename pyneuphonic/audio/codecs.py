@@ -0,0 +1,249 @@
+import numpy as np
+from typing import Optional, Union
+
+BytesLike = Union[bytes, bytearray, memoryview]
+
+PCM_LINEAR = "pcm_linear"
+PCM_MULAW = "pcm_mulaw"
+PCM_ALAW = "pcm_alaw"
+
+ENCODINGS = (PCM_LINEAR, PCM_MULAW, PCM_ALAW)
+
+_MULAW_BIAS = 0x84
+_MULAW_CLIP = 8159
+
+
+def _build_mulaw_tables():
+    """Build the G.711 μ-law encode (65536 entries) and decode (256 entries) lookup tables."""
+    # every possible 16-bit sample, ordered so that a uint16 view of a sample is its index
+    samples = np.arange(65536, dtype=np.uint32).astype(np.uint16).view(np.int16)
+    samples = samples.astype(np.int32) >> 2  # μ-law operates on 14-bit samples
+
+    mask = np.where(samples < 0, 0x7F, 0xFF)
+    magnitude = np.minimum(np.abs(samples), _MULAW_CLIP) + (_MULAW_BIAS >> 2)
+
+    segment_ends = np.array([0x3F, 0x7F, 0xFF, 0x1FF, 0x3FF, 0x7FF, 0xFFF, 0x1FFF])
+    segment = np.searchsorted(segment_ends, magnitude)
+
+    code = (segment << 4) | ((magnitude >> (segment + 1)) & 0x0F)
+    code = np.where(segment >= 8, 0x7F, code)
+    encode = ((code ^ mask) & 0xFF).astype(np.uint8)
+
+    codes = ~np.arange(256, dtype=np.int32) & 0xFF
+    exponent = (codes >> 4) & 0x07
+    mantissa = codes & 0x0F
+    magnitude = (((mantissa << 3) + _MULAW_BIAS) << exponent) - _MULAW_BIAS
+    decode = np.where(codes & 0x80, -magnitude, magnitude).astype(np.int16)
+
+    return encode, decode
+
+
+def _build_alaw_tables():
+    """Build the G.711 A-law encode (65536 entries) and decode (256 entries) lookup tables."""
+    samples = np.arange(65536, dtype=np.uint32).astype(np.uint16).view(np.int16)
+    samples = samples.astype(np.int32) >> 3  # A-law operates on 13-bit samples
+
+    mask = np.where(samples >= 0, 0xD5, 0x55)
+    magnitude = np.where(samples >= 0, samples, -samples - 1)
+
+    segment_ends = np.array([0x1F, 0x3F, 0x7F, 0xFF, 0x1FF, 0x3FF, 0x7FF, 0xFFF])
+    segment = np.searchsorted(segment_ends, magnitude)
+
+    shift = np.where(segment < 2, 1, segment)
+    code = (np.minimum(segment, 7) << 4) | ((magnitude >> shift) & 0x0F)
+    code = np.where(segment >= 8, 0x7F, code)
+    encode = ((code ^ mask) & 0xFF).astype(np.uint8)
+
+    codes = np.arange(256, dtype=np.int32) ^ 0x55
+    segment = (codes & 0x70) >> 4
+    magnitude = ((codes & 0x0F) << 4) + np.where(segment == 0, 8, 0x108)
+    magnitude = np.where(
+        segment > 1, magnitude << np.maximum(segment - 1, 0), magnitude
+    )
+    decode = np.where(codes & 0x80, magnitude, -magnitude).astype(np.int16)
+
+    return encode, decode
+
+
+_MULAW_ENCODE, _MULAW_DECODE = _build_mulaw_tables()
+_ALAW_ENCODE, _ALAW_DECODE = _build_alaw_tables()
+
+_ENCODE_TABLES = {PCM_MULAW: _MULAW_ENCODE, PCM_ALAW: _ALAW_ENCODE}
+_DECODE_TABLES = {PCM_MULAW: _MULAW_DECODE, PCM_ALAW: _ALAW_DECODE}
+
+
+def _check_encoding(encoding: str):
+    if encoding not in ENCODINGS:
+        raise ValueError(
+            f'Encoding "{encoding}" is not supported. Valid encodings are: {ENCODINGS}.'
+        )
+
+
+def sample_width(encoding: str) -> int:
+    """
+    Returns the number of bytes used to store a single sample in the given encoding.
+
+    Parameters
+    ----------
+    encoding : str
+        One of `pcm_linear`, `pcm_mulaw` or `pcm_alaw`.
+    """
+    _check_encoding(encoding)
+
+    return 2 if encoding == PCM_LINEAR else 1
+
+
+def silence(encoding: str, n_samples: int) -> bytes:
+    """
+    Returns `n_samples` of digital silence in the given encoding.
+
+    Parameters
+    ----------
+    encoding : str
+        One of `pcm_linear`, `pcm_mulaw` or `pcm_alaw`.
+    n_samples : int
+        The number of samples of silence.
+    """
+    return encode(np.zeros(n_samples, dtype=np.int16), encoding).tobytes()
+
+
+def decode(
+    data: BytesLike, encoding: str, out: Optional[np.ndarray] = None
+) -> np.ndarray:
+    """
+    Decode audio into 16-bit linear PCM samples.
+
+    Parameters
+    ----------
+    data : Union[bytes, bytearray, memoryview]
+        The encoded audio. For `pcm_linear` the returned array is a read-only view onto `data`,
+        so no copy is made.
+    encoding : str
+        The encoding of `data`. One of `pcm_linear`, `pcm_mulaw` or `pcm_alaw`.
+    out : np.ndarray, optional
+        An int16 array to decode into, which avoids allocating a new array for every chunk.
+        Must be the same length as the number of samples in `data`. Ignored for `pcm_linear`.
+
+    Returns
+    -------
+    np.ndarray
+        The decoded int16 samples.
+    """
+    _check_encoding(encoding)
+
+    if encoding == PCM_LINEAR:
+        return np.frombuffer(data, dtype=np.int16)
+
+    return np.take(
+        _DECODE_TABLES[encoding], np.frombuffer(data, dtype=np.uint8), out=out
+    )
+
+
+def encode(
+    samples: np.ndarray, encoding: str, out: Optional[np.ndarray] = None
+) -> np.ndarray:
+    """
+    Encode 16-bit linear PCM samples.
+
+    Parameters
+    ----------
+    samples : np.ndarray
+        The int16 samples to encode.
+    encoding : str
+        The target encoding. One of `pcm_linear`, `pcm_mulaw` or `pcm_alaw`.
+    out : np.ndarray, optional
+        A uint8 array to encode into, which avoids allocating a new array for every chunk. Must
+        be the same length as `samples`. Ignored for `pcm_linear`.
+
+    Returns
+    -------
+    np.ndarray
+        The encoded audio, as int16 for `pcm_linear` and uint8 otherwise. Call `.tobytes()` or
+        wrap it in a `memoryview` to send it.
+    """
+    _check_encoding(encoding)
+
+    if encoding == PCM_LINEAR:
+        return samples.astype(np.int16, copy=False)
+
+    return np.take(
+        _ENCODE_TABLES[encoding],
+        samples.astype(np.int16, copy=False).view(np.uint16),
+        out=out,
+    )
+
+
+def transcode(data: BytesLike, source_encoding: str, target_encoding: str) -> bytes:
+    """
+    Convert a complete buffer of audio from one encoding to another.
+
+    Parameters
+    ----------
+    data : Union[bytes, bytearray, memoryview]
+        The audio to convert. Must contain a whole number of samples.
+    source_encoding : str
+        The encoding of `data`.
+    target_encoding : str
+        The encoding to convert to.
+
+    Returns
+    -------
+    bytes
+        The converted audio.
+    """
+    if source_encoding == target_encoding:
+        _check_encoding(source_encoding)
+        return bytes(data)
+
+    return encode(decode(data, source_encoding), target_encoding).tobytes()
+
+
+class StreamingTranscoder:
+    """
+    Converts a stream of audio chunks from one encoding to another.
+
+    Chunks do not need to be aligned to sample boundaries: any trailing partial sample is held
+    back and prepended to the next chunk.
+
+    Parameters
+    ----------
+    source_encoding : str
+        The encoding of the incoming chunks.
+    target_encoding : str
+        The encoding to convert to.
+    """
+
+    def __init__(self, source_encoding: str, target_encoding: str):
+        self.source_encoding = source_encoding
+        self.target_encoding = target_encoding
+        self._source_width = sample_width(source_encoding)
+        sample_width(target_encoding)
+
+        self._remainder = bytearray()
+
+    def convert(self, data: BytesLike) -> bytes:
+        """
+        Convert the next chunk of audio.
+
+        Parameters
+        ----------
+        data : Union[bytes, bytearray, memoryview]
+            The next chunk of audio in the source encoding.
+
+        Returns
+        -------
+        bytes
+            All complete samples received so far, in the target encoding.
+        """
+        if self._remainder:
+            self._remainder += data
+            data = self._remainder
+
+        n_bytes = len(data) // self._source_width * self._source_width
+        converted = transcode(
+            memoryview(data)[:n_bytes], self.source_encoding, self.target_encoding
+        )
+
+        self._remainder = bytearray(memoryview(data)[n_bytes:])
+
+        return converted
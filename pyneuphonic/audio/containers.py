@@ -0,0 +1,300 @@
+from abc import ABC, abstractmethod
+from typing import AsyncIterable, AsyncIterator, Iterable, Iterator, List, Optional
+
+from pyneuphonic.audio.codecs import BytesLike, sample_width
+from pyneuphonic.audio.framing import AudioSource, _audio
+from pyneuphonic.audio.wav import _FORMAT_TAGS
+from pyneuphonic.models import AudioFormat
+
+_ENCODINGS = {tag: encoding for encoding, tag in _FORMAT_TAGS.items()}
+# the format tag of WAVE_FORMAT_EXTENSIBLE, which nests the real one
+_EXTENSIBLE = 0xFFFE
+# data sizes that streamed files use to leave the length of the audio open
+_OPEN_SIZES = (0, 0xFFFFFFFF)
+
+
+class Demuxer(ABC):
+    """
+    Strips the container from a stream of audio sent in a `TTSConfig.output_format`, e.g.
+    `wav`, and returns the raw audio inside it, chunk by chunk.
+
+    The header is parsed as it arrives, so it may be split across any number of chunks, and
+    `format` is set as soon as it is complete, before any audio is returned. Only the bytes of
+    the header are held back, so the audio itself streams straight through.
+    """
+
+    container: str
+
+    def __init__(self):
+        self.format: Optional[AudioFormat] = None
+
+    @abstractmethod
+    def push(self, chunk: AudioSource) -> BytesLike:
+        """
+        Returns the raw audio in a chunk of the container, which may be empty while the header
+        is read.
+
+        Raises
+        ------
+        ValueError
+            If the header is malformed, or describes audio that can't be streamed as samples.
+        """
+        pass
+
+    @abstractmethod
+    def close(self):
+        """
+        Check that the stream didn't end part way through a header.
+
+        Raises
+        ------
+        ValueError
+            If the stream ended before the header was complete.
+        """
+        pass
+
+
+class WavDemuxer(Demuxer):
+    """
+    See Demuxer. Reads mono .wav audio in 16-bit PCM, mu-law or A-law, e.g. as written by
+    `WavWriter`. Chunks before and after the audio are skipped without being buffered, and
+    several files sent one after another, e.g. one per message, are read in turn, provided they
+    all have the same format.
+    """
+
+    container = "wav"
+
+    def __init__(self):
+        super().__init__()
+
+        self._header = bytearray()  # the bytes of the header received so far
+        # True once the RIFF header of the current file has been read, and once its audio has
+        # started
+        self._started = False
+        self._complete = False
+        self._skip = 0  # the number of bytes of a chunk that is being skipped
+        self._in_data = False
+        self._remaining: Optional[int] = None  # the bytes of audio left, if known
+        # the padding after the audio, if it is an odd number of bytes long
+        self._pad = 0
+
+    def push(self, chunk: AudioSource) -> BytesLike:
+        data = memoryview(_audio(chunk) or b"").cast("B")
+        output: List[memoryview] = []
+
+        while len(data):
+            if self._in_data:
+                data = self._read_data(data, output)
+            else:
+                self._header += data
+                data = self._parse_header()
+
+        return output[0] if len(output) == 1 else b"".join(output)
+
+    def _read_data(self, data: memoryview, output: List[memoryview]) -> memoryview:
+        """Move the audio at the start of `data` to `output`, and return the rest."""
+        n = len(data) if self._remaining is None else min(len(data), self._remaining)
+        output.append(data[:n])
+
+        if self._remaining is not None:
+            self._remaining -= n
+
+            if not self._remaining:
+                self._in_data = False
+                self._skip = self._pad
+
+        return data[n:]
+
+    def _parse_header(self) -> memoryview:
+        """
+        Parse as much of the buffered header as possible, and return the bytes after the start
+        of the audio, which are empty if more of the header is needed.
+        """
+        header, position = self._header, 0
+
+        while True:
+            position = self._skip_bytes(header, position)
+
+            if self._skip:
+                break
+
+            if not self._started:
+                if len(header) - position < 12:
+                    break
+
+                position = self._read_riff(header, position)
+                continue
+
+            if len(header) - position < 8:
+                break
+
+            chunk_id = bytes(header[position : position + 4])
+            size = int.from_bytes(header[position + 4 : position + 8], "little")
+
+            if chunk_id == b"RIFF":
+                self._started = False  # the next file
+            elif chunk_id == b"data":
+                self._start_data(size)
+                self._header = bytearray()
+
+                return memoryview(header)[position + 8 :]
+            elif chunk_id == b"fmt " and len(header) - position - 8 < size:
+                break  # wait for the whole chunk
+            else:
+                position = self._read_chunk(header, position, chunk_id, size)
+
+        del header[:position]
+
+        return memoryview(b"")
+
+    def _skip_bytes(self, header: bytearray, position: int) -> int:
+        n = min(self._skip, len(header) - position)
+        self._skip -= n
+
+        return position + n
+
+    def _read_riff(self, header: bytearray, position: int) -> int:
+        if header[position : position + 4] != b"RIFF" or (
+            header[position + 8 : position + 12] != b"WAVE"
+        ):
+            raise ValueError("The audio is not in the `wav` format.")
+
+        self._started, self._complete = True, False
+
+        return position + 12
+
+    def _read_chunk(
+        self, header: bytearray, position: int, chunk_id: bytes, size: int
+    ) -> int:
+        """Read the format chunk, or skip any other chunk, e.g. metadata."""
+        position += 8
+
+        if chunk_id == b"fmt ":
+            self._read_format(header[position : position + size])
+
+        self._skip = size + size % 2
+
+        return position
+
+    def _read_format(self, fmt: bytes):
+        if len(fmt) < 16:
+            raise ValueError("The `wav` format chunk is too short.")
+
+        tag = int.from_bytes(fmt[0:2], "little")
+        n_channels = int.from_bytes(fmt[2:4], "little")
+        sampling_rate = int.from_bytes(fmt[4:8], "little")
+        bits = int.from_bytes(fmt[14:16], "little")
+
+        if tag == _EXTENSIBLE and len(fmt) >= 26:
+            tag = int.from_bytes(fmt[24:26], "little")
+
+        encoding = _ENCODINGS.get(tag)
+
+        if encoding is None or bits != 8 * sample_width(encoding):
+            raise ValueError(
+                f"`wav` audio with format tag {tag} and {bits} bits per sample can't be "
+                "streamed. Only 16-bit PCM, mu-law and A-law are supported."
+            )
+
+        if n_channels != 1:
+            raise ValueError(
+                f"Only mono `wav` audio is supported, not {n_channels} channels."
+            )
+
+        audio_format = AudioFormat(
+            container=self.container, sampling_rate=sampling_rate, encoding=encoding
+        )
+
+        if self.format is not None and (
+            self.format.sampling_rate,
+            self.format.encoding,
+        ) != (sampling_rate, encoding):
+            raise ValueError(
+                "The format of the `wav` audio changed part way through the stream."
+            )
+
+        self.format = audio_format
+
+    def _start_data(self, size: int):
+        if self.format is None:
+            raise ValueError("The `wav` audio has no format chunk before its data.")
+
+        self._in_data = self._complete = True
+        self._remaining = None if size in _OPEN_SIZES else size
+        self._pad = size % 2
+        self.format.n_samples = self._remaining and (
+            self._remaining // sample_width(self.format.encoding)
+        )
+
+    def close(self):
+        if (self._started or self._header) and not self._complete:
+            raise ValueError("The `wav` audio ended part way through its header.")
+
+
+_DEMUXERS = {WavDemuxer.container: WavDemuxer}
+
+
+def demuxer(output_format: str) -> Demuxer:
+    """
+    Returns a new demuxer for audio sent in `output_format`.
+
+    Raises
+    ------
+    ValueError
+        If audio in `output_format` can't be streamed as samples, e.g. compressed formats such as
+        `mp3`, which need decoding.
+    """
+    if output_format not in _DEMUXERS:
+        raise ValueError(
+            f"Audio in the `{output_format}` output format can't be streamed as samples. "
+            f"Supported formats are: {tuple(_DEMUXERS)}."
+        )
+
+    return _DEMUXERS[output_format]()
+
+
+def demux(
+    stream: Iterable[AudioSource], output_format: str = "wav"
+) -> Iterator[BytesLike]:
+    """
+    Yields the raw audio in a stream sent in a container `output_format`, e.g. to play it.
+
+    >>> tts_config = TTSConfig(output_format='wav')
+    >>> player.play(demux(sse.send('Hello, world!', tts_config=tts_config)))
+
+    Parameters
+    ----------
+    stream : Iterable[Union[bytes, APIResponse]]
+        The audio stream, e.g. the output of `SSEClient.send`.
+    output_format : str
+        The `TTSConfig.output_format` the audio was requested in, by default `wav`.
+
+    Yields
+    ------
+    Union[bytes, memoryview]
+        The raw audio in each chunk of the stream. Chunks that only hold the header are skipped.
+    """
+    container = demuxer(output_format)
+
+    for item in stream:
+        audio = container.push(item)
+
+        if audio:
+            yield audio
+
+    container.close()
+
+
+async def async_demux(
+    stream: AsyncIterable[AudioSource], output_format: str = "wav"
+) -> AsyncIterator[BytesLike]:
+    """See `demux`. Yields the raw audio in an asynchronous stream."""
+    container = demuxer(output_format)
+
+    async for item in stream:
+        audio = container.push(item)
+
+        if audio:
+            yield audio
+
+    container.close()
@@ -0,0 +1,417 @@
+from abc import ABC, abstractmethod
+
+import numpy as np
+
+
+def _db_to_gain(db: float) -> float:
+    return 10 ** (db / 20)
+
+
+def _to_int16(samples: np.ndarray) -> np.ndarray:
+    return np.clip(np.rint(samples), -32768, 32767).astype(np.int16)
+
+
+_EMPTY = np.zeros(0, dtype=np.int16)
+
+
+class Effect(ABC):
+    """
+    A post-processing step applied to a stream of 16-bit PCM audio, chunk by chunk.
+
+    Effects are stateful, so chunks can be of any size and the output is the same as processing
+    the whole stream at once. Some hold back a bounded amount of audio to look ahead, which is
+    returned by `flush` once the stream has ended. Apply them to a stream with
+    `AudioStream.apply`, or the shortcuts such as `AudioStream.normalize`.
+    """
+
+    @abstractmethod
+    def process(self, samples: np.ndarray) -> np.ndarray:
+        """
+        Process the next chunk of audio.
+
+        Parameters
+        ----------
+        samples : np.ndarray
+            The next int16 samples.
+
+        Returns
+        -------
+        np.ndarray
+            The int16 samples that are ready, which may be fewer than were passed in.
+        """
+        pass
+
+    def flush(self) -> np.ndarray:
+        """Finish the stream, returning any int16 samples held back."""
+        return _EMPTY
+
+
+class Gain(Effect):
+    """
+    Scales the audio by a fixed gain.
+
+    Parameters
+    ----------
+    db : float
+        The gain in decibels, e.g. -6 to halve the amplitude.
+    """
+
+    def __init__(self, db: float):
+        self.gain = _db_to_gain(db)
+
+    def process(self, samples: np.ndarray) -> np.ndarray:
+        return _to_int16(samples * np.float32(self.gain))
+
+
+class _BlockEffect(Effect):
+    """
+    An effect that computes a gain for each block of `block_size` samples, ramping linearly
+    between the gains of consecutive blocks so that it changes smoothly. A partial block is
+    held back until it is complete.
+    """
+
+    def __init__(self, block_size: int):
+        self.block_size = max(1, block_size)
+
+        self._pending = np.zeros(0, dtype=np.float32)
+        self._gain = 1.0  # the gain at the end of the last block output
+
+    @abstractmethod
+    def _gains(self, blocks: np.ndarray) -> np.ndarray:
+        """
+        Returns the gain to reach by the end of each block that can be output now, given the
+        blocks received. Blocks not given a gain are held back and passed in again next time.
+        """
+        pass
+
+    def _apply(self, blocks: np.ndarray) -> np.ndarray:
+        """Output the blocks that have a gain, holding back the rest."""
+        gains = self._gains(blocks)
+        output = blocks[: len(gains)].copy()
+
+        for i, gain in enumerate(gains):
+            ramp = np.linspace(self._gain, gain, self.block_size + 1, dtype=np.float32)
+            output[i] *= ramp[1:]
+            self._gain = gain
+
+        self._pending = blocks[len(gains) :].reshape(-1)
+
+        return _to_int16(output.reshape(-1))
+
+    def process(self, samples: np.ndarray) -> np.ndarray:
+        pending = np.concatenate([self._pending, samples.astype(np.float32)])
+        n_blocks = len(pending) // self.block_size
+        tail = pending[n_blocks * self.block_size :]
+
+        output = self._apply(
+            pending[: n_blocks * self.block_size].reshape(n_blocks, self.block_size)
+        )
+        self._pending = np.concatenate([self._pending, tail])
+
+        return output
+
+    def flush(self) -> np.ndarray:
+        n_samples = len(self._pending)
+        n_blocks = -(-n_samples // self.block_size)
+
+        # pad the last partial block with silence, and drop the padding from the output
+        blocks = np.zeros(n_blocks * self.block_size, dtype=np.float32)
+        blocks[:n_samples] = self._pending
+
+        output = self._flush_blocks(blocks.reshape(n_blocks, self.block_size))[
+            :n_samples
+        ]
+        self._pending = np.zeros(0, dtype=np.float32)
+
+        return output
+
+    def _flush_blocks(self, blocks: np.ndarray) -> np.ndarray:
+        return self._apply(blocks)
+
+
+class Limiter(_BlockEffect):
+    """
+    Keeps the peaks of the audio below a ceiling, by reducing the gain just before each peak
+    and releasing it gradually afterwards. It looks one block ahead, so the gain has already
+    come down by the time a peak arrives.
+
+    Parameters
+    ----------
+    sampling_rate : int
+        The sampling rate of the audio.
+    ceiling_db : float
+        The highest peak level allowed, in dB relative to full scale. By default -1.
+    release_ms : float
+        How long the gain takes to recover from full reduction, in milliseconds. By default 50.
+    block_ms : float
+        The length of the blocks the gain is computed for, and of the lookahead, in
+        milliseconds. By default 5.
+    """
+
+    def __init__(
+        self,
+        sampling_rate: int,
+        ceiling_db: float = -1.0,
+        release_ms: float = 50.0,
+        block_ms: float = 5.0,
+    ):
+        super().__init__(int(sampling_rate * block_ms / 1000))
+        # whole samples, so that rounding the output can't take it over the ceiling
+        self.ceiling = np.floor(32768 * _db_to_gain(ceiling_db))
+        self._release = block_ms / max(release_ms, block_ms)
+
+    def _gains(self, blocks: np.ndarray) -> np.ndarray:
+        peaks = np.abs(blocks).max(axis=1, initial=0.0)
+        required = np.minimum(1.0, self.ceiling / np.maximum(peaks, 1e-9))
+
+        # the gain at the end of each block must already suit the next, so the last block
+        # received waits for the one after it
+        gains = np.minimum(required[:-1], required[1:])
+        previous = self._gain
+
+        for i, gain in enumerate(gains):
+            # the gain during a block must never exceed what the block requires
+            previous = min(previous + self._release, gain)
+            gains[i] = previous
+
+        if len(required):
+            # so that the ramp into the next block starts low enough
+            self._gain = min(self._gain, required[0])
+
+        return gains
+
+    def _flush_blocks(self, blocks: np.ndarray) -> np.ndarray:
+        # the last block has nothing after it to look ahead to
+        last = np.zeros((1, self.block_size), dtype=np.float32)
+
+        return self._apply(np.concatenate([blocks, last]))
+
+
+class LoudnessNormalizer(_BlockEffect):
+    """
+    Brings the audio to a consistent short-term loudness, so that different voices and
+    settings are played at the same level. Loudness is measured as the RMS level of the audio
+    over the last few seconds, ignoring silence, and the gain follows it smoothly.
+
+    The first `lookahead_ms` of audio are held back to measure the initial level, so this adds
+    that much latency to the start of the stream. Follow it with a `Limiter` if raising the
+    level could clip the peaks.
+
+    Parameters
+    ----------
+    sampling_rate : int
+        The sampling rate of the audio.
+    target_db : float
+        The loudness to reach, as an RMS level in dB relative to full scale. By default -20.
+    max_gain_db : float
+        The most the audio is amplified, in dB, so that quiet passages aren't boosted into
+        noise. By default 12.
+    window_ms : float
+        The time over which loudness is measured, in milliseconds. By default 3000.
+    lookahead_ms : float
+        How much audio to measure before the first is output, in milliseconds. By default 200.
+    gate_db : float
+        Audio quieter than this, in dB relative to full scale, counts as silence and isn't
+        measured. By default -50.
+    block_ms : float
+        The length of the blocks the gain is computed for, in milliseconds. By default 20.
+    """
+
+    def __init__(
+        self,
+        sampling_rate: int,
+        target_db: float = -20.0,
+        max_gain_db: float = 12.0,
+        window_ms: float = 3000.0,
+        lookahead_ms: float = 200.0,
+        gate_db: float = -50.0,
+        block_ms: float = 20.0,
+    ):
+        super().__init__(int(sampling_rate * block_ms / 1000))
+        self.target = 32768 * _db_to_gain(target_db)
+        self.max_gain = _db_to_gain(max_gain_db)
+
+        self._gate = (32768 * _db_to_gain(gate_db)) ** 2
+        self._smoothing = min(1.0, block_ms / window_ms)
+        self._lookahead = max(1, round(lookahead_ms / block_ms))
+        self._measured = False  # True once the lookahead has been measured
+        self._mean_square = None  # None until audio louder than the gate is heard
+
+    def _gain_for(self, mean_square: float) -> float:
+        return min(self.max_gain, self.target / np.sqrt(mean_square))
+
+    def _gains(self, blocks: np.ndarray) -> np.ndarray:
+        mean_squares = np.mean(np.square(blocks), axis=1)
+
+        if not self._measured:
+            if len(blocks) < self._lookahead:
+                return np.zeros(0, dtype=np.float32)
+
+            self._measured = True
+            # only the lookahead, so that the result doesn't depend on the size of the chunks
+            measured = mean_squares[: self._lookahead]
+            loud = measured[measured > self._gate]
+
+            if len(loud):
+                # start at the right level, rather than ramping to it from unity
+                self._mean_square = float(np.mean(loud))
+                self._gain = self._gain_for(self._mean_square)
+
+        gains = np.empty(len(blocks), dtype=np.float32)
+
+        for i, mean_square in enumerate(mean_squares):
+            if mean_square <= self._gate:
+                pass
+            elif self._mean_square is None:
+                self._mean_square = float(mean_square)
+            else:
+                self._mean_square += self._smoothing * (mean_square - self._mean_square)
+
+            # silence is left as it is until there is audio to measure
+            measured = self._mean_square is not None
+            gains[i] = self._gain_for(self._mean_square) if measured else 1.0
+
+        return gains
+
+    def _flush_blocks(self, blocks: np.ndarray) -> np.ndarray:
+        if not self._measured:
+            # the stream was shorter than the lookahead, so measure what there is
+            self._lookahead = len(blocks)
+
+        return self._apply(blocks)
+
+
+class Fade(Effect):
+    """
+    Fades the audio in at the start of the stream and out at the end. The last
+    `fade_out_ms` of audio are held back, as the end of the stream isn't known until it
+    arrives.
+
+    Parameters
+    ----------
+    sampling_rate : int
+        The sampling rate of the audio.
+    fade_in_ms : float
+        The length of the fade in, in milliseconds. By default 10.
+    fade_out_ms : float
+        The length of the fade out, in milliseconds. By default 10.
+    """
+
+    def __init__(
+        self, sampling_rate: int, fade_in_ms: float = 10.0, fade_out_ms: float = 10.0
+    ):
+        self._fade_in = int(sampling_rate * fade_in_ms / 1000)
+        self._fade_out = int(sampling_rate * fade_out_ms / 1000)
+
+        self._position = 0  # the number of samples output so far
+        self._held = _EMPTY
+
+    def _output(self, samples: np.ndarray) -> np.ndarray:
+        if self._position < self._fade_in and len(samples):
+            n = min(len(samples), self._fade_in - self._position)
+            ramp = np.arange(self._position, self._position + n) / self._fade_in
+
+            samples = samples.astype(np.float32)
+            samples[:n] *= ramp
+            samples = _to_int16(samples)
+
+        self._position += len(samples)
+
+        return samples
+
+    def process(self, samples: np.ndarray) -> np.ndarray:
+        held = np.concatenate([self._held, samples])
+        n_ready = max(0, len(held) - self._fade_out)
+        self._held = held[n_ready:]
+
+        return self._output(held[:n_ready])
+
+    def flush(self) -> np.ndarray:
+        samples = self._output(self._held).astype(np.float32)
+        self._held = _EMPTY
+
+        n = len(samples)
+        samples *= np.arange(n, 0, -1) / max(n, self._fade_out, 1)
+
+        return _to_int16(samples)
+
+
+class SilenceTrimmer(Effect):
+    """
+    Removes the silence at the start and end of the stream, which would otherwise add dead air
+    before and after every turn. Pauses within the audio are kept.
+
+    Leading silence is dropped as it arrives, so the first audio is output as soon as it is
+    heard. Silence after the audio is held back, up to `max_pause_ms` of it, in case the
+    stream ends there: if more is held, the oldest is output as a pause.
+
+    Parameters
+    ----------
+    sampling_rate : int
+        The sampling rate of the audio.
+    threshold_db : float
+        Samples quieter than this, in dB relative to full scale, count as silence. By default
+        -45.
+    padding_ms : float
+        How much of the silence to keep either side of the audio, in milliseconds, so that
+        it doesn't start or stop abruptly. By default 20.
+    max_pause_ms : float
+        The most silence to hold back, in milliseconds, which is the most trailing silence
+        that can be removed. By default 2000.
+    leading : bool
+        Whether to trim the silence at the start. By default True.
+    trailing : bool
+        Whether to trim the silence at the end. By default True.
+    """
+
+    def __init__(
+        self,
+        sampling_rate: int,
+        threshold_db: float = -45.0,
+        padding_ms: float = 20.0,
+        max_pause_ms: float = 2000.0,
+        leading: bool = True,
+        trailing: bool = True,
+    ):
+        self.threshold = 32768 * _db_to_gain(threshold_db)
+        self._padding = int(sampling_rate * padding_ms / 1000)
+        self._max_pause = max(self._padding, int(sampling_rate * max_pause_ms / 1000))
+        self.trailing = trailing
+
+        self._started = not leading  # True once audio has been heard
+        self._held = _EMPTY  # silence held back, since the last audio heard
+
+    def process(self, samples: np.ndarray) -> np.ndarray:
+        held = np.concatenate([self._held, samples])
+        loud = np.flatnonzero(np.abs(held.astype(np.int32)) > self.threshold)
+
+        if not self._started:
+            if not len(loud):
+                # keep the padding to put before the audio, once it is heard
+                self._held = held[max(0, len(held) - self._padding) :]
+                return _EMPTY
+
+            self._started = True
+            held = held[max(0, loud[0] - self._padding) :]
+            loud -= len(self._held) + len(samples) - len(held)
+
+        if not self.trailing:
+            self._held = _EMPTY
+            return held
+
+        # everything up to the last audio heard is output, with as much of the silence
+        # after it as doesn't fit in `max_pause_ms`
+        end = loud[-1] + 1 if len(loud) else 0
+        end = max(end, len(held) - self._max_pause)
+        self._held = held[end:]
+
+        return held[:end]
+
+    def flush(self) -> np.ndarray:
+        if not self._started:
+            return _EMPTY
+
+        padding = self._held[: self._padding]
+        self._held = _EMPTY
+
+        return padding
@@ -0,0 +1,250 @@
+import asyncio
+import time
+from typing import AsyncIterator, Iterator, Optional, Union
+
+from pyneuphonic.audio.codecs import BytesLike, PCM_LINEAR, sample_width, silence
+from pyneuphonic.models import APIResponse
+
+
+AudioSource = Union[BytesLike, APIResponse]
+
+
+def _audio(item: AudioSource) -> Optional[BytesLike]:
+    """Returns the audio in an item of an audio stream, or None if it has no audio."""
+    if isinstance(item, APIResponse):
+        return getattr(item.data, "audio", None)
+
+    return item
+
+
+class FrameRechunker:
+    """
+    Re-frames audio chunks of arbitrary size into fixed-duration frames.
+
+    Frames that lie entirely within one incoming chunk are returned as views onto that chunk,
+    and frames that straddle two chunks are assembled in a single buffer that is reused for
+    every frame, so no memory is allocated per frame.
+
+    Parameters
+    ----------
+    frame_ms : int
+        The duration of each frame in milliseconds, by default 20.
+    sampling_rate : int
+        The sampling rate of the audio, by default 8000.
+    encoding : str
+        The encoding of the audio, which determines the number of bytes per sample. By default
+        `pcm_linear`.
+    copy : bool
+        If False (the default), frames are returned as `memoryview`s which are only valid until
+        the next frame is produced, so call `bytes()` on any frame you need to keep. If True,
+        every frame is returned as a new `bytes` object.
+    """
+
+    def __init__(
+        self,
+        frame_ms: int = 20,
+        sampling_rate: int = 8000,
+        encoding: str = PCM_LINEAR,
+        copy: bool = False,
+    ):
+        self.frame_ms = frame_ms
+        self.sampling_rate = sampling_rate
+        self.encoding = encoding
+        self.copy = copy
+
+        self.frame_bytes = int(sampling_rate * frame_ms / 1000) * sample_width(encoding)
+
+        self._frame = bytearray(self.frame_bytes)
+        self._frame_view = memoryview(self._frame)
+        self._filled = 0
+
+    def _output(self, frame: memoryview) -> Union[memoryview, bytes]:
+        return bytes(frame) if self.copy else frame
+
+    def reset(self):
+        """Drop any partially assembled frame, e.g. when playback is interrupted."""
+        self._filled = 0
+
+    def push(self, data: BytesLike) -> Iterator[Union[memoryview, bytes]]:
+        """
+        Add a chunk of audio and yield every frame that is now complete.
+
+        Parameters
+        ----------
+        data : Union[bytes, bytearray, memoryview]
+            The next chunk of audio.
+
+        Yields
+        ------
+        Union[memoryview, bytes]
+            Complete frames of exactly `frame_bytes` bytes.
+        """
+        data = memoryview(data).cast("B")
+        position = 0
+
+        if self._filled:
+            # complete the frame left over from the previous chunk
+            n = min(self.frame_bytes - self._filled, len(data))
+            self._frame_view[self._filled : self._filled + n] = data[:n]
+            self._filled += n
+            position = n
+
+            if self._filled < self.frame_bytes:
+                return
+
+            self._filled = 0
+            yield self._output(self._frame_view)
+
+        while len(data) - position >= self.frame_bytes:
+            yield self._output(data[position : position + self.frame_bytes])
+            position += self.frame_bytes
+
+        n = len(data) - position
+        self._frame_view[:n] = data[position:]
+        self._filled = n
+
+    def flush(self, pad: bool = True) -> Optional[Union[memoryview, bytes]]:
+        """
+        Return the final partial frame, once the stream has ended.
+
+        Parameters
+        ----------
+        pad : bool
+            If True (the default), the frame is padded with silence to the full frame length.
+
+        Returns
+        -------
+        Optional[Union[memoryview, bytes]]
+            The final frame, or None if there is no audio left over.
+        """
+        if not self._filled:
+            return None
+
+        n = self._filled
+        self._filled = 0
+
+        if not pad:
+            return self._output(self._frame_view[:n])
+
+        width = sample_width(self.encoding)
+        # a trailing partial sample can't be played, so it is replaced too
+        n -= n % width
+
+        n_samples = (self.frame_bytes - n) // width
+        self._frame_view[n:] = silence(self.encoding, n_samples)
+
+        return self._output(self._frame_view)
+
+
+class _Pacer:
+    """Tracks when each frame is due to be sent, so that frames are released in real time."""
+
+    def __init__(self, frame_ms: int):
+        self.frame_duration = frame_ms / 1000
+        self._start = None
+        self._n_frames = 0
+
+    def delay(self) -> float:
+        """Returns how long to wait before releasing the next frame."""
+        now = time.perf_counter()
+
+        if self._start is None:
+            self._start = now
+
+        due = self._start + self._n_frames * self.frame_duration
+        self._n_frames += 1
+
+        return max(0.0, due - now)
+
+
+def rechunk(
+    stream: Iterator[AudioSource],
+    frame_ms: int = 20,
+    sampling_rate: int = 8000,
+    encoding: str = PCM_LINEAR,
+    pace: bool = False,
+    pad: bool = True,
+    copy: bool = False,
+) -> Iterator[Union[memoryview, bytes]]:
+    """
+    Re-frame an audio stream into fixed-duration frames.
+
+    Parameters
+    ----------
+    stream : Iterator[Union[bytes, APIResponse]]
+        The audio stream, e.g. the output of `SSEClient.send`. Items without audio are skipped.
+    frame_ms : int
+        The duration of each frame in milliseconds, by default 20.
+    sampling_rate : int
+        The sampling rate of the audio, by default 8000.
+    encoding : str
+        The encoding of the audio, by default `pcm_linear`.
+    pace : bool
+        If True, frames are yielded in real time, i.e. one every `frame_ms`, rather than as
+        soon as they are available. By default False.
+    pad : bool
+        If True (the default), the final frame is padded with silence to the full frame length.
+    copy : bool
+        See `FrameRechunker`.
+
+    Yields
+    ------
+    Union[memoryview, bytes]
+        Audio frames of `frame_ms` duration.
+    """
+    rechunker = FrameRechunker(frame_ms, sampling_rate, encoding, copy=copy)
+    pacer = _Pacer(frame_ms) if pace else None
+
+    for item in stream:
+        audio = _audio(item)
+        if not audio:
+            continue
+
+        for frame in rechunker.push(audio):
+            if pacer is not None:
+                time.sleep(pacer.delay())
+
+            yield frame
+
+    tail = rechunker.flush(pad=pad)
+    if tail is not None:
+        if pacer is not None:
+            time.sleep(pacer.delay())
+
+        yield tail
+
+
+async def async_rechunk(
+    stream: AsyncIterator[AudioSource],
+    frame_ms: int = 20,
+    sampling_rate: int = 8000,
+    encoding: str = PCM_LINEAR,
+    pace: bool = False,
+    pad: bool = True,
+    copy: bool = False,
+) -> AsyncIterator[Union[memoryview, bytes]]:
+    """
+    Re-frame an asynchronous audio stream into fixed-duration frames.
+
+    See `rechunk` for a description of the parameters.
+    """
+    rechunker = FrameRechunker(frame_ms, sampling_rate, encoding, copy=copy)
+    pacer = _Pacer(frame_ms) if pace else None
+
+    async for item in stream:
+        audio = _audio(item)
+        if not audio:
+            continue
+
+        for frame in rechunker.push(audio):
+            if pacer is not None:
+                await asyncio.sleep(pacer.delay())
+
+            yield frame
+
+    tail = rechunker.flush(pad=pad)
+    if tail is not None:
+        if pacer is not None:
+            await asyncio.sleep(pacer.delay())
+
+        yield tail
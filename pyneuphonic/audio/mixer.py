@@ -0,0 +1,334 @@
+import asyncio
+import threading
+from typing import AsyncIterable, Iterable, List, Union
+
+import numpy as np
+
+from pyneuphonic.audio.arrays import _Aligner
+from pyneuphonic.audio.codecs import PCM_LINEAR, decode
+from pyneuphonic.audio.framing import AudioSource, _audio
+from pyneuphonic.audio.stream import AsyncAudioStream, AudioStream
+
+
+class MixerInput:
+    """
+    One of the streams mixed by a `Mixer`, created by `Mixer.add`. Write 16-bit PCM audio at
+    the mixer's sampling rate to it, or feed it a whole stream, from any thread. The audio is
+    buffered until the mixer plays it, and writing waits while the buffer is full.
+
+    Parameters
+    ----------
+    mixer : Mixer
+        The mixer the input belongs to.
+    gain : float
+        The gain applied to the stream, by default 1.
+    ducks : bool
+        If True, other streams are ducked while this one is playing, e.g. for speech over hold
+        music. By default False.
+    duckable : bool
+        If True (the default), this stream is ducked while a stream that `ducks` is playing.
+        Streams that `duck` others are never ducked themselves.
+    """
+
+    def __init__(
+        self,
+        mixer: "Mixer",
+        gain: float = 1.0,
+        ducks: bool = False,
+        duckable: bool = True,
+    ):
+        self._mixer = mixer
+        self.ducks = ducks
+        self.duckable = duckable
+
+        self._buffer = np.zeros(mixer.buffer_size, dtype=np.float32)
+        self._start = 0  # the index of the oldest sample buffered
+        self._size = 0  # the number of samples buffered
+        self._condition = threading.Condition()
+        self._aligner = _Aligner(PCM_LINEAR)
+
+        self._ended = False  # no more audio will be written
+        # the mixer no longer plays the input, so writes are dropped
+        self._removed = False
+
+        self._gain = gain  # the gain at the end of the last block mixed
+        self._target = gain
+        self._step = 0.0  # how far the gain moves towards the target in each block
+        self._duck = 1.0  # the gain applied by ducking, at the end of the last block
+
+    @property
+    def gain(self) -> float:
+        """The gain the stream is heading to."""
+        return self._target
+
+    @property
+    def playing(self) -> bool:
+        """True while there is audio buffered to play."""
+        return self._size > 0
+
+    @property
+    def finished(self) -> bool:
+        """True once the stream has ended and all of its audio has been played."""
+        return (self._ended and not self._size) or self._removed
+
+    def set_gain(self, gain: float, ramp_ms: float = 0.0):
+        """
+        Change the gain of the stream, ramping to it over `ramp_ms` milliseconds, e.g. to fade
+        the stream out.
+        """
+        n_blocks = max(1, round(ramp_ms / self._mixer.block_ms))
+        self._step = abs(gain - self._gain) / n_blocks
+        self._target = gain
+
+    def _space(self) -> int:
+        return len(self._buffer) - self._size
+
+    def _samples(self, chunk: Union[AudioSource, np.ndarray]) -> np.ndarray:
+        if isinstance(chunk, np.ndarray):
+            return chunk
+
+        return decode(self._aligner.push(_audio(chunk) or b""), PCM_LINEAR)
+
+    def _write(self, samples: np.ndarray):
+        capacity = len(self._buffer)
+        position = 0
+
+        with self._condition:
+            while position < len(samples) and not self._removed:
+                if not self._space():
+                    self._condition.wait()
+                    continue
+
+                n = min(len(samples) - position, self._space())
+                end = (self._start + self._size) % capacity
+                first = min(n, capacity - end)
+
+                self._buffer[end : end + first] = samples[position : position + first]
+                self._buffer[: n - first] = samples[position + first : position + n]
+
+                self._size += n
+                position += n
+
+    def write(self, chunk: Union[AudioSource, np.ndarray]):
+        """
+        Buffer a chunk of 16-bit PCM audio, or a message whose audio to use, waiting while the
+        buffer is full.
+        """
+        self._write(self._samples(chunk))
+
+    def end(self):
+        """Mark the end of the stream. The input is removed once its audio has been played."""
+        self._ended = True
+
+    def feed(self, stream: Iterable[AudioSource]):
+        """
+        Write every chunk of `stream` and then end the input, e.g. from a background thread.
+        An `AudioStream` is converted to the mixer's sampling rate.
+        """
+        if isinstance(stream, AudioStream):
+            stream = stream.transcode(PCM_LINEAR).resample(self._mixer.sampling_rate)
+
+        try:
+            for chunk in stream:
+                if self._removed:
+                    break
+
+                self.write(chunk)
+        finally:
+            self.end()
+
+    async def async_feed(self, stream: AsyncIterable[AudioSource]):
+        """See `feed`. Waits for space in the buffer without blocking the event loop."""
+        if isinstance(stream, AsyncAudioStream):
+            stream = stream.transcode(PCM_LINEAR).resample(self._mixer.sampling_rate)
+
+        try:
+            async for chunk in stream:
+                if self._removed:
+                    break
+
+                samples = self._samples(chunk)
+
+                if len(samples) <= self._space():
+                    self._write(samples)
+                else:
+                    await asyncio.to_thread(self._write, samples)
+        finally:
+            self.end()
+
+    def _read_into(self, out: np.ndarray):
+        """Fill `out` with the next samples, and with silence if there aren't enough."""
+        capacity = len(self._buffer)
+
+        with self._condition:
+            n = min(len(out), self._size)
+            first = min(n, capacity - self._start)
+
+            out[:first] = self._buffer[self._start : self._start + first]
+            out[first:n] = self._buffer[: n - first]
+            out[n:] = 0
+
+            self._start = (self._start + n) % capacity
+            self._size -= n
+            self._condition.notify_all()
+
+    def _advance(self, ducked: bool, duck_gain: float, attack: float, release: float):
+        """Move the gains on by one block."""
+        if self._gain < self._target:
+            self._gain = min(self._target, self._gain + self._step)
+        else:
+            self._gain = max(self._target, self._gain - self._step)
+
+        if ducked and self.duckable and not self.ducks:
+            self._duck = max(duck_gain, self._duck - attack)
+        else:
+            self._duck = min(1.0, self._duck + release)
+
+
+class Mixer:
+    """
+    Mixes several streams of 16-bit PCM audio into one, e.g. speech over a bed of hold music,
+    or a crossfade between two voices, for one output device or transport.
+
+    Each stream is added with `add`, which returns a `MixerInput` to write its audio to. The
+    mixed audio is read a block at a time with `mix`, or by iterating over the mixer, which
+    yields blocks until every input has finished. Streams that have no audio buffered when a
+    block is mixed are silent for that block, so the output never waits for a slow stream.
+
+    Mixing a block takes the same time whatever the audio, and reuses the same buffers, so no
+    audio is allocated per block.
+
+    >>> mixer = Mixer(sampling_rate=24000)
+    >>> music, speech = mixer.add(gain=0.5), mixer.add(ducks=True)
+    >>> threading.Thread(target=music.feed, args=(hold_music,)).start()
+    >>> threading.Thread(target=speech.feed, args=(sse.send('Please hold.'),)).start()
+    >>> for block in mixer:
+    >>>     player.play(bytes(block))
+
+    Parameters
+    ----------
+    sampling_rate : int
+        The sampling rate of the audio, by default 24000.
+    block_ms : int
+        The duration of each block of output in milliseconds, by default 20.
+    duck_db : float
+        The gain applied to streams while they are ducked, in dB. By default -15.
+    attack_ms : float
+        How long ducking takes to reach `duck_db`, in milliseconds. By default 40.
+    release_ms : float
+        How long streams take to return to full volume after ducking, in milliseconds, which
+        also bridges short gaps in the stream that caused the ducking. By default 400.
+    buffer_ms : int
+        How much audio to buffer for each input, in milliseconds. By default 2000.
+    """
+
+    def __init__(
+        self,
+        sampling_rate: int = 24000,
+        block_ms: int = 20,
+        duck_db: float = -15.0,
+        attack_ms: float = 40.0,
+        release_ms: float = 400.0,
+        buffer_ms: int = 2000,
+    ):
+        self.sampling_rate = sampling_rate
+        self.block_ms = block_ms
+        self.block_size = int(sampling_rate * block_ms / 1000)
+        self.buffer_size = max(self.block_size, int(sampling_rate * buffer_ms / 1000))
+
+        self.duck_gain = 10 ** (duck_db / 20)
+        self._attack = (1 - self.duck_gain) * min(1.0, block_ms / max(attack_ms, 1e-9))
+        self._release = (1 - self.duck_gain) * min(
+            1.0, block_ms / max(release_ms, 1e-9)
+        )
+
+        self._inputs: List[MixerInput] = []
+        self._lock = threading.Lock()
+
+        # reused for every block
+        self._ramp = (
+            np.arange(1, self.block_size + 1, dtype=np.float32) / self.block_size
+        )
+        self._gains = np.zeros(self.block_size, dtype=np.float32)
+        self._samples = np.zeros(self.block_size, dtype=np.float32)
+        self._mix = np.zeros(self.block_size, dtype=np.float32)
+        self._output = np.zeros(self.block_size, dtype=np.int16)
+        self._output_view = memoryview(self._output).cast("B")
+
+    @property
+    def inputs(self) -> List[MixerInput]:
+        """The inputs still being mixed."""
+        with self._lock:
+            return list(self._inputs)
+
+    def add(
+        self, gain: float = 1.0, ducks: bool = False, duckable: bool = True
+    ) -> MixerInput:
+        """Add a stream to the mix. See `MixerInput` for the parameters."""
+        mixer_input = MixerInput(self, gain, ducks=ducks, duckable=duckable)
+
+        with self._lock:
+            self._inputs.append(mixer_input)
+
+        return mixer_input
+
+    def remove(self, mixer_input: MixerInput):
+        """Stop mixing a stream straight away, dropping any audio it has buffered."""
+        with self._lock:
+            if mixer_input in self._inputs:
+                self._inputs.remove(mixer_input)
+
+        with mixer_input._condition:
+            mixer_input._removed = True
+            mixer_input._condition.notify_all()
+
+    def crossfade(self, source: MixerInput, target: MixerInput, ramp_ms: float = 200.0):
+        """Fade `source` out and `target` in over `ramp_ms` milliseconds."""
+        gain = source.gain
+
+        source.set_gain(0.0, ramp_ms)
+        target.set_gain(gain, ramp_ms)
+
+    def _add_input(self, mixer_input: MixerInput, ducked: bool):
+        gain = mixer_input._gain * mixer_input._duck
+        mixer_input._advance(ducked, self.duck_gain, self._attack, self._release)
+        ramp = mixer_input._gain * mixer_input._duck - gain
+
+        # ramp linearly from the gain at the end of the last block to the new one
+        np.multiply(self._ramp, ramp, out=self._gains)
+        self._gains += gain
+
+        mixer_input._read_into(self._samples)
+        self._samples *= self._gains
+        self._mix += self._samples
+
+    def mix(self) -> memoryview:
+        """
+        Mix the next block of audio.
+
+        Returns
+        -------
+        memoryview
+            `block_size` samples of 16-bit PCM audio. The view is only valid until the next
+            block is mixed, so call `bytes()` on it if you need to keep it.
+        """
+        inputs = self.inputs
+        ducked = any(i.ducks and i.playing for i in inputs)
+
+        self._mix.fill(0.0)
+
+        for mixer_input in inputs:
+            self._add_input(mixer_input, ducked)
+
+            if mixer_input.finished:
+                self.remove(mixer_input)
+
+        np.rint(self._mix, out=self._mix)
+        np.clip(self._mix, -32768, 32767, out=self._mix)
+        self._output[:] = self._mix
+
+        return self._output_view
+
+    def __iter__(self):
+        while self.inputs:
+            yield self.mix()
@@ -0,0 +1,227 @@
+import numpy as np
+from functools import lru_cache
+from itertools import permutations
+from math import gcd
+from typing import Union
+
+BytesLike = Union[bytes, bytearray, memoryview]
+
+COMMON_SAMPLING_RATES = (8000, 16000, 22050, 24000, 44100, 48000)
+
+_KAISER_BETA = 8.0  # roughly 80dB of stopband attenuation
+
+
+@lru_cache(maxsize=None)
+def _design_filter(up: int, down: int, taps_per_phase: int) -> np.ndarray:
+    """
+    Design the anti-aliasing low-pass filter for resampling by `up / down` and split it into its
+    polyphase components.
+
+    Returns
+    -------
+    np.ndarray
+        An array of shape `(up, taps_per_phase)`. Row `p` holds the taps used for outputs that
+        fall on phase `p` of the upsampled signal, in reverse order so that they can be applied
+        directly to a window of input samples.
+    """
+    n_taps = up * taps_per_phase
+
+    # place the cut-off so that the stopband starts at the Nyquist frequency of the lower of the
+    # two rates, using Kaiser's estimate of the transition width for a filter of this length
+    attenuation = _KAISER_BETA / 0.1102 + 8.7
+    span = n_taps / max(up, down)  # the filter's length in samples at the lower rate
+    transition_width = (attenuation - 7.95) / (14.36 * span)
+    # relative to the upsampled rate
+    cutoff = max(0.05, 0.5 - transition_width / 2) / max(up, down)
+
+    # centre the filter on a whole sample so that the resampler's delay is a whole sample too
+    n = np.arange(n_taps) - n_taps // 2
+    window = np.kaiser(n_taps + 1, _KAISER_BETA)[:n_taps]
+    taps = 2 * cutoff * np.sinc(2 * cutoff * n) * window
+
+    polyphase = taps.reshape(taps_per_phase, up).T[:, ::-1]
+    polyphase = polyphase / polyphase.sum(
+        axis=1, keepdims=True
+    )  # unity gain on every phase
+
+    polyphase = np.ascontiguousarray(polyphase, dtype=np.float32)
+    polyphase.flags.writeable = False
+
+    return polyphase
+
+
+def _ratio(input_rate: int, output_rate: int):
+    divisor = gcd(input_rate, output_rate)
+    return output_rate // divisor, input_rate // divisor
+
+
+def _scaled_taps(up: int, down: int, taps_per_phase: int) -> int:
+    """
+    Returns the number of taps per phase needed for the filter to span `taps_per_phase` output
+    samples. When decimating, the cut-off is lower relative to the input rate, so the filter
+    has to be proportionally longer to attenuate aliases as strongly.
+    """
+    return taps_per_phase * -(-down // up)
+
+
+# precompute the filters for conversions between the rates used by the API, devices and telephony
+for _input_rate, _output_rate in permutations(COMMON_SAMPLING_RATES, 2):
+    _up, _down = _ratio(_input_rate, _output_rate)
+    _design_filter(_up, _down, _scaled_taps(_up, _down, 48))
+
+
+class Resampler:
+    """
+    Streaming polyphase resampler for 16-bit PCM audio.
+
+    The resampler is stateful, so audio can be passed in as chunks of any size and the output is
+    identical to resampling the whole signal in one go. Call `flush` once the stream has ended
+    to get the last few output samples.
+
+    Parameters
+    ----------
+    input_rate : int
+        The sampling rate of the audio passed in.
+    output_rate : int
+        The sampling rate to convert to.
+    taps_per_phase : int
+        The length of the filter applied to compute each output sample, in output samples when
+        the rate is reduced and in input samples otherwise. Longer filters give a sharper
+        cut-off at the cost of more computation. By default 48.
+    """
+
+    def __init__(self, input_rate: int, output_rate: int, taps_per_phase: int = 48):
+        self.input_rate = input_rate
+        self.output_rate = output_rate
+
+        self._up, self._down = _ratio(input_rate, output_rate)
+        self._taps = _scaled_taps(self._up, self._down, taps_per_phase)
+        self._filter = _design_filter(self._up, self._down, self._taps)
+
+        self.reset()
+
+    def reset(self):
+        """Drop all state, e.g. when playback is interrupted, so the next chunk starts afresh."""
+        # the last `taps - 1` input samples, needed to compute outputs at the start of a chunk
+        self._history = np.zeros(self._taps - 1, dtype=np.float32)
+        self._remainder = bytearray()
+
+        self._n_input = 0  # number of input samples received
+        self._n_output = 0  # number of output samples produced
+        # position of the next output sample on the upsampled time axis. Starting at the filter's
+        # group delay means output sample 0 lines up with input sample 0.
+        self._position = self._up * self._taps // 2
+
+    @property
+    def is_passthrough(self) -> bool:
+        """Returns True if the input and output rates are the same."""
+        return self._up == self._down
+
+    def process_samples(self, samples: np.ndarray) -> np.ndarray:
+        """
+        Resample the next chunk of audio.
+
+        Parameters
+        ----------
+        samples : np.ndarray
+            The next chunk of input samples.
+
+        Returns
+        -------
+        np.ndarray
+            float32 output samples, on the same scale as the input.
+        """
+        if self.is_passthrough:
+            return samples.astype(np.float32)
+
+        start = self._n_input
+        self._n_input += len(samples)
+
+        buffer = np.concatenate([self._history, samples.astype(np.float32)])
+        self._history = buffer[len(buffer) - self._taps + 1 :]
+
+        # every output whose newest input sample has now been received
+        n_outputs = -(-(self._n_input * self._up - self._position) // self._down)
+        if n_outputs <= 0:
+            return np.zeros(0, dtype=np.float32)
+
+        positions = self._position + self._down * np.arange(n_outputs)
+        self._position += self._down * n_outputs
+        self._n_output += n_outputs
+
+        windows = (positions // self._up - start)[:, None] + np.arange(self._taps)
+        return np.einsum(
+            "ij,ij->i", self._filter[positions % self._up], buffer[windows]
+        )
+
+    def process(self, data: BytesLike) -> bytes:
+        """
+        Resample the next chunk of 16-bit PCM audio.
+
+        Parameters
+        ----------
+        data : Union[bytes, bytearray, memoryview]
+            The next chunk of audio. Chunks do not need to be aligned to sample boundaries.
+
+        Returns
+        -------
+        bytes
+            The resampled 16-bit PCM audio.
+        """
+        if self.is_passthrough:
+            return bytes(data)
+
+        if self._remainder:
+            self._remainder += data
+            data = self._remainder
+
+        n_bytes = len(data) // 2 * 2
+        samples = np.frombuffer(memoryview(data)[:n_bytes], dtype=np.int16)
+        output = self.process_samples(samples)
+        self._remainder = bytearray(memoryview(data)[n_bytes:])
+
+        return _to_int16(output)
+
+    def flush(self) -> bytes:
+        """
+        Finish the stream, returning the output samples that were waiting on future input.
+
+        Returns
+        -------
+        bytes
+            The remaining 16-bit PCM audio.
+        """
+        if self.is_passthrough:
+            return b""
+
+        n_remaining = -(-self._n_input * self._up // self._down) - self._n_output
+        lookahead = np.zeros(self._taps, dtype=np.float32)
+        output = self.process_samples(lookahead)[: max(0, n_remaining)]
+
+        return _to_int16(output)
+
+
+def _to_int16(samples: np.ndarray) -> bytes:
+    return np.clip(np.rint(samples), -32768, 32767).astype(np.int16).tobytes()
+
+
+def resample(data: BytesLike, input_rate: int, output_rate: int) -> bytes:
+    """
+    Resample a complete buffer of 16-bit PCM audio.
+
+    Parameters
+    ----------
+    data : Union[bytes, bytearray, memoryview]
+        The audio to resample.
+    input_rate : int
+        The sampling rate of `data`.
+    output_rate : int
+        The sampling rate to convert to.
+
+    Returns
+    -------
+    bytes
+        The resampled audio.
+    """
+    resampler = Resampler(input_rate, output_rate)
+    return resampler.process(data) + resampler.flush()
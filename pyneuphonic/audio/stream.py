@@ -0,0 +1,603 @@
+import asyncio
+import wave
+import numpy as np
+from abc import ABC, abstractmethod
+from contextlib import aclosing, closing
+from typing import (
+    AsyncIterable,
+    AsyncIterator,
+    Callable,
+    Iterable,
+    Iterator,
+    Optional,
+)
+
+from pyneuphonic.audio.arrays import _Aligner, async_iter_arrays, iter_arrays
+from pyneuphonic.audio.codecs import (
+    BytesLike,
+    PCM_LINEAR,
+    StreamingTranscoder,
+    sample_width,
+)
+from pyneuphonic.audio.containers import demuxer
+from pyneuphonic.audio.effects import (
+    Effect,
+    Fade,
+    Gain,
+    Limiter,
+    LoudnessNormalizer,
+    SilenceTrimmer,
+)
+from pyneuphonic.audio.framing import AudioSource, FrameRechunker, _audio
+from pyneuphonic.audio.resampler import Resampler
+from pyneuphonic.audio.wav import AsyncWavWriter, WavWriter
+from pyneuphonic.models import TTSConfig
+from pyneuphonic._read_ahead import ReadAhead
+
+
+class _Stage(ABC):
+    """
+    One step of a pipeline, applied to each chunk in turn by both `AudioStream` and
+    `AsyncAudioStream`.
+    """
+
+    done = False  # set once the stage wants no more input
+
+    @abstractmethod
+    def push(self, chunk: BytesLike) -> Iterable[BytesLike]:
+        """Returns the output for the next chunk, which may be empty."""
+        pass
+
+    def flush(self) -> Iterable[BytesLike]:
+        """Returns any output held back, once the input has ended."""
+        return ()
+
+
+class _Map(_Stage):
+    def __init__(self, function: Callable[[BytesLike], BytesLike]):
+        self._function = function
+
+    def push(self, chunk: BytesLike) -> Iterable[BytesLike]:
+        return (self._function(chunk),)
+
+
+class _Transcode(_Stage):
+    def __init__(self, source_encoding: str, target_encoding: str):
+        self._transcoder = StreamingTranscoder(source_encoding, target_encoding)
+
+    def push(self, chunk: BytesLike) -> Iterable[BytesLike]:
+        return (self._transcoder.convert(chunk),)
+
+
+class _Resample(_Stage):
+    def __init__(self, input_rate: int, output_rate: int):
+        self._resampler = Resampler(input_rate, output_rate)
+
+    def push(self, chunk: BytesLike) -> Iterable[BytesLike]:
+        return (self._resampler.process(chunk),)
+
+    def flush(self) -> Iterable[BytesLike]:
+        return (self._resampler.flush(),)
+
+
+class _Rechunk(_Stage):
+    def __init__(self, rechunker: FrameRechunker, pad: bool):
+        self._rechunker = rechunker
+        self._pad = pad
+
+    def push(self, chunk: BytesLike) -> Iterable[BytesLike]:
+        return self._rechunker.push(chunk)
+
+    def flush(self) -> Iterable[BytesLike]:
+        tail = self._rechunker.flush(pad=self._pad)
+
+        return () if tail is None else (tail,)
+
+
+class _Take(_Stage):
+    def __init__(self, n_bytes: int):
+        self._remaining = n_bytes
+        self.done = n_bytes <= 0
+
+    def push(self, chunk: BytesLike) -> Iterable[BytesLike]:
+        if len(chunk) >= self._remaining:
+            # a view onto the start of the chunk, rather than a copy of it
+            chunk = memoryview(chunk).cast("B")[: self._remaining]
+            self.done = True
+
+        self._remaining -= len(chunk)
+
+        return (chunk,)
+
+
+class _Apply(_Stage):
+    def __init__(self, effect: Effect):
+        self._effect = effect
+        self._aligner = _Aligner(PCM_LINEAR)
+
+    def push(self, chunk: BytesLike) -> Iterable[BytesLike]:
+        samples = np.frombuffer(self._aligner.push(chunk), dtype=np.int16)
+
+        return (self._effect.process(samples).tobytes(),)
+
+    def flush(self) -> Iterable[BytesLike]:
+        return (self._effect.flush().tobytes(),)
+
+
+class _Demux(_Stage):
+    """Strips a container from the audio, checking that it holds audio in the format expected."""
+
+    def __init__(self, output_format: str, sampling_rate: int, encoding: str):
+        self._demuxer = demuxer(output_format)
+        self._expected = (sampling_rate, encoding)
+
+    def push(self, chunk: BytesLike) -> Iterable[BytesLike]:
+        audio = self._demuxer.push(chunk)
+        audio_format = self._demuxer.format
+
+        if audio_format is not None and self._expected != (
+            audio_format.sampling_rate,
+            audio_format.encoding,
+        ):
+            raise ValueError(
+                f"The audio is {audio_format.encoding} at {audio_format.sampling_rate}Hz, but "
+                f"{self._expected[1]} at {self._expected[0]}Hz was expected."
+            )
+
+        return (audio,)
+
+    def flush(self) -> Iterable[BytesLike]:
+        self._demuxer.close()
+
+        return ()
+
+
+class AudioStreamBase:
+    """
+    A lazy stream of audio chunks, with the sampling rate and encoding of the audio attached.
+
+    Nothing is read from the source until the stream is iterated over, and each operator
+    returns a new stream that transforms the chunks of this one as they arrive, so a pipeline
+    never holds more than a chunk or two of audio at once. Closing a stream, or a stream derived
+    from it, closes its source, e.g. to cancel the request it is reading.
+
+    Parameters
+    ----------
+    sampling_rate : int
+        The sampling rate of the audio, by default 24000.
+    encoding : str
+        The encoding of the audio, by default `pcm_linear`.
+    """
+
+    def __init__(self, sampling_rate: int = 24000, encoding: str = PCM_LINEAR):
+        sample_width(encoding)  # raises if the encoding isn't supported
+
+        self.sampling_rate = sampling_rate
+        self.encoding = encoding
+
+    @property
+    def bytes_per_second(self) -> int:
+        """The number of bytes in a second of audio."""
+        return self.sampling_rate * sample_width(self.encoding)
+
+    @staticmethod
+    def _format_of(tts_config: Optional[TTSConfig]) -> dict:
+        """Returns the format of the audio the server sends for `tts_config`."""
+        tts_config = tts_config or TTSConfig()
+
+        return {
+            "sampling_rate": tts_config.sampling_rate,
+            "encoding": tts_config.encoding,
+        }
+
+    def demux(self, output_format: str = "wav"):
+        """
+        Returns the raw audio in a stream sent in a container `output_format`, e.g. `wav`. The
+        header is stripped as it arrives, and must describe audio in the format of this stream.
+        See `demux` for the formats supported.
+        """
+        return self._then(_Demux(output_format, self.sampling_rate, self.encoding))
+
+    def _demux_response(self, tts_config: Optional[TTSConfig]):
+        if tts_config is None or tts_config.output_format is None:
+            return self
+
+        return self.demux(tts_config.output_format)
+
+    def apply(self, effect: Effect):
+        """
+        Returns the stream processed by `effect`, e.g. a `LoudnessNormalizer`. The audio is
+        converted to 16-bit PCM for the effect, and back to the encoding of the stream.
+        """
+        stream = self.transcode(PCM_LINEAR)._then(_Apply(effect))
+
+        return stream.transcode(self.encoding)
+
+    def gain(self, db: float):
+        """Returns the stream scaled by `db` decibels. See `Gain`."""
+        return self.apply(Gain(db))
+
+    def normalize(self, target_db: float = -20.0, max_gain_db: float = 12.0, **kwargs):
+        """
+        Returns the stream brought to a consistent loudness. See `LoudnessNormalizer` for the
+        parameters.
+        """
+        effect = LoudnessNormalizer(
+            self.sampling_rate, target_db, max_gain_db, **kwargs
+        )
+
+        return self.apply(effect)
+
+    def limit(self, ceiling_db: float = -1.0, release_ms: float = 50.0):
+        """Returns the stream with its peaks kept below `ceiling_db`. See `Limiter`."""
+        return self.apply(Limiter(self.sampling_rate, ceiling_db, release_ms))
+
+    def fade(self, fade_in_ms: float = 10.0, fade_out_ms: float = 10.0):
+        """Returns the stream faded in at the start and out at the end. See `Fade`."""
+        return self.apply(Fade(self.sampling_rate, fade_in_ms, fade_out_ms))
+
+    def trim_silence(self, threshold_db: float = -45.0, **kwargs):
+        """
+        Returns the stream without the silence at its start and end. See `SilenceTrimmer` for
+        the parameters.
+        """
+        return self.apply(SilenceTrimmer(self.sampling_rate, threshold_db, **kwargs))
+
+    def _take_stage(self, seconds: float) -> _Take:
+        n_samples = int(seconds * self.sampling_rate)
+
+        return _Take(n_samples * sample_width(self.encoding))
+
+    def _rechunk_stage(self, frame_ms: int, pad: bool, copy: bool) -> _Rechunk:
+        rechunker = FrameRechunker(
+            frame_ms, self.sampling_rate, self.encoding, copy=copy
+        )
+
+        return _Rechunk(rechunker, pad)
+
+
+class AudioStream(AudioStreamBase):
+    """
+    See AudioStreamBase. Iterate over it to receive the chunks of audio, as `bytes` or, from
+    some operators, `memoryview`s.
+
+    >>> stream = AudioStream.from_response(sse.send('Hello!', tts_config), tts_config)
+    >>> stream.resample(8000).transcode('pcm_mulaw').rechunk(frame_ms=20)
+
+    Parameters
+    ----------
+    source : Iterable[Union[bytes, APIResponse]]
+        The audio, e.g. the output of `SSEClient.send` or an `Utterance`. Items without audio
+        are skipped.
+    sampling_rate : int
+        See AudioStreamBase.
+    encoding : str
+        See AudioStreamBase.
+    """
+
+    def __init__(
+        self,
+        source: Iterable[AudioSource],
+        sampling_rate: int = 24000,
+        encoding: str = PCM_LINEAR,
+    ):
+        super().__init__(sampling_rate, encoding)
+        self._source = source
+        self._chunks: Optional[Iterator[BytesLike]] = None
+
+    @classmethod
+    def from_response(
+        cls, response: Iterable[AudioSource], tts_config: Optional[TTSConfig] = None
+    ) -> "AudioStream":
+        """
+        Returns the stream of a response requested with `tts_config`. If it has an
+        `output_format`, the container is stripped from the audio.
+        """
+        stream = cls(response, **cls._format_of(tts_config))
+
+        return stream._demux_response(tts_config)
+
+    @classmethod
+    def from_file(cls, file_path: str, chunk_ms: int = 100) -> "AudioStream":
+        """Returns the stream of a mono 16-bit PCM .wav file, read `chunk_ms` at a time."""
+        with wave.open(file_path, "rb") as wav_file:
+            if wav_file.getnchannels() != 1 or wav_file.getsampwidth() != 2:
+                raise ValueError(f"{file_path} is not mono 16-bit PCM audio.")
+
+            sampling_rate = wav_file.getframerate()
+
+        def chunks():
+            with wave.open(file_path, "rb") as wav_file:
+                n_frames = sampling_rate * chunk_ms // 1000
+
+                while frames := wav_file.readframes(n_frames):
+                    yield frames
+
+        return cls(chunks(), sampling_rate=sampling_rate)
+
+    def _generate(self) -> Iterator[BytesLike]:
+        source = iter(self._source)
+
+        try:
+            for item in source:
+                audio = _audio(item)
+
+                if audio:
+                    yield audio
+        finally:
+            if hasattr(source, "close"):
+                source.close()
+
+    def __iter__(self) -> Iterator[BytesLike]:
+        if self._chunks is None:
+            self._chunks = self._generate()
+
+        return self._chunks
+
+    def close(self):
+        """Stop the stream, and close its source."""
+        source = self._source if self._chunks is None else self._chunks
+
+        if hasattr(source, "close"):
+            source.close()
+
+    def _then(self, stage: _Stage, **format) -> "AudioStream":
+        def chunks():
+            with closing(self):
+                if not stage.done:
+                    for chunk in self:
+                        yield from filter(len, stage.push(chunk))
+
+                        if stage.done:
+                            return
+
+                yield from filter(len, stage.flush())
+
+        return AudioStream(
+            chunks(),
+            sampling_rate=format.get("sampling_rate", self.sampling_rate),
+            encoding=format.get("encoding", self.encoding),
+        )
+
+    def map(self, function: Callable[[BytesLike], BytesLike]) -> "AudioStream":
+        """Returns a stream of `function` applied to each chunk, in the same format."""
+        return self._then(_Map(function))
+
+    def transcode(self, encoding: str) -> "AudioStream":
+        """Returns the stream converted to `encoding`."""
+        if encoding == self.encoding:
+            return self
+
+        return self._then(_Transcode(self.encoding, encoding), encoding=encoding)
+
+    def resample(self, sampling_rate: int) -> "AudioStream":
+        """Returns the stream resampled to `sampling_rate`, in the same encoding."""
+        if sampling_rate == self.sampling_rate:
+            return self
+
+        stage = _Resample(self.sampling_rate, sampling_rate)
+
+        return (
+            self.transcode(PCM_LINEAR)
+            ._then(stage, sampling_rate=sampling_rate)
+            .transcode(self.encoding)
+        )
+
+    def rechunk(
+        self, frame_ms: int = 20, pad: bool = True, copy: bool = False
+    ) -> "AudioStream":
+        """Returns the stream in frames of `frame_ms`. See `rechunk` for the parameters."""
+        return self._then(self._rechunk_stage(frame_ms, pad, copy))
+
+    def take(self, seconds: float) -> "AudioStream":
+        """Returns the first `seconds` of the stream, closing the source once they are read."""
+        return self._then(self._take_stage(seconds))
+
+    def timeout(self, seconds: float) -> "AudioStream":
+        """
+        Returns the stream, raising `TimeoutError` if a chunk takes more than `seconds` to
+        arrive. The source is read on a background thread.
+        """
+
+        def chunks():
+            read_ahead = ReadAhead(self, max_messages=1)
+
+            try:
+                while True:
+                    try:
+                        yield read_ahead.next(timeout=seconds)
+                    except StopIteration:
+                        return
+            finally:
+                read_ahead.close()
+
+        return AudioStream(chunks(), self.sampling_rate, self.encoding)
+
+    def arrays(self, dtype=np.int16) -> Iterator[np.ndarray]:
+        """Yields the samples in each chunk as an array. See `iter_arrays` for `dtype`."""
+        return iter_arrays(self, self.encoding, dtype)
+
+    def read(self) -> bytes:
+        """Returns all of the audio in the stream."""
+        return b"".join(self)
+
+    def save(self, file_path: str, encoding: str = PCM_LINEAR):
+        """
+        Save the stream to a .wav file as it arrives, in `encoding`, by default 16-bit PCM. See
+        `WavWriter`.
+        """
+        with WavWriter(file_path, self.sampling_rate, encoding) as wav_file:
+            for chunk in self.transcode(encoding):
+                wav_file.write(chunk)
+
+
+class AsyncAudioStream(AudioStreamBase):
+    """
+    See AudioStreamBase. Iterate over it asynchronously to receive the chunks of audio.
+
+    Parameters
+    ----------
+    source : AsyncIterable[Union[bytes, APIResponse]]
+        The audio, e.g. the output of `AsyncSSEClient.send` or an `AsyncUtterance`. Items
+        without audio are skipped.
+    sampling_rate : int
+        See AudioStreamBase.
+    encoding : str
+        See AudioStreamBase.
+    """
+
+    def __init__(
+        self,
+        source: AsyncIterable[AudioSource],
+        sampling_rate: int = 24000,
+        encoding: str = PCM_LINEAR,
+    ):
+        super().__init__(sampling_rate, encoding)
+        self._source = source
+        self._chunks: Optional[AsyncIterator[BytesLike]] = None
+
+    @classmethod
+    def from_response(
+        cls,
+        response: AsyncIterable[AudioSource],
+        tts_config: Optional[TTSConfig] = None,
+    ) -> "AsyncAudioStream":
+        """See AudioStream.from_response."""
+        stream = cls(response, **cls._format_of(tts_config))
+
+        return stream._demux_response(tts_config)
+
+    @classmethod
+    def from_sync(cls, stream: AudioStream) -> "AsyncAudioStream":
+        """
+        Returns a synchronous stream as an asynchronous one, e.g. one read from a file. Each
+        chunk is read on a worker thread, so the event loop isn't blocked.
+        """
+
+        async def chunks():
+            iterator = iter(stream)
+
+            try:
+                while (
+                    chunk := await asyncio.to_thread(next, iterator, None)
+                ) is not None:
+                    yield chunk
+            finally:
+                stream.close()
+
+        return cls(chunks(), stream.sampling_rate, stream.encoding)
+
+    async def _generate(self) -> AsyncIterator[BytesLike]:
+        source = aiter(self._source)
+
+        try:
+            async for item in source:
+                audio = _audio(item)
+
+                if audio:
+                    yield audio
+        finally:
+            if hasattr(source, "aclose"):
+                await source.aclose()
+
+    def __aiter__(self) -> AsyncIterator[BytesLike]:
+        if self._chunks is None:
+            self._chunks = self._generate()
+
+        return self._chunks
+
+    async def aclose(self):
+        """See AudioStream.close."""
+        source = self._source if self._chunks is None else self._chunks
+
+        if hasattr(source, "aclose"):
+            await source.aclose()
+
+    def _then(self, stage: _Stage, **format) -> "AsyncAudioStream":
+        async def chunks():
+            async with aclosing(self):
+                if not stage.done:
+                    async for chunk in self:
+                        for output in filter(len, stage.push(chunk)):
+                            yield output
+
+                        if stage.done:
+                            return
+
+                for output in filter(len, stage.flush()):
+                    yield output
+
+        return AsyncAudioStream(
+            chunks(),
+            sampling_rate=format.get("sampling_rate", self.sampling_rate),
+            encoding=format.get("encoding", self.encoding),
+        )
+
+    def map(self, function: Callable[[BytesLike], BytesLike]) -> "AsyncAudioStream":
+        """See AudioStream.map."""
+        return self._then(_Map(function))
+
+    def transcode(self, encoding: str) -> "AsyncAudioStream":
+        """See AudioStream.transcode."""
+        if encoding == self.encoding:
+            return self
+
+        return self._then(_Transcode(self.encoding, encoding), encoding=encoding)
+
+    def resample(self, sampling_rate: int) -> "AsyncAudioStream":
+        """See AudioStream.resample."""
+        if sampling_rate == self.sampling_rate:
+            return self
+
+        stage = _Resample(self.sampling_rate, sampling_rate)
+
+        return (
+            self.transcode(PCM_LINEAR)
+            ._then(stage, sampling_rate=sampling_rate)
+            .transcode(self.encoding)
+        )
+
+    def rechunk(
+        self, frame_ms: int = 20, pad: bool = True, copy: bool = False
+    ) -> "AsyncAudioStream":
+        """See AudioStream.rechunk."""
+        return self._then(self._rechunk_stage(frame_ms, pad, copy))
+
+    def take(self, seconds: float) -> "AsyncAudioStream":
+        """See AudioStream.take."""
+        return self._then(self._take_stage(seconds))
+
+    def timeout(self, seconds: float) -> "AsyncAudioStream":
+        """Returns the stream, raising `TimeoutError` if a chunk takes more than `seconds`."""
+
+        async def chunks():
+            async with aclosing(self):
+                iterator = aiter(self)
+
+                while True:
+                    try:
+                        chunk = await asyncio.wait_for(anext(iterator), seconds)
+                    except StopAsyncIteration:
+                        return
+                    except asyncio.TimeoutError:
+                        raise TimeoutError(
+                            f"No audio was received within {seconds} seconds."
+                        )
+
+                    yield chunk
+
+        return AsyncAudioStream(chunks(), self.sampling_rate, self.encoding)
+
+    def arrays(self, dtype=np.int16) -> AsyncIterator[np.ndarray]:
+        """See AudioStream.arrays."""
+        return async_iter_arrays(self, self.encoding, dtype)
+
+    async def read(self) -> bytes:
+        """See AudioStream.read."""
+        return b"".join([chunk async for chunk in self])
+
+    async def save(self, file_path: str, encoding: str = PCM_LINEAR):
+        """See AudioStream.save. The file is written without blocking the event loop."""
+        async with AsyncWavWriter(file_path, self.sampling_rate, encoding) as wav_file:
+            async for chunk in self.transcode(encoding):
+                await wav_file.write(chunk)
@@ -0,0 +1,366 @@
+import asyncio
+import threading
+from collections import deque
+from typing import AsyncIterator, Generic, Iterator, List, Optional, Tuple, TypeVar
+
+from pyneuphonic.models import OverflowPolicy
+
+T = TypeVar("T")
+
+
+class _TeeBase(Generic[T]):
+    """
+    Fans one stream out to several branches, each of which yields every item of the stream.
+
+    Items are read from the stream once, and kept in a single buffer shared by the branches
+    until every branch has read them, so the branches yield the same objects and the audio is
+    held once however many branches there are. Each branch reads at its own pace, up to
+    `max_chunks` items behind the branch furthest ahead.
+
+    Parameters
+    ----------
+    n : int
+        The number of branches.
+    max_chunks : int
+        The most items a branch may fall behind.
+    overflow_policy : OverflowPolicy
+        What happens when a branch falls `max_chunks` items behind. `OverflowPolicy.BLOCK` (the
+        default) stops reading the stream until the slowest branch catches up, and
+        `OverflowPolicy.DROP_OLDEST` skips the oldest items the lagging branch hasn't read yet,
+        counting them in its `dropped`. `OverflowPolicy.DROP_NEWEST` isn't supported, as an
+        item in the shared buffer is kept for every branch.
+    """
+
+    def __init__(
+        self,
+        n: int = 2,
+        max_chunks: int = 64,
+        overflow_policy: OverflowPolicy = OverflowPolicy.BLOCK,
+    ):
+        if overflow_policy == OverflowPolicy.DROP_NEWEST:
+            raise ValueError(
+                "A stream can't be teed with `OverflowPolicy.DROP_NEWEST`."
+            )
+
+        self.max_chunks = max_chunks
+        self.overflow_policy = overflow_policy
+
+        self._items = deque()
+        self._first = 0  # the index of the oldest item kept
+        # the index of the next item each open branch will read
+        self._positions = {branch: 0 for branch in range(n)}
+        self._dropped = [0] * n
+
+        self._reading = False  # True while a branch is reading the next item
+        self._finished = False
+        self._error: Optional[BaseException] = None
+
+    def _end(self) -> int:
+        return self._first + len(self._items)
+
+    def _full(self) -> bool:
+        """Returns True if reading must wait for the slowest branch to catch up."""
+        if self.overflow_policy != OverflowPolicy.BLOCK or not self._positions:
+            return False
+
+        return self._end() - min(self._positions.values()) >= self.max_chunks
+
+    def _trim(self):
+        """Forget the items every open branch has read."""
+        oldest = min(self._positions.values(), default=self._end())
+
+        while self._first < oldest:
+            self._items.popleft()
+            self._first += 1
+
+    def _append(self, item: T):
+        if self.overflow_policy == OverflowPolicy.DROP_OLDEST:
+            for branch, position in self._positions.items():
+                if self._end() - position >= self.max_chunks:
+                    self._positions[branch] += 1
+                    self._dropped[branch] += 1
+
+        self._items.append(item)
+        self._trim()
+
+    def _finish(self, error: Optional[BaseException] = None):
+        self._finished = True
+        self._error = error
+
+    def _take(self, branch: int) -> Tuple[bool, Optional[T]]:
+        """
+        Returns True and the next item for `branch` if it has been read, or False if the
+        stream has to be read first.
+
+        Raises
+        ------
+        StopIteration
+            If the branch has read every item of the stream, or has been closed.
+        """
+        if branch not in self._positions:
+            raise StopIteration  # the branch has been closed
+
+        position = self._positions[branch]
+
+        if position < self._end():
+            item = self._items[position - self._first]
+            self._positions[branch] += 1
+            self._trim()
+
+            return True, item
+
+        if not self._finished:
+            return False, None
+
+        if self._error is not None:
+            raise self._error
+
+        raise StopIteration
+
+    def _close(self, branch: int) -> bool:
+        """Close `branch`, and returns True if it was the last one open."""
+        if self._positions.pop(branch, None) is None:
+            return False
+
+        self._trim()
+
+        return not self._positions
+
+
+class Tee(_TeeBase[T]):
+    """
+    See _TeeBase. The stream is read by whichever branch first needs the next item, so the
+    branches can be iterated over from different threads, e.g. one playing the audio while
+    another writes it to a file.
+
+    >>> player_audio, file_audio = Tee(sse.send('Hello, world!'), n=2).branches
+
+    Parameters
+    ----------
+    stream : Iterator
+        The stream to fan out, e.g. the output of `SSEClient.send`.
+    n : int
+        See _TeeBase.
+    max_chunks : int
+        See _TeeBase.
+    overflow_policy : OverflowPolicy
+        See _TeeBase.
+    """
+
+    def __init__(
+        self,
+        stream: Iterator[T],
+        n: int = 2,
+        max_chunks: int = 64,
+        overflow_policy: OverflowPolicy = OverflowPolicy.BLOCK,
+    ):
+        super().__init__(n, max_chunks, overflow_policy)
+        self._stream = iter(stream)
+        self._condition = threading.Condition()
+
+        self.branches: List[TeeBranch[T]] = [TeeBranch(self, i) for i in range(n)]
+
+    def _next(self, branch: int) -> T:
+        while True:
+            with self._condition:
+                while True:
+                    taken, item = self._take(branch)
+
+                    if taken:
+                        self._condition.notify_all()
+                        return item
+
+                    if not self._reading and not self._full():
+                        break
+
+                    self._condition.wait()
+
+                self._reading = True
+
+            self._read()
+
+    def _read(self):
+        """Read the next item of the stream into the buffer, without holding the lock."""
+        try:
+            item = next(self._stream)
+        except StopIteration:
+            item, error, finished = None, None, True
+        except Exception as e:
+            item, error, finished = None, e, True
+        else:
+            error, finished = None, False
+
+        with self._condition:
+            if finished:
+                self._finish(error)
+            else:
+                self._append(item)
+
+            self._reading = False
+            self._condition.notify_all()
+
+    def _close_branch(self, branch: int):
+        with self._condition:
+            last = self._close(branch)
+            self._condition.notify_all()
+
+        if last and hasattr(self._stream, "close"):
+            self._stream.close()
+
+
+class TeeBranch(Generic[T]):
+    """One of the branches of a `Tee`. Iterate over it as you would the stream."""
+
+    def __init__(self, tee: Tee[T], index: int):
+        self._tee = tee
+        self._index = index
+
+    @property
+    def dropped(self) -> int:
+        """The number of items skipped because this branch fell too far behind."""
+        return self._tee._dropped[self._index]
+
+    def __iter__(self) -> Iterator[T]:
+        return self
+
+    def __next__(self) -> T:
+        return self._tee._next(self._index)
+
+    def close(self):
+        """
+        Stop reading this branch, so that the others no longer wait for it. The stream is
+        closed once every branch has been.
+        """
+        self._tee._close_branch(self._index)
+
+
+class AsyncTee(_TeeBase[T]):
+    """
+    See _TeeBase. The stream is read by whichever branch first needs the next item, so the
+    branches can be iterated over from different tasks on the same event loop.
+
+    Parameters
+    ----------
+    stream : AsyncIterator
+        The stream to fan out, e.g. the output of `AsyncSSEClient.send`.
+    n : int
+        See _TeeBase.
+    max_chunks : int
+        See _TeeBase.
+    overflow_policy : OverflowPolicy
+        See _TeeBase.
+    """
+
+    def __init__(
+        self,
+        stream: AsyncIterator[T],
+        n: int = 2,
+        max_chunks: int = 64,
+        overflow_policy: OverflowPolicy = OverflowPolicy.BLOCK,
+    ):
+        super().__init__(n, max_chunks, overflow_policy)
+        self._stream = aiter(stream)
+        self._condition = asyncio.Condition()
+
+        self.branches: List[AsyncTeeBranch[T]] = [
+            AsyncTeeBranch(self, i) for i in range(n)
+        ]
+
+    async def _next(self, branch: int) -> T:
+        while True:
+            async with self._condition:
+                while True:
+                    try:
+                        taken, item = self._take(branch)
+                    except StopIteration:
+                        raise StopAsyncIteration
+
+                    if taken:
+                        self._condition.notify_all()
+                        return item
+
+                    if not self._reading and not self._full():
+                        break
+
+                    await self._condition.wait()
+
+                self._reading = True
+
+            await self._read()
+
+    async def _read(self):
+        """See Tee._read."""
+        try:
+            item = await self._stream.__anext__()
+        except StopAsyncIteration:
+            item, error, finished = None, None, True
+        except Exception as e:
+            item, error, finished = None, e, True
+        else:
+            error, finished = None, False
+
+        async with self._condition:
+            if finished:
+                self._finish(error)
+            else:
+                self._append(item)
+
+            self._reading = False
+            self._condition.notify_all()
+
+    async def _close_branch(self, branch: int):
+        async with self._condition:
+            last = self._close(branch)
+            self._condition.notify_all()
+
+        if last and hasattr(self._stream, "aclose"):
+            await self._stream.aclose()
+
+
+class AsyncTeeBranch(Generic[T]):
+    """One of the branches of an `AsyncTee`. Iterate over it as you would the stream."""
+
+    def __init__(self, tee: AsyncTee[T], index: int):
+        self._tee = tee
+        self._index = index
+
+    @property
+    def dropped(self) -> int:
+        """See TeeBranch.dropped."""
+        return self._tee._dropped[self._index]
+
+    def __aiter__(self) -> AsyncIterator[T]:
+        return self
+
+    async def __anext__(self) -> T:
+        return await self._tee._next(self._index)
+
+    async def aclose(self):
+        """See TeeBranch.close."""
+        await self._tee._close_branch(self._index)
+
+
+def tee(
+    stream: Iterator[T],
+    n: int = 2,
+    max_chunks: int = 64,
+    overflow_policy: OverflowPolicy = OverflowPolicy.BLOCK,
+) -> Tuple[TeeBranch[T], ...]:
+    """
+    Fan an audio stream out to `n` branches that share its chunks, e.g.
+
+    >>> to_play, to_save = tee(sse.send('Hello, world!'))
+
+    See `Tee` for a description of the parameters.
+    """
+    return tuple(Tee(stream, n, max_chunks, overflow_policy).branches)
+
+
+def async_tee(
+    stream: AsyncIterator[T],
+    n: int = 2,
+    max_chunks: int = 64,
+    overflow_policy: OverflowPolicy = OverflowPolicy.BLOCK,
+) -> Tuple[AsyncTeeBranch[T], ...]:
+    """See `tee`. Fans out an asynchronous audio stream."""
+    return tuple(AsyncTee(stream, n, max_chunks, overflow_policy).branches)
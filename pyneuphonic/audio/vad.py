@@ -0,0 +1,233 @@
+import numpy as np
+from collections import deque
+from typing import Optional
+
+
+class VoiceActivityDetector:
+    """
+    Lightweight energy and zero-crossing-rate voice activity detector for 16-bit PCM audio.
+
+    Incoming audio is split into fixed-size frames which are all classified in a single
+    vectorised pass. A frame counts as speech if it is loud enough and its zero-crossing rate is
+    low enough to rule out broadband noise such as hiss or clicks. A hangover keeps the detector
+    in the speech state for a while after the signal drops, so that short pauses between words
+    are not cut, and a pre-roll buffer keeps the most recent silent frames so that speech onsets
+    are not clipped.
+
+    Parameters
+    ----------
+    sampling_rate : int
+        The sampling rate of the audio, by default 16000.
+    frame_ms : int
+        The duration of each analysis frame in milliseconds, by default 20.
+    energy_threshold_db : float
+        Minimum frame energy, in dBFS, for a frame to be considered speech. By default -45.
+    zcr_threshold : float
+        Maximum zero-crossing rate, in crossings per sample, for a frame to be considered speech.
+        By default 0.35.
+    hangover_ms : int
+        How long to keep forwarding audio after the last speech frame, by default 300.
+    pre_roll_ms : int
+        How much audio preceding a speech onset to forward, by default 200.
+    """
+
+    def __init__(
+        self,
+        sampling_rate: int = 16000,
+        frame_ms: int = 20,
+        energy_threshold_db: float = -45.0,
+        zcr_threshold: float = 0.35,
+        hangover_ms: int = 300,
+        pre_roll_ms: int = 200,
+    ):
+        self.sampling_rate = sampling_rate
+        self.frame_size = int(sampling_rate * frame_ms / 1000)
+        self.energy_threshold_db = energy_threshold_db
+        self.zcr_threshold = zcr_threshold
+
+        self._hangover_frames = max(0, int(hangover_ms / frame_ms))
+        self._pre_roll = deque(maxlen=max(0, int(pre_roll_ms / frame_ms)))
+
+        self._remainder = bytearray()  # partial frame carried over to the next call
+        self._hangover = 0
+        self._is_speech = False
+
+    @property
+    def frame_bytes(self) -> int:
+        """The number of bytes in a single analysis frame."""
+        return 2 * self.frame_size
+
+    @property
+    def is_speech(self) -> bool:
+        """Returns True if the detector is currently in the speech (or hangover) state."""
+        return self._is_speech
+
+    def reset(self):
+        """Drop any buffered audio and return to the silent state."""
+        self._remainder.clear()
+        self._pre_roll.clear()
+        self._hangover = 0
+        self._is_speech = False
+
+    def classify(self, samples: np.ndarray) -> np.ndarray:
+        """
+        Classify whole frames of audio as speech or non-speech.
+
+        Parameters
+        ----------
+        samples : np.ndarray
+            int16 samples. Its length must be a multiple of `frame_size`.
+
+        Returns
+        -------
+        np.ndarray
+            A boolean array with one entry per frame, True where the frame contains speech.
+        """
+        frames = samples.reshape(-1, self.frame_size).astype(np.float32) / 32768.0
+
+        energy = np.mean(frames * frames, axis=1)
+        energy_db = 10.0 * np.log10(energy + 1e-10)
+
+        signs = np.signbit(frames)
+        zcr = np.count_nonzero(signs[:, 1:] != signs[:, :-1], axis=1) / self.frame_size
+
+        return (energy_db > self.energy_threshold_db) & (zcr < self.zcr_threshold)
+
+    def process(self, data: bytes) -> bytes:
+        """
+        Feed audio into the detector and return the audio that should be forwarded.
+
+        Parameters
+        ----------
+        data : bytes
+            16-bit PCM audio of any length. Partial frames are kept until the next call.
+
+        Returns
+        -------
+        bytes
+            The speech audio, including any pre-roll and hangover. Empty if there is no speech.
+        """
+        self._remainder += data
+        n_frames = len(self._remainder) // self.frame_bytes
+
+        if n_frames == 0:
+            return b""
+
+        n_bytes = n_frames * self.frame_bytes
+        buffer = bytes(self._remainder[:n_bytes])
+        del self._remainder[:n_bytes]
+
+        voiced = self.classify(np.frombuffer(buffer, dtype=np.int16))
+
+        output = bytearray()
+
+        for i, is_voiced in enumerate(voiced):
+            frame = buffer[i * self.frame_bytes : (i + 1) * self.frame_bytes]
+
+            if is_voiced:
+                if not self._is_speech:
+                    # speech onset, release the audio leading up to it
+                    for pre_roll_frame in self._pre_roll:
+                        output += pre_roll_frame
+                    self._pre_roll.clear()
+
+                self._is_speech = True
+                self._hangover = self._hangover_frames
+                output += frame
+            elif self._is_speech and self._hangover > 0:
+                self._hangover -= 1
+                output += frame
+            else:
+                self._is_speech = False
+                self._pre_roll.append(frame)
+
+        return bytes(output)
+
+
+class BargeInDetector:
+    """
+    Detects the user starting to speak over audio that is being played back.
+
+    This uses the same frame classifier as `VoiceActivityDetector`, but with a higher default
+    energy threshold, since some of the playback will leak back into the microphone on devices
+    without echo cancellation, and it fires as soon as `min_speech_ms` of consecutive speech has
+    been detected rather than forwarding audio.
+
+    Parameters
+    ----------
+    sampling_rate : int
+        The sampling rate of the recorded audio, by default 16000.
+    frame_ms : int
+        The duration of each analysis frame in milliseconds, by default 20.
+    energy_threshold_db : float
+        Minimum frame energy, in dBFS, for a frame to be considered speech. By default -30.
+    zcr_threshold : float
+        Maximum zero-crossing rate, in crossings per sample, for a frame to be considered speech.
+        By default 0.35.
+    min_speech_ms : int
+        How much consecutive speech is needed before a barge-in is detected, by default 40.
+    duck_gain : float, optional
+        If set, playback is ducked to this gain on barge-in instead of being stopped, and is
+        only stopped once the server confirms the interruption. By default None.
+    """
+
+    def __init__(
+        self,
+        sampling_rate: int = 16000,
+        frame_ms: int = 20,
+        energy_threshold_db: float = -30.0,
+        zcr_threshold: float = 0.35,
+        min_speech_ms: int = 40,
+        duck_gain: Optional[float] = None,
+    ):
+        self.sampling_rate = sampling_rate
+        self._vad = VoiceActivityDetector(
+            sampling_rate=sampling_rate,
+            frame_ms=frame_ms,
+            energy_threshold_db=energy_threshold_db,
+            zcr_threshold=zcr_threshold,
+        )
+        self.min_speech_frames = max(1, int(min_speech_ms / frame_ms))
+        self.duck_gain = duck_gain
+
+        self._remainder = bytearray()
+        self._speech_frames = 0
+
+    def reset(self):
+        """Drop any buffered audio and reset the consecutive speech count."""
+        self._remainder.clear()
+        self._speech_frames = 0
+
+    def process(self, data: bytes) -> bool:
+        """
+        Feed recorded audio into the detector.
+
+        Parameters
+        ----------
+        data : bytes
+            16-bit PCM audio of any length. Partial frames are kept until the next call.
+
+        Returns
+        -------
+        bool
+            True if the user has been speaking for at least `min_speech_ms`.
+        """
+        self._remainder += data
+        n_bytes = len(self._remainder) // self._vad.frame_bytes * self._vad.frame_bytes
+
+        if n_bytes == 0:
+            return False
+
+        voiced = self._vad.classify(
+            np.frombuffer(bytes(self._remainder[:n_bytes]), dtype=np.int16)
+        )
+        del self._remainder[:n_bytes]
+
+        for is_voiced in voiced:
+            self._speech_frames = self._speech_frames + 1 if is_voiced else 0
+
+            if self._speech_frames >= self.min_speech_frames:
+                self.reset()
+                return True
+
+        return False
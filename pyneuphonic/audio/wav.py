@@ -0,0 +1,420 @@
+import asyncio
+import concurrent.futures
+import queue
+import struct
+import threading
+from collections import deque
+from typing import Callable, Deque, Optional, Union
+
+import numpy as np
+
+from pyneuphonic.audio.codecs import (
+    PCM_ALAW,
+    PCM_LINEAR,
+    PCM_MULAW,
+    _check_encoding,
+    encode,
+    sample_width,
+)
+from pyneuphonic.audio.framing import AudioSource, _audio
+
+# the `wFormatTag` of each encoding in the header
+_FORMAT_TAGS = {PCM_LINEAR: 1, PCM_ALAW: 6, PCM_MULAW: 7}
+
+# the offsets of the sizes patched as the file grows
+_RIFF_SIZE_OFFSET = 4
+_FACT_SIZE_OFFSET = 46  # the number of samples, only written for mu-law and A-law
+
+
+def _header(sampling_rate: int, encoding: str, n_bytes: int) -> bytes:
+    """
+    Returns the header of a mono .wav file holding `n_bytes` of audio. Mu-law and A-law files
+    have the extended format chunk and the `fact` chunk that non-PCM formats require.
+    """
+    width = sample_width(encoding)
+    pcm = encoding == PCM_LINEAR
+
+    fmt = struct.pack(
+        "<HHIIHH",
+        _FORMAT_TAGS[encoding],
+        1,  # channels
+        sampling_rate,
+        sampling_rate * width,  # bytes per second
+        width,  # block align
+        8 * width,  # bits per sample
+    )
+    chunks = b"fmt " + struct.pack("<I", len(fmt) + (not pcm) * 2) + fmt
+
+    if not pcm:
+        chunks += struct.pack("<H4sII", 0, b"fact", 4, n_bytes // width)
+
+    chunks += b"data" + struct.pack("<I", n_bytes)
+    riff_size = 4 + len(chunks) + n_bytes + n_bytes % 2
+
+    return b"RIFF" + struct.pack("<I", riff_size) + b"WAVE" + chunks
+
+
+class WavWriter:
+    """
+    Writes a stream of audio to a .wav file as it arrives, e.g. to record a call.
+
+    The header is written up front and patched with the length of the audio as the file grows,
+    so a partially written file, e.g. of a call still in progress or of a process that crashed,
+    is always a valid .wav file holding the audio written so far. Chunks are collected into
+    large buffers, so the file is written a buffer at a time rather than once per chunk.
+
+    The audio is written in its own encoding, so `pcm_mulaw` and `pcm_alaw` audio is stored
+    at one byte per sample, with the format tag that identifies it.
+
+    >>> with WavWriter('call.wav', sampling_rate=8000, encoding='pcm_mulaw') as wav_file:
+    >>>     for message in sse.send('Hello, world!', tts_config=tts_config):
+    >>>         wav_file.write(message)
+
+    Parameters
+    ----------
+    file_path : str
+        The path of the file to write. It is created, or overwritten, straight away.
+    sampling_rate : int
+        The sampling rate of the audio, by default 24000.
+    encoding : str
+        The encoding of the audio, by default `pcm_linear`. One of `pcm_linear`, `pcm_mulaw` or
+        `pcm_alaw`.
+    buffer_size : int
+        The number of bytes of audio to collect before writing them to the file, by default
+        65536.
+    header_interval_ms : int
+        The most audio to write, in milliseconds, before patching the header, by default 1000.
+        The header is patched when a buffer is written, so with a larger `buffer_size` it is
+        patched less often.
+    """
+
+    def __init__(
+        self,
+        file_path: str,
+        sampling_rate: int = 24000,
+        encoding: str = PCM_LINEAR,
+        buffer_size: int = 65536,
+        header_interval_ms: int = 1000,
+    ):
+        _check_encoding(encoding)
+
+        self.file_path = file_path
+        self.sampling_rate = sampling_rate
+        self.encoding = encoding
+        self.buffer_size = buffer_size
+
+        self._width = sample_width(encoding)
+        self._header_interval = sampling_rate * self._width * header_interval_ms // 1000
+        self._buffer = bytearray()
+        self._n_bytes = 0  # the number of bytes of audio written to the file
+        self._patched = 0  # `_n_bytes` when the header was last patched
+
+        self._file = open(file_path, "wb")
+        self._file.write(_header(sampling_rate, encoding, 0))
+        self._file.flush()
+
+    @property
+    def n_samples(self) -> int:
+        """The number of samples written, including any still buffered."""
+        return (self._n_bytes + len(self._buffer)) // self._width
+
+    @property
+    def closed(self) -> bool:
+        """True once the file has been closed."""
+        return self._file.closed
+
+    def _bytes(self, chunk: Union[AudioSource, np.ndarray]) -> bytes:
+        if isinstance(chunk, np.ndarray):
+            return encode(chunk, self.encoding).tobytes()
+
+        return _audio(chunk) or b""
+
+    def write(self, chunk: Union[AudioSource, np.ndarray]):
+        """
+        Write a chunk of audio in the writer's encoding, a message whose audio to write, or an
+        array of int16 samples, which are encoded first.
+        """
+        self._buffer += self._bytes(chunk)
+
+        if len(self._buffer) >= self.buffer_size:
+            self._write_out(self._take_buffer())
+
+    def _take_buffer(self) -> bytearray:
+        """Returns the buffered audio, and starts a new buffer."""
+        data, self._buffer = self._buffer, bytearray()
+
+        return data
+
+    def _write_out(self, data: bytes):
+        """Append `data` to the file, patching the header if it is due."""
+        self._file.write(data)
+        self._n_bytes += len(data)
+
+        if self._n_bytes - self._patched >= self._header_interval:
+            self._patch_header()
+
+    def _patch_header(self):
+        """Update the sizes in the header to cover the audio written so far."""
+        header = _header(self.sampling_rate, self.encoding, self._n_bytes)
+
+        self._file.seek(_RIFF_SIZE_OFFSET)
+        self._file.write(header[_RIFF_SIZE_OFFSET : _RIFF_SIZE_OFFSET + 4])
+
+        if self.encoding != PCM_LINEAR:
+            self._file.seek(_FACT_SIZE_OFFSET)
+            self._file.write(header[_FACT_SIZE_OFFSET : _FACT_SIZE_OFFSET + 4])
+
+        self._file.seek(len(header) - 4)
+        self._file.write(header[-4:])
+        self._file.seek(0, 2)
+        self._file.flush()
+
+        self._patched = self._n_bytes
+
+    def flush(self):
+        """Write any buffered audio to the file, and patch the header to cover it."""
+        self._write_out(self._take_buffer())
+        self._patch_header()
+
+    def close(self):
+        """Write any buffered audio, finalise the header and close the file."""
+        if self.closed:
+            return
+
+        try:
+            self.flush()
+
+            if self._n_bytes % 2:
+                self._file.write(b"\x00")  # chunks are padded to an even length
+        finally:
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+class _DiskThread:
+    """
+    Runs the disk I/O of every `AsyncWavWriter`, one job at a time and in the order submitted,
+    on a single background thread, so that recording any number of streams doesn't block the
+    event loop or start a thread per stream.
+    """
+
+    def __init__(self):
+        self._jobs = queue.SimpleQueue()
+        self._thread = threading.Thread(
+            target=self._run, name="pyneuphonic-wav-writer", daemon=True
+        )
+        self._thread.start()
+
+    def _run(self):
+        while True:
+            future, function, args = self._jobs.get()
+
+            if not future.set_running_or_notify_cancel():
+                continue
+
+            try:
+                future.set_result(function(*args))
+            except BaseException as e:
+                future.set_exception(e)
+
+    def submit(self, function: Callable, *args) -> concurrent.futures.Future:
+        future = concurrent.futures.Future()
+        self._jobs.put((future, function, args))
+
+        return future
+
+
+_disk_thread: Optional[_DiskThread] = None
+_disk_thread_lock = threading.Lock()
+
+
+def _get_disk_thread() -> _DiskThread:
+    global _disk_thread
+
+    with _disk_thread_lock:
+        if _disk_thread is None:
+            _disk_thread = _DiskThread()
+
+        return _disk_thread
+
+
+class AsyncWavWriter:
+    """
+    See `WavWriter`. Chunks are collected into buffers on the event loop, and the file is
+    opened, written and closed on a background thread shared by every `AsyncWavWriter`, so
+    writing never blocks the event loop on disk I/O. It must be created within a running event
+    loop.
+
+    >>> async with AsyncWavWriter('call.wav', sampling_rate=8000, encoding='pcm_mulaw') as wav:
+    >>>     async for message in sse.send('Hello, world!', tts_config=tts_config):
+    >>>         await wav.write(message)
+
+    Parameters
+    ----------
+    file_path : str
+        See WavWriter.
+    sampling_rate : int
+        See WavWriter.
+    encoding : str
+        See WavWriter.
+    buffer_size : int
+        See WavWriter.
+    header_interval_ms : int
+        See WavWriter.
+    max_pending : int
+        The most buffers waiting to be written before `write` waits for the disk to catch up,
+        by default 4.
+    """
+
+    def __init__(
+        self,
+        file_path: str,
+        sampling_rate: int = 24000,
+        encoding: str = PCM_LINEAR,
+        buffer_size: int = 65536,
+        header_interval_ms: int = 1000,
+        max_pending: int = 4,
+    ):
+        _check_encoding(encoding)
+        # before anything is submitted, so that no file is opened if there is no running loop
+        self._loop = asyncio.get_running_loop()
+
+        self.file_path = file_path
+        self.sampling_rate = sampling_rate
+        self.encoding = encoding
+        self.buffer_size = buffer_size
+        self.max_pending = max_pending
+
+        self._width = sample_width(encoding)
+        self._buffer = bytearray()
+        self._n_bytes = 0  # the number of bytes of audio handed to the disk thread
+        self._closed = False
+
+        self._disk_thread = _get_disk_thread()
+        self._pending: Deque[asyncio.Future] = deque()
+        # only used on the disk thread
+        self._writer: Optional[WavWriter] = None
+        self._error: Optional[BaseException] = None
+
+        self._submit(
+            self._open,
+            file_path,
+            sampling_rate,
+            encoding,
+            buffer_size,
+            header_interval_ms,
+        )
+
+    @property
+    def n_samples(self) -> int:
+        """See WavWriter.n_samples."""
+        return (self._n_bytes + len(self._buffer)) // self._width
+
+    @property
+    def closed(self) -> bool:
+        """True once `aclose` has been called."""
+        return self._closed
+
+    def _open(self, *args):
+        self._writer = WavWriter(*args)
+
+    def _write_out(self, data: bytes):
+        # once a job has failed, e.g. the disk is full, the audio after it is dropped
+        if self._error is not None:
+            raise self._error
+
+        try:
+            self._writer._write_out(data)
+        except BaseException as e:
+            self._error = e
+            raise
+
+    def _flush(self):
+        self._writer.flush()
+
+    def _close(self, data: bytes):
+        if self._writer is None:
+            return
+
+        try:
+            self._write_out(data)
+        finally:
+            self._writer.close()
+
+    def _submit(self, function: Callable, *args):
+        """Queue a job for the disk thread, raising the error of any job that has failed."""
+        self._pending.append(
+            asyncio.wrap_future(
+                self._disk_thread.submit(function, *args), loop=self._loop
+            )
+        )
+
+        while self._pending and self._pending[0].done():
+            self._pending.popleft().result()
+
+    async def _wait(self, max_pending: int):
+        """
+        Wait until no more than `max_pending` jobs are queued, raising the error of the first
+        that failed.
+        """
+        error = None
+
+        while len(self._pending) > max_pending:
+            try:
+                await self._pending.popleft()
+            except Exception as e:
+                error = error or e
+
+        if error is not None:
+            raise error
+
+    def _bytes(self, chunk: Union[AudioSource, np.ndarray]) -> bytes:
+        if isinstance(chunk, np.ndarray):
+            return encode(chunk, self.encoding).tobytes()
+
+        return _audio(chunk) or b""
+
+    async def write(self, chunk: Union[AudioSource, np.ndarray]):
+        """
+        See WavWriter.write. Waits if `max_pending` buffers are already waiting to be written.
+        """
+        self._buffer += self._bytes(chunk)
+
+        if len(self._buffer) >= self.buffer_size:
+            data, self._buffer = self._buffer, bytearray()
+            self._n_bytes += len(data)
+
+            self._submit(self._write_out, data)
+            await self._wait(self.max_pending)
+
+    async def flush(self):
+        """See WavWriter.flush. Waits for everything written so far to reach the file."""
+        data, self._buffer = self._buffer, bytearray()
+        self._n_bytes += len(data)
+
+        self._submit(self._write_out, data)
+        self._submit(self._flush)
+        await self._wait(0)
+
+    async def aclose(self):
+        """See WavWriter.close. Waits for the file to be closed."""
+        if self._closed:
+            return
+
+        self._closed = True
+        data, self._buffer = self._buffer, bytearray()
+        self._n_bytes += len(data)
+
+        self._submit(self._close, data)
+        await self._wait(0)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.aclose()
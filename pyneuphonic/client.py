@@ -1,11 +1,15 @@
-from typing import Optional
+from typing import List, Optional, Union
 import os
 
 from pyneuphonic._voices import Voices
+from pyneuphonic._governor import Governor
+from pyneuphonic._regions import Regions
+from pyneuphonic._single_flight import SingleFlight
 from pyneuphonic._sse import SSEClient, AsyncSSEClient
 from pyneuphonic._endpoint import Endpoint
-from pyneuphonic._websocket import AsyncTTSWebsocketClient
+from pyneuphonic._websocket import AsyncTTSWebsocketClient, TTSWebsocketClient
 from pyneuphonic._agents import Agents
+from pyneuphonic.models import GovernorPolicy, RoutingPolicy
 
 
 class Neuphonic:
@@ -16,7 +20,9 @@ class Neuphonic:
     def __init__(
         self,
         api_key: Optional[str] = None,
-        base_url: Optional[str] = None,
+        base_url: Optional[Union[str, List[str]]] = None,
+        routing_policy: Optional[RoutingPolicy] = None,
+        governor_policy: Optional[GovernorPolicy] = None,
     ):
         """Constructor for the Neuphonic client.
 
@@ -25,10 +31,21 @@ class Neuphonic:
         api_key
             Your API key. Generate this on https://beta.neuphonic.com. If this is not passed in,
             it needs to be set in your environment and retrievable via `os.getenv('NEUPHONIC_API_KEY')`
-        base_url : Optional[str], optional
+        base_url : Optional[Union[str, List[str]]], optional
             The base url pointing to which regional deployment to use. If this is not passed on
             and not set in `os.getenv('NEUPHONIC_API_URL')`, then it will default to
-            'api.neuphonic.com'.
+            'api.neuphonic.com'. If a list of base urls is passed, TTS requests are routed to
+            whichever regional deployment has been responding fastest, see `routing_policy`,
+            and the first is used for everything else.
+        routing_policy : Optional[RoutingPolicy], optional
+            How TTS requests are routed and hedged when several base urls are passed. By default
+            `RoutingPolicy()`, which routes each request to the fastest healthy region without
+            hedging.
+        governor_policy : Optional[GovernorPolicy], optional
+            If set, the TTS requests and websocket connections of all of the clients created
+            from this client are rate limited, and the number in flight is limited adaptively,
+            with requests over the limits queueing in the order they were made. See `governor`
+            for how requests are being limited. By default None, for no limits.
         """
 
         # Initialise the API key and base URL
@@ -43,17 +60,72 @@ class Neuphonic:
             )
         self._base_url = base_url or os.getenv("NEUPHONIC_API_URL", "api.neuphonic.com")
 
+        self.regions = None
+        """The regional deployments TTS requests are routed between, if several were passed."""
+
+        if isinstance(self._base_url, list):
+            self.regions = Regions(self._base_url, routing_policy or RoutingPolicy())
+            self._base_url = self._base_url[0]
+
+        self.governor = None if governor_policy is None else Governor(governor_policy)
+        """Limits the TTS requests made with the API key, if a `governor_policy` was passed."""
+
         self.voices = Voices(api_key=self._api_key, base_url=self._base_url)
-        self.tts = TTS(api_key=self._api_key, base_url=self._base_url)
+        self.tts = TTS(
+            api_key=self._api_key,
+            base_url=self._base_url,
+            regions=self.regions,
+            governor=self.governor,
+        )
         self.agents = Agents(api_key=self._api_key, base_url=self._base_url)
 
 
 class TTS(Endpoint):
+    def __init__(
+        self,
+        *args,
+        regions: Optional[Regions] = None,
+        governor: Optional[Governor] = None,
+        **kwargs,
+    ):
+        super().__init__(*args, **kwargs)
+        self._regions = regions
+        self._governor = governor
+        # shared by the SSE clients, so that identical requests from any of them are coalesced
+        self._flights = SingleFlight()
+
     def SSEClient(self) -> SSEClient:
-        return SSEClient(api_key=self._api_key, base_url=self._base_url)
+        return SSEClient(
+            api_key=self._api_key,
+            base_url=self._base_url,
+            regions=self._regions,
+            governor=self._governor,
+            flights=self._flights,
+        )
 
     def AsyncSSEClient(self) -> AsyncSSEClient:
-        return AsyncSSEClient(api_key=self._api_key, base_url=self._base_url)
+        return AsyncSSEClient(
+            api_key=self._api_key,
+            base_url=self._base_url,
+            regions=self._regions,
+            governor=self._governor,
+            flights=self._flights,
+        )
 
-    def AsyncWebsocketClient(self) -> AsyncTTSWebsocketClient:
-        return AsyncTTSWebsocketClient(api_key=self._api_key, base_url=self._base_url)
+    def WebsocketClient(self, **kwargs) -> TTSWebsocketClient:
+        return TTSWebsocketClient(
+            api_key=self._api_key,
+            base_url=self._base_url,
+            regions=self._regions,
+            governor=self._governor,
+            **kwargs,
+        )
+
+    def AsyncWebsocketClient(self, **kwargs) -> AsyncTTSWebsocketClient:
+        return AsyncTTSWebsocketClient(
+            api_key=self._api_key,
+            base_url=self._base_url,
+            regions=self._regions,
+            governor=self._governor,
+            **kwargs,
+        )
@@ -1,6 +1,7 @@
 from pydantic import BaseModel as BaseModel, field_validator, ConfigDict, Field
-from typing import List, Optional, Callable, Awaitable, Union
+from typing import List, Optional, Union
 import base64
+import random
 from enum import Enum
 from typing import Generic, TypeVar
 
@@ -253,12 +254,445 @@ class WebsocketEvents(Enum):
     MESSAGE: str = "message"
     CLOSE: str = "close"
     ERROR: str = "error"
+    RECONNECT: str = "reconnect"
 
 
-class WebsocketEventHandlers(BaseModel):
-    """Pydantic model to hold all websocket callbacks."""
+class OverflowPolicy(Enum):
+    """
+    Enum describing what happens when a bounded buffer is full, e.g. one of a websocket
+    client's message queues, or a branch of a `Tee` that has fallen behind.
+    """
+
+    # stop reading from the socket until there is space in the queue
+    BLOCK: str = "block"
+    # discard the oldest queued message
+    DROP_OLDEST: str = "drop_oldest"
+    # discard the message that has just been received
+    DROP_NEWEST: str = "drop_newest"
+
+
+class Priority(Enum):
+    """
+    Enum describing how urgently the audio for a TTS request is needed, used to order the
+    requests queued by a governor.
+    """
+
+    # someone is waiting to hear the audio, e.g. an agent's turn in a conversation
+    INTERACTIVE: str = "interactive"
+    NORMAL: str = "normal"
+    # nobody is waiting for the audio, e.g. pre-rendering prompts in the background
+    BULK: str = "bulk"
+
+
+class WebsocketMetrics(BaseModel):
+    """Metrics describing how quickly a websocket client's messages are being handled."""
+
+    messages_received: int = Field(
+        default=0, description="Number of messages received from the server."
+    )
+
+    messages_sent: int = Field(
+        default=0, description="Number of messages sent to the server."
+    )
+
+    messages_dropped: int = Field(
+        default=0,
+        description="Number of messages discarded because a message queue was full.",
+    )
+
+    queue_depth: int = Field(
+        default=0, description="Number of messages currently waiting to be handled."
+    )
+
+    max_queue_depth: int = Field(
+        default=0,
+        description="Largest number of messages that have been waiting at once.",
+    )
+
+    handler_lag: float = Field(
+        default=0.0,
+        description=(
+            "Time in seconds between the most recently handled message being received and its "
+            "handler being called."
+        ),
+    )
+
+    max_handler_lag: float = Field(
+        default=0.0, description="Largest `handler_lag` seen, in seconds."
+    )
+
+    reconnects: int = Field(
+        default=0, description="Number of times the connection has been re-established."
+    )
+
+    recovery_latency: float = Field(
+        default=0.0,
+        description=(
+            "Time in seconds between the most recent connection drop and the session being "
+            "resumed."
+        ),
+    )
+
+
+class ReconnectPolicy(BaseModel):
+    """
+    Configures automatic reconnection of a websocket client after the connection drops.
+
+    Reconnect attempts are spaced with exponential backoff, and each delay is randomly shortened
+    by up to `jitter` of its length so that many clients do not reconnect in lockstep.
+    """
+
+    max_attempts: int = Field(
+        default=5,
+        description="Maximum number of reconnect attempts per connection drop.",
+    )
+
+    initial_delay: float = Field(
+        default=0.1, description="Delay in seconds after the first failed attempt."
+    )
+
+    max_delay: float = Field(
+        default=5.0, description="Upper bound in seconds on the delay between attempts."
+    )
+
+    multiplier: float = Field(
+        default=2.0, description="Factor the delay grows by after each failed attempt."
+    )
+
+    jitter: float = Field(
+        default=0.5,
+        description="Fraction, between 0 and 1, of each delay that is randomised.",
+    )
+
+    standby: bool = Field(
+        default=True,
+        description=(
+            "Keep a second, pre-dialled connection open so that a dropped connection can be "
+            "replaced without waiting for a new handshake."
+        ),
+    )
+
+    def delay(self, attempt: int) -> float:
+        """Returns the delay in seconds to wait after the given (1-based) failed attempt."""
+        delay = min(
+            self.max_delay, self.initial_delay * self.multiplier ** (attempt - 1)
+        )
+
+        return delay * (1 - self.jitter * random.random())
+
+
+class StreamPolicy(BaseModel):
+    """
+    Configures deadlines for an SSE response, and how a response that fails part way through is
+    resumed.
+
+    If a deadline is missed, or the connection fails, the text that hasn't been synthesised yet
+    is requested again and the new response continues where the old one left off. The text
+    already synthesised is worked out from `TTSResponse.text` of the messages received.
+    """
+
+    first_byte_timeout: float = Field(
+        default=5.0,
+        description="Seconds to wait for the first message of each request.",
+    )
+
+    chunk_timeout: float = Field(
+        default=2.0,
+        description="Seconds to wait for each subsequent message before the stream is stalled.",
+    )
+
+    total_timeout: Optional[float] = Field(
+        default=None,
+        description=(
+            "Seconds allowed for the whole response, including any retries. By default None, "
+            "for no limit."
+        ),
+    )
+
+    max_retries: int = Field(
+        default=2,
+        description="Maximum number of times the remaining text is requested again.",
+    )
+
+
+class SSEMetrics(BaseModel):
+    """Metrics describing how often an SSE client's responses have been resumed or shared."""
+
+    retries: int = Field(
+        default=0,
+        description="Number of times the remaining text of a response was requested again.",
+    )
+
+    time_lost: float = Field(
+        default=0.0,
+        description=(
+            "Total time in seconds between the last message received before a failure and the "
+            "first message received after resuming."
+        ),
+    )
+
+    coalesced: int = Field(
+        default=0,
+        description=(
+            "Number of requests served by an identical request that was already in flight, "
+            "rather than by a request of their own."
+        ),
+    )
+
+
+class RoutingPolicy(BaseModel):
+    """
+    Configures how requests are routed when `Neuphonic` is given several regional base URLs.
+
+    Each request goes to the healthy region with the lowest recent latency, measured as the time
+    to the first message of an SSE response or the time to open a websocket. Regions that
+    haven't been measured yet are tried first, in the order given. A region is unhealthy for
+    `cooldown` seconds after a request to it fails, and the request fails over to the next one.
+    """
+
+    hedge: bool = Field(
+        default=False,
+        description=(
+            "Send a duplicate, hedged request to the next region if the first hasn't produced "
+            "audio, or opened, after `hedge_percentile` of its recent latencies. Whichever "
+            "responds first is kept and the other is cancelled."
+        ),
+    )
+
+    hedge_percentile: float = Field(
+        default=0.95,
+        description="Percentile, between 0 and 1, of recent latencies to wait before hedging.",
+    )
+
+    hedge_delay: float = Field(
+        default=0.5,
+        description=(
+            "Seconds to wait before hedging a request to a region with fewer than `min_samples` "
+            "latencies measured."
+        ),
+    )
+
+    min_samples: int = Field(
+        default=5,
+        description="Number of latencies needed before the percentile is used to hedge.",
+    )
+
+    window: int = Field(
+        default=50, description="Number of recent latencies kept for each region."
+    )
+
+    cooldown: float = Field(
+        default=30.0,
+        description="Seconds a region is avoided for after a request to it fails.",
+    )
 
-    open: Optional[Callable[[], Awaitable[None]]] = None
-    message: Optional[Callable[[APIResponse[T]], Awaitable[None]]] = None
-    close: Optional[Callable[[], Awaitable[None]]] = None
-    error: Optional[Callable[[Exception], Awaitable[None]]] = None
+
+class RegionStats(BaseModel):
+    """The latencies recently measured for one regional base URL."""
+
+    base_url: str = Field(description="The base URL of the region.")
+
+    healthy: bool = Field(
+        description="False while the region is avoided after a failed request."
+    )
+
+    samples: int = Field(description="Number of latencies measured recently.")
+
+    median_latency: Optional[float] = Field(
+        default=None, description="Median of the recent latencies, in seconds."
+    )
+
+    hedge_delay: float = Field(
+        description="Seconds a request to the region waits before it is hedged."
+    )
+
+
+class GovernorPolicy(BaseModel):
+    """
+    Configures the governor that limits the TTS requests made with one API key, shared by all
+    of the clients created from a `Neuphonic` client.
+
+    Requests are rate limited by a token bucket, and the number in flight at once is limited
+    adaptively: the limit grows by one for every `limit` requests that respond promptly, and is
+    multiplied by `backoff` when responses slow down to more than `latency_tolerance` times the
+    fastest recent response, or the server responds with 429 or 503. Requests over the limits
+    wait in a queue, most urgent `Priority` first and then in the order they were made.
+    """
+
+    rate: Optional[float] = Field(
+        default=None,
+        description="Requests allowed per second on average. By default None, for no limit.",
+    )
+
+    burst: int = Field(
+        default=10,
+        description="Requests allowed at once, above `rate`, after a quiet period.",
+    )
+
+    initial_limit: int = Field(
+        default=8, description="Number of requests allowed in flight to begin with."
+    )
+
+    min_limit: int = Field(
+        default=1, description="Lower bound on the number of requests in flight."
+    )
+
+    max_limit: int = Field(
+        default=64, description="Upper bound on the number of requests in flight."
+    )
+
+    latency_tolerance: float = Field(
+        default=2.0,
+        description=(
+            "How many times slower than the fastest recent response a response can be before "
+            "the limit is reduced."
+        ),
+    )
+
+    backoff: float = Field(
+        default=0.5,
+        description="Factor, between 0 and 1, the limit is multiplied by when it is reduced.",
+    )
+
+    window: int = Field(
+        default=100,
+        description="Number of recent latencies the fastest response is taken from.",
+    )
+
+    max_wait: Optional[float] = Field(
+        default=None,
+        description=(
+            "Seconds a request can wait in the queue before it fails with `TimeoutError`. By "
+            "default None, to wait indefinitely."
+        ),
+    )
+
+    reserved: int = Field(
+        default=1,
+        description=(
+            "Places under the concurrency limit kept free for requests more urgent than "
+            "`Priority.BULK`, so that bulk work never holds up a request someone is waiting for."
+        ),
+    )
+
+    promote_after: float = Field(
+        default=5.0,
+        description=(
+            "Seconds after which a queued request is ordered as if it were one priority more "
+            "urgent, and so on, so that less urgent requests are never starved."
+        ),
+    )
+
+
+class GovernorMetrics(BaseModel):
+    """Metrics describing how the requests made with one API key are being limited."""
+
+    limit: int = Field(default=0, description="Number of requests allowed in flight.")
+
+    in_flight: int = Field(default=0, description="Number of requests in flight.")
+
+    queued: int = Field(
+        default=0, description="Number of requests waiting for the limits."
+    )
+
+    max_queued: int = Field(
+        default=0, description="Largest number of requests that have waited at once."
+    )
+
+    throttled: int = Field(
+        default=0,
+        description="Number of responses with status 429 or 503 from the server.",
+    )
+
+    queue_wait: float = Field(
+        default=0.0,
+        description="Time in seconds the most recently admitted request waited.",
+    )
+
+    max_queue_wait: float = Field(
+        default=0.0, description="Largest `queue_wait` seen, in seconds."
+    )
+
+
+class FlushPolicy(BaseModel):
+    """
+    Configures how a `TextStream` coalesces streamed text, e.g. LLM tokens, into websocket
+    messages. By default text is split into segments by a `SentenceSegmenter`. Otherwise,
+    buffered text is sent as soon as any of the other conditions below is met.
+    """
+
+    max_chars: int = Field(
+        default=200,
+        description="Send the buffered text once it is at least this many characters long.",
+    )
+
+    max_delay: float = Field(
+        default=0.1,
+        description=(
+            "Send the buffered text once the oldest part of it has waited this many seconds."
+        ),
+    )
+
+    clause_boundaries: bool = Field(
+        default=True,
+        description=(
+            "Send the buffered text as soon as it ends at a clause or sentence boundary, i.e. "
+            "with punctuation such as a comma or full stop."
+        ),
+    )
+
+    segmenter: bool = Field(
+        default=True,
+        description=(
+            "Split the text into segments with a `SentenceSegmenter` and send each segment as "
+            "soon as it is complete. The segmenter then decides when text is sent, so that "
+            "segments are not cut short mid-sentence, and `max_chars` and `clause_boundaries` "
+            "are not used. Text still waiting for the end of its segment is sent after "
+            "`max_delay`."
+        ),
+    )
+
+
+class ReconnectEvent(BaseModel):
+    """Passed to `WebsocketEvents.RECONNECT` handlers once a dropped session has been resumed."""
+
+    attempts: int = Field(
+        description="Number of connection attempts it took to reconnect."
+    )
+
+    recovery_latency: float = Field(
+        description="Time in seconds between the connection dropping and the session resuming."
+    )
+
+    used_standby: bool = Field(
+        description="True if the pre-dialled standby connection was used."
+    )
+
+    replayed_text: Optional[str] = Field(
+        default=None,
+        description="Text that had not been synthesised yet and was sent again, if any.",
+    )
+
+
+class AudioFormat(BaseModel):
+    """The format of the audio in a container, read from its header by a demuxer."""
+
+    container: str = Field(
+        description="The container the audio was sent in.", examples=["wav"]
+    )
+
+    sampling_rate: int = Field(
+        description="Sampling rate of the audio.", examples=[8000, 24000]
+    )
+
+    encoding: str = Field(
+        description="Encoding of the audio.", examples=["pcm_linear", "pcm_mulaw"]
+    )
+
+    n_samples: Optional[int] = Field(
+        default=None,
+        description=(
+            "The number of samples the header declares, or None if it leaves the length open, "
+            "as streamed files often do."
+        ),
+    )
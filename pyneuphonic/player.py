@@ -1,9 +1,14 @@
 import asyncio
 import logging
+import numpy as np
 
 from typing import Union, Iterator, AsyncIterator, Optional
 from pyneuphonic.models import APIResponse, TTSResponse
 from pyneuphonic._utils import save_audio
+from pyneuphonic.audio.vad import VoiceActivityDetector, BargeInDetector
+from pyneuphonic.audio.resampler import Resampler
+from pyneuphonic.audio.codecs import PCM_LINEAR
+from pyneuphonic.audio.stream import AsyncAudioStream, AudioStream
 from base64 import b64encode
 import time
 
@@ -23,7 +28,12 @@ except ModuleNotFoundError:
 class AudioPlayer:
     """Handles audio playback and audio exporting."""
 
-    def __init__(self, sampling_rate: int = 24000):
+    def __init__(
+        self,
+        sampling_rate: int = 24000,
+        device_sampling_rate: Optional[int] = None,
+        keep_audio: bool = True,
+    ):
         """
         Initialize with a default sampling rate.
 
@@ -31,12 +41,26 @@ class AudioPlayer:
         ----------
         sampling_rate : int
             The sample rate for audio playback.
+        device_sampling_rate : int, optional
+            The sample rate to open the output device at, if the device does not support
+            `sampling_rate`. Audio is resampled before it is played. By default None, which opens
+            the device at `sampling_rate`.
+        keep_audio : bool
+            If True (the default), all of the audio played is kept in `audio_bytes`, so that it
+            can be saved with `save_audio`. Set it to False to avoid holding a copy of the audio,
+            e.g. if it is already written to a file through a `Tee`.
         """
         self.sampling_rate = sampling_rate
+        self.keep_audio = keep_audio
+        self.device_sampling_rate = device_sampling_rate or sampling_rate
+        self._resampler = Resampler(sampling_rate, self.device_sampling_rate)
         self.audio_player = None
         self.stream = None
         self.audio_bytes = bytearray()
 
+        # gain applied to audio as it is played, used to duck playback
+        self.gain = 1.0
+
         # indicates when audio will stop playing
         self._playback_end = time.perf_counter()
 
@@ -71,29 +95,47 @@ class AudioPlayer:
 
         # start the audio stream, which will play audio as and when required
         self.stream = self.audio_player.open(
-            format=pyaudio.paInt16, channels=1, rate=self.sampling_rate, output=True
+            format=pyaudio.paInt16,
+            channels=1,
+            rate=self.device_sampling_rate,
+            output=True,
         )
 
-    def play(self, data: Union[bytes, Iterator[APIResponse[TTSResponse]]]):
+    def _write(self, data: bytes):
+        """Write a chunk of audio to the output device."""
+        duration = len(data) / (2 * self.sampling_rate)
+        output = self._resampler.process(data)
+
+        if self.is_playing:
+            self._playback_end += duration
+        else:
+            self._playback_end = time.perf_counter() + duration
+
+        if self.gain != 1.0:
+            samples = np.frombuffer(output, dtype=np.int16) * self.gain
+            self.stream.write(samples.astype(np.int16).tobytes())
+        else:
+            self.stream.write(output)
+
+    def play(self, data: Union[bytes, Iterator[APIResponse[TTSResponse]], AudioStream]):
         """
         Play audio data or automatically stream over SSE responses and play the audio.
 
         Parameters
         ----------
-        data : Union[bytes, Iterator[TTSResponse]]
-            The audio data to play, either as bytes or an iterator of TTSResponse.
+        data : Union[bytes, Iterator[TTSResponse], AudioStream]
+            The audio data to play, either as bytes, an iterator of TTSResponse, or an
+            `AudioStream`, which is converted to 16-bit PCM at `sampling_rate` if needed.
         """
-        if isinstance(data, bytes):
+        if isinstance(data, AudioStream):
+            for chunk in data.transcode(PCM_LINEAR).resample(self.sampling_rate):
+                self.play(bytes(chunk))
+        elif isinstance(data, bytes):
             if self.stream:
-                duration = len(data) / (2 * self.sampling_rate)
-
-                if self.is_playing:
-                    self._playback_end += duration
-                else:
-                    self._playback_end = time.perf_counter() + duration
+                self._write(data)
 
-                self.stream.write(data)
-            self.audio_bytes += data
+            if self.keep_audio:
+                self.audio_bytes += data
         elif isinstance(data, Iterator):
             for message in data:
                 if not isinstance(message, APIResponse[TTSResponse]):
@@ -142,11 +184,42 @@ class AudioPlayer:
 class AsyncAudioPlayer(AudioPlayer):
     """Asynchronous version of AudioPlayer that allows for smoother handling of interruptions."""
 
-    def __init__(self, sampling_rate: int = 24000):
-        super().__init__(sampling_rate)
+    def __init__(
+        self,
+        sampling_rate: int = 24000,
+        interruption_timeout: float = 2.0,
+        device_sampling_rate: Optional[int] = None,
+        keep_audio: bool = True,
+    ):
+        """
+        Initialize with a default sampling rate.
+
+        Parameters
+        ----------
+        sampling_rate : int
+            The sample rate for audio playback.
+        interruption_timeout : float
+            How long, in seconds, to wait for the server to confirm a locally detected barge-in
+            (see `barge_in`) before treating it as a false positive and resuming playback.
+        device_sampling_rate : int, optional
+            See `AudioPlayer`.
+        keep_audio : bool
+            See `AudioPlayer`.
+        """
+        super().__init__(
+            sampling_rate,
+            device_sampling_rate=device_sampling_rate,
+            keep_audio=keep_audio,
+        )
         self.playback_task: Optional[asyncio.Task] = None
         self.playback_queue: Optional[asyncio.Queue] = asyncio.Queue()
 
+        self.interruption_timeout = interruption_timeout
+        self._interrupted_at: Optional[float] = None
+        # cleared while playback is paused by a barge-in that has not been confirmed yet
+        self._resumed = asyncio.Event()
+        self._resumed.set()
+
     async def open(self):
         """Open the audio stream for playback and creates playback task. `pyaudio` must be installed."""
         super().open()
@@ -178,6 +251,7 @@ class AsyncAudioPlayer(AudioPlayer):
                 chunk = data[i : i + CHUNK_SIZE]
                 if not chunk:
                     break
+                await self._wait_until_resumed()
                 await asyncio.to_thread(super().play, chunk)
         elif isinstance(data, AsyncIterator):
             async for message in data:
@@ -193,9 +267,18 @@ class AsyncAudioPlayer(AudioPlayer):
                 "`data` must be of type bytes or an AsyncIterator of APIResponse[TTSResponse]"
             )
 
-    async def play(self, data: Union[bytes, AsyncIterator[APIResponse[TTSResponse]]]):
-        """Enqueue a chunk of audio to be picked up by self._playback_task."""
-        if isinstance(data, bytes):
+    async def play(
+        self,
+        data: Union[bytes, AsyncIterator[APIResponse[TTSResponse]], AsyncAudioStream],
+    ):
+        """
+        Enqueue a chunk of audio to be picked up by self._playback_task. An `AsyncAudioStream`
+        is converted to 16-bit PCM at `sampling_rate` if needed.
+        """
+        if isinstance(data, AsyncAudioStream):
+            async for chunk in data.transcode(PCM_LINEAR).resample(self.sampling_rate):
+                await self.playback_queue.put(bytes(chunk))
+        elif isinstance(data, bytes):
             await self.playback_queue.put(data)
         elif isinstance(data, AsyncIterator):
             async for message in data:
@@ -221,7 +304,7 @@ class AsyncAudioPlayer(AudioPlayer):
             recreated after cancellation. Default is False.
         """
         if isinstance(self.playback_task, asyncio.Task) and (
-            self.is_playing or closing
+            self.is_playing or closing or not self._resumed.is_set()
         ):
             try:
                 self.playback_task.cancel()
@@ -229,12 +312,100 @@ class AsyncAudioPlayer(AudioPlayer):
             except asyncio.CancelledError as e:
                 pass
             finally:
-                del self.playback_queue
-                self.playback_queue = asyncio.Queue()
-
                 if not closing:
                     self.playback_task = asyncio.create_task(self._playback_task())
 
+        # delete the audio that still needs to be played, which may be queued while paused
+        while not self.playback_queue.empty():
+            self.playback_queue.get_nowait()
+
+        # the next response must not be filtered with the end of the interrupted one
+        self._resampler.reset()
+
+        self._playback_end = min(self._playback_end, time.perf_counter())
+
+    @property
+    def is_interrupted(self) -> bool:
+        """
+        Returns True if a local barge-in is waiting to be confirmed by the server. Call
+        `check_interruption` to also expire a barge-in that was not confirmed in time.
+        """
+        return self._interrupted_at is not None
+
+    def check_interruption(self) -> bool:
+        """
+        Expire a local barge-in that the server has not confirmed within
+        `interruption_timeout`. It is treated as a false positive, and playback resumes at full
+        volume from where it was paused.
+
+        Returns
+        -------
+        bool
+            True if a local barge-in is still waiting to be confirmed by the server.
+        """
+        if self._interrupted_at is None:
+            return False
+
+        if time.perf_counter() - self._interrupted_at <= self.interruption_timeout:
+            return True
+
+        self._interrupted_at = None
+        self.gain = 1.0
+        self._resumed.set()
+
+        return False
+
+    async def _wait_until_resumed(self):
+        """Wait while playback is paused by a barge-in, until it is confirmed or expires."""
+        while not self._resumed.is_set():
+            remaining = (
+                self._interrupted_at + self.interruption_timeout - time.perf_counter()
+            )
+
+            try:
+                await asyncio.wait_for(self._resumed.wait(), max(0.0, remaining))
+            except asyncio.TimeoutError:
+                self.check_interruption()
+
+        # ducked playback is not paused, so it is restored to full volume here
+        self.check_interruption()
+
+    async def barge_in(self, duck_gain: Optional[float] = None):
+        """
+        React to the user speaking over playback, before the server has noticed.
+
+        Playback is paused immediately, and audio received in the meantime is queued rather than
+        played. Once the server confirms the interruption with `confirm_interruption` the queued
+        audio is deleted, since it belongs to the response that was interrupted. If the
+        interruption is not confirmed within `interruption_timeout`, the barge-in is treated as
+        a false positive and playback resumes, so that no audio is lost.
+
+        Parameters
+        ----------
+        duck_gain : float, optional
+            If set, playback is ducked to this gain instead of being paused, and is only stopped
+            once the interruption is confirmed. Ducked playback returns to full volume if the
+            interruption is not confirmed in time.
+        """
+        self._interrupted_at = time.perf_counter()
+
+        if duck_gain is not None:
+            self.gain = duck_gain
+        else:
+            self._resumed.clear()
+            self._playback_end = min(self._playback_end, time.perf_counter())
+
+    async def confirm_interruption(self):
+        """
+        Stop playback following an interruption signalled by the server, e.g. on a
+        `stop_audio_response` message, and reconcile with any local barge-in.
+        """
+        await self.stop_playback()
+
+        self._interrupted_at = None
+        self.gain = 1.0
+        self._resumed.set()
+
     async def __aenter__(self):
         """Enter the runtime context related to this object."""
         await self.open()
@@ -255,6 +426,11 @@ class AsyncAudioRecorder:
         sampling_rate: int = 16000,
         websocket=None,
         player: AudioPlayer = None,
+        vad: Optional[VoiceActivityDetector] = None,
+        send_window_ms: Optional[int] = None,
+        half_duplex: bool = False,
+        barge_in: Optional[BargeInDetector] = None,
+        device_sampling_rate: Optional[int] = None,
     ):
         """
         Initialize the AsyncAudioRecorder.
@@ -267,25 +443,101 @@ class AsyncAudioRecorder:
             Websocket client for sending audio data, by default None.
         player : AudioPlayer, optional
             Audio player instance that may be used for playback, by default None.
+        vad : VoiceActivityDetector, optional
+            If set, only audio the detector classifies as speech (plus its pre-roll and hangover)
+            is sent to the websocket, and silence is dropped. By default None, which sends all
+            audio.
+        send_window_ms : int, optional
+            Coalesce recorded audio into messages of at least this duration before sending. By
+            default None, which sends every recorded buffer as its own message. Any buffered
+            audio is flushed as soon as the `vad` detects the end of speech.
+        half_duplex : bool, optional
+            If True, no audio is sent while `player` is playing. By default False.
+        barge_in : BargeInDetector, optional
+            If set, and `player` is an `AsyncAudioPlayer`, recorded audio is checked for the user
+            speaking over playback, and playback is paused (or ducked) locally without waiting
+            for the server's `stop_audio_response`. Its sampling rate must be `sampling_rate`.
+            By default None.
+        device_sampling_rate : int, optional
+            The sample rate to open the input device at, if the device does not support
+            `sampling_rate`. Recorded audio is resampled to `sampling_rate` before it is used. By
+            default None, which opens the device at `sampling_rate`.
         """
         self.p = None
         self.stream = None
         self.sampling_rate = sampling_rate
+        self.device_sampling_rate = device_sampling_rate or sampling_rate
+        self._resampler = Resampler(self.device_sampling_rate, sampling_rate)
 
         self._ws = websocket
         self.player = player
         self._queue = asyncio.Queue()  # Use a queue to handle audio data asynchronously
 
+        if barge_in is not None and barge_in.sampling_rate != sampling_rate:
+            raise ValueError(
+                f"The barge-in detector's sampling rate ({barge_in.sampling_rate}) must match the "
+                f"recorder's sampling rate ({sampling_rate})."
+            )
+
+        self.vad = vad
+        self.half_duplex = half_duplex
+        self.barge_in = barge_in
+        self._send_window_bytes = (
+            0
+            if send_window_ms is None
+            else int(2 * sampling_rate * send_window_ms / 1000)
+        )
+        self._uplink_buffer = bytearray()
+
         self._tasks = []
 
+    def _is_gated(self) -> bool:
+        """Returns True if audio should not be sent because the player is speaking."""
+        return self.half_duplex and self.player is not None and self.player.is_playing
+
+    async def _flush(self):
+        """Send all buffered uplink audio as a single message."""
+        if self._uplink_buffer:
+            await self._ws.send(
+                {"audio": b64encode(self._uplink_buffer).decode("utf-8")}
+            )
+            self._uplink_buffer.clear()
+
+    async def _detect_barge_in(self, data: bytes):
+        """Interrupt the player if the user starts speaking over its playback."""
+        if self.barge_in is None or not isinstance(self.player, AsyncAudioPlayer):
+            return
+
+        if not self.player.is_playing or self.player.check_interruption():
+            self.barge_in.reset()
+            return
+
+        if self.barge_in.process(data):
+            await self.player.barge_in(duck_gain=self.barge_in.duck_gain)
+
     async def _send(self):
         while True:
             try:
                 # Wait for audio data from the queue
-                data = await self._queue.get()
+                data = self._resampler.process(await self._queue.get())
+
+                await self._detect_barge_in(data)
+
+                if self._is_gated():
+                    self._uplink_buffer.clear()
+                    if self.vad is not None:
+                        self.vad.reset()
+                    continue
+
+                if self.vad is not None:
+                    data = self.vad.process(data)
+
+                self._uplink_buffer += data
 
-                if self.player is not None:
-                    await self._ws.send({"audio": b64encode(data).decode("utf-8")})
+                if len(self._uplink_buffer) >= self._send_window_bytes or (
+                    self.vad is not None and not self.vad.is_speech
+                ):
+                    await self._flush()
 
             except Exception as e:
                 logger.error(f"Error in _send: {e}")
@@ -304,7 +556,7 @@ class AsyncAudioRecorder:
         self.stream = self.p.open(
             format=pyaudio.paInt16,
             channels=1,
-            rate=self.sampling_rate,
+            rate=self.device_sampling_rate,
             input=True,
             stream_callback=self._callback,  # Use the callback function
         )
@@ -0,0 +1 @@
+from pyneuphonic.text.segmenter import SentenceSegmenter, segment
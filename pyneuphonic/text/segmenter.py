@@ -0,0 +1,238 @@
+import re
+from typing import List
+
+# characters that may follow a full stop or comma and still belong to the same segment
+_CLOSING = "\"'”’»)\\]」』"
+
+# Latin-script punctuation only ends a segment when followed by whitespace, which rules out
+# decimals (3.14), times (5:30), thousands separators (1,000) and URLs (neuphonic.com/docs).
+# CJK punctuation is not followed by spaces, so any following character will do.
+_BOUNDARY = re.compile(
+    rf"[.!?…;:,।؟،؛]+[{_CLOSING}]*(?=\s)|[。！？；：，、]+[{_CLOSING}]*(?=[\s\S])"
+)
+
+# punctuation that ends a sentence rather than a clause, ellipses excepted
+_SENTENCE_END = re.compile(r"[!?。！？।؟]|(?<!\.)\.(?!\.)")
+
+_COMMON_ABBREVIATIONS = {"dr", "prof", "mr", "mrs", "ms", "st", "vs"}
+
+_ABBREVIATIONS = {
+    "en": {
+        "jr", "sr", "e.g", "i.e", "inc", "ltd", "corp", "fig", "approx", "dept", "est",
+        "mt", "ave", "jan", "feb", "apr", "jun", "jul", "aug", "sep", "sept", "oct",
+        "nov", "dec", "a.m", "p.m", "u.s", "u.k",
+    },
+    "es": {
+        "sr", "sra", "srta", "dra", "ud", "uds", "pág", "p.ej", "aprox", "núm", "av",
+        "ej", "a.m", "p.m", "ee.uu",
+    },
+    "fr": {"mme", "mlle", "pr", "p.ex", "cf", "av", "bd", "env", "chap", "hab"},
+    "de": {
+        "hr", "fr", "bzw", "z.b", "d.h", "u.a", "ca", "nr", "str", "vgl", "evtl", "ggf",
+        "inkl", "bspw", "sog", "zzgl",
+    },
+    "nl": {"dhr", "mevr", "bijv", "o.a", "m.b.t", "ca", "nr", "blz", "d.w.z", "e.d"},
+}  # fmt: skip
+
+# languages that write ordinal numbers with a full stop, e.g. "am 1. Mai"
+_ORDINAL_LANGUAGES = {"de"}
+
+# languages written without spaces between words, where a character carries roughly two and a
+# half times as much speech as in English, so segment lengths are scaled down
+_CHARACTER_SCALE = {"zh": 0.4, "ja": 0.4}
+
+
+class SentenceSegmenter:
+    """
+    Splits text that arrives incrementally, e.g. the tokens streamed from an LLM, into segments
+    that can be synthesised on their own.
+
+    Segments end at sentence or clause boundaries. Full stops in abbreviations, initials,
+    decimals and URLs, and ordinal numbers in languages that use them, are not treated as
+    boundaries. The first segment is deliberately short and may end at a clause boundary such
+    as a comma, so that the first audio can be generated as soon as possible. Later segments
+    only end at sentence boundaries, and the minimum length grows with each segment, since
+    longer segments are synthesised with better prosody once playback is under way.
+
+    The segments always join back up into the original text, including whitespace.
+
+    Parameters
+    ----------
+    lang_code : str
+        The language of the text, as in `TTSConfig.lang_code`. By default `en`.
+    first_segment_chars : int
+        The minimum length of the first segment, in characters. By default 15.
+    min_chars : int
+        The minimum length of the second segment, in characters. By default 60.
+    growth : float
+        The factor by which the minimum length grows for each segment after the second. By
+        default 1.5.
+    max_chars : int
+        The maximum length of any segment. Text without a suitable sentence boundary is split at
+        the last clause boundary, or failing that the last space, before this length. By default
+        300.
+    """
+
+    def __init__(
+        self,
+        lang_code: str = "en",
+        first_segment_chars: int = 15,
+        min_chars: int = 60,
+        growth: float = 1.5,
+        max_chars: int = 300,
+    ):
+        language = lang_code.split("-")[0].lower()
+        scale = _CHARACTER_SCALE.get(language, 1.0)
+
+        self.lang_code = lang_code
+        self.first_segment_chars = max(1, int(first_segment_chars * scale))
+        self.min_chars = max(1, int(min_chars * scale))
+        self.growth = growth
+        self.max_chars = max(1, int(max_chars * scale))
+
+        self._abbreviations = _COMMON_ABBREVIATIONS | _ABBREVIATIONS.get(
+            language, set()
+        )
+        self._ordinals = language in _ORDINAL_LANGUAGES
+
+        self._buffer = ""
+        self._scan = 0  # where to resume searching the buffer for boundaries
+        self._last_clause = 0  # end of the latest clause boundary in the buffer, if any
+        self.reset()
+
+    def __len__(self) -> int:
+        """The number of characters waiting to be segmented."""
+        return len(self._buffer)
+
+    def reset(self):
+        """Drop any buffered text and start again with a short first segment."""
+        self._buffer = ""
+        self._scan = 0
+        self._last_clause = 0
+        self._n_segments = 0
+        self._target = self.first_segment_chars
+
+    def _is_boundary(self, start: int) -> bool:
+        """Returns False if the full stop at `start` belongs to the word preceding it."""
+        if self._buffer[start] != "." or self._buffer.startswith("..", start):
+            return True
+
+        word_start = start
+        while word_start > 0 and not self._buffer[word_start - 1].isspace():
+            word_start -= 1
+
+        word = self._buffer[word_start:start].lstrip(_CLOSING + "(\"'“‘«[").lower()
+
+        if len(word) == 1 and word.isalpha():
+            return False  # an initial
+
+        if self._ordinals and word.isdigit():
+            return False
+
+        return word not in self._abbreviations
+
+    def _emit(self, end: int, segments: List[str]):
+        segments.append(self._buffer[:end])
+
+        self._buffer = self._buffer[end:]
+        self._scan = max(0, self._scan - end)
+        self._last_clause = 0
+        self._n_segments += 1
+
+        self._target = (
+            self.min_chars
+            if self._n_segments == 1
+            else min(self.max_chars, int(self._target * self.growth))
+        )
+
+    def push(self, text: str) -> List[str]:
+        """
+        Add text to the segmenter.
+
+        Parameters
+        ----------
+        text : str
+            The next piece of text, of any length.
+
+        Returns
+        -------
+        List[str]
+            Every segment that is now complete, which may be none.
+        """
+        self._buffer += text
+        segments = []
+
+        while True:
+            match = _BOUNDARY.search(self._buffer, self._scan)
+
+            if match is None or match.end() > self.max_chars:
+                if len(self._buffer) <= self.max_chars:
+                    break
+
+                # the segment is too long, so split it without waiting for a sentence boundary
+                end = self._last_clause or self._buffer.rfind(" ", 1, self.max_chars)
+                self._emit(end if end > 0 else self.max_chars, segments)
+                continue
+
+            self._scan = match.end()
+
+            if not self._is_boundary(match.start()):
+                continue
+
+            is_sentence_end = _SENTENCE_END.search(match.group()) is not None
+
+            if match.end() >= self._target and (
+                is_sentence_end or self._n_segments == 0
+            ):
+                self._emit(match.end(), segments)
+            else:
+                self._last_clause = match.end()
+
+        # a boundary may be cut off at the end of the text, so search the tail again next time
+        self._scan = max(self._scan, len(self._buffer) - 8)
+
+        return segments
+
+    def flush(self) -> str:
+        """
+        Return any text that has not been segmented yet, e.g. once the text is complete. The
+        segment lengths carry on growing from where they were, call `reset` to start again.
+
+        Returns
+        -------
+        str
+            The remaining text, which may be empty.
+        """
+        text = self._buffer
+
+        self._buffer = ""
+        self._scan = 0
+        self._last_clause = 0
+
+        return text
+
+
+def segment(text: str, lang_code: str = "en", **kwargs) -> List[str]:
+    """
+    Split a complete text into segments that can be synthesised on their own.
+
+    Parameters
+    ----------
+    text : str
+        The text to split.
+    lang_code : str
+        The language of the text, by default `en`.
+    **kwargs
+        Additional keyword arguments passed to `SentenceSegmenter`.
+
+    Returns
+    -------
+    List[str]
+        The segments, which join back up into `text`.
+    """
+    segmenter = SentenceSegmenter(lang_code=lang_code, **kwargs)
+
+    segments = segmenter.push(text)
+    tail = segmenter.flush()
+
+    return segments + [tail] if tail else segments
@@ -1,11 +1,64 @@
+import asyncio
+import base64
+import httpx
+import json
 import os
+import numpy as np
 import pytest
 import tempfile
+import threading
+import time
 import wave
 from pytest_mock import MockerFixture
 import uuid
-from pyneuphonic import Neuphonic, TTSConfig
-from pyneuphonic.models import APIResponse, TTSResponse, to_dict
+from pyneuphonic import Neuphonic, TTSConfig, save_audio
+import websockets
+from pyneuphonic.models import (
+    APIResponse,
+    AgentResponse,
+    TTSResponse,
+    FlushPolicy,
+    GovernorPolicy,
+    OverflowPolicy,
+    Priority,
+    ReconnectPolicy,
+    RoutingPolicy,
+    StreamPolicy,
+    WebsocketEvents,
+    to_dict,
+)
+from pyneuphonic._events import EventDispatcher
+from pyneuphonic._governor import Governor
+from pyneuphonic._read_ahead import AsyncReadAhead
+from pyneuphonic._regions import Regions
+from pyneuphonic.agents import Agent
+from pyneuphonic._websocket import AsyncTTSWebsocketClient, TTSWebsocketClient
+from pyneuphonic.audio import (
+    AsyncAudioStream,
+    AsyncWavWriter,
+    AudioStream,
+    Limiter,
+    LoudnessNormalizer,
+    Mixer,
+    SampleAccumulator,
+    VoiceActivityDetector,
+    WavDemuxer,
+    WavWriter,
+    BargeInDetector,
+    FrameRechunker,
+    Resampler,
+    async_rechunk,
+    async_tee,
+    codecs,
+    demux,
+    iter_arrays,
+    resample,
+    tee,
+    to_float32,
+    to_int16,
+)
+from pyneuphonic.player import AsyncAudioPlayer, AsyncAudioRecorder
+from pyneuphonic.text import SentenceSegmenter, segment
 
 
 def test_tts_config():
@@ -59,6 +112,434 @@ def test_sse_sync(client: Neuphonic, mocker: MockerFixture):
     )
 
 
+def test_sse_read_ahead(client: Neuphonic, mocker: MockerFixture):
+    sse_client = client.tts.SSEClient()
+
+    mock_stream = mocker.patch("httpx.stream")
+    mock_response = mocker.Mock()
+    mock_response.iter_lines.return_value = iter(
+        ['data: {"status_code": 200, "data": {"audio": "AAAA"}}'] * 3
+    )
+    mock_stream.return_value.__enter__.return_value = mock_response
+
+    response = sse_client.send("This is a test.", read_ahead=8)
+
+    # the response is read in full before anything has been consumed
+    for _ in range(100):
+        if response.exhausted:
+            break
+        time.sleep(0.01)
+
+    assert response.buffered_messages == 3
+    assert response.buffered_bytes == 9
+    assert response.buffered_seconds == pytest.approx(9 / 48000)
+
+    assert len(list(response)) == 3
+    assert response.buffered_messages == 0
+    assert list(response) == []
+
+
+def test_sse_resume(client: Neuphonic, mocker: MockerFixture):
+    sse_client = client.tts.SSEClient()
+    requested = []
+
+    def stream(text, tts_config, timeout, priority):
+        requested.append(text)
+
+        if len(requested) == 1:
+            yield APIResponse(data=TTSResponse(audio=bytes(2), text="Hello, "))
+            raise httpx.ReadError("connection reset")
+
+        yield APIResponse(data=TTSResponse(audio=bytes(2), text=text))
+
+    mocker.patch.object(sse_client, "_stream", side_effect=stream)
+
+    messages = sse_client.send(
+        "Hello, big world.", stream_policy=StreamPolicy(max_retries=1)
+    )
+
+    # only the text that wasn't synthesised is requested again
+    assert [message.data.text for message in messages] == ["Hello, ", "big world."]
+    assert requested == ["Hello, big world.", "big world."]
+    assert sse_client.metrics.retries == 1
+
+    # the error is raised once the retries are used up
+    requested.clear()
+    messages = sse_client.send(
+        "Hello, big world.", stream_policy=StreamPolicy(max_retries=0)
+    )
+
+    with pytest.raises(httpx.ReadError):
+        list(messages)
+
+
+@pytest.mark.asyncio
+async def test_async_sse_stall(client: Neuphonic, mocker: MockerFixture):
+    sse_client = client.tts.AsyncSSEClient()
+    requested = []
+
+    async def stream(text, tts_config, timeout, priority):
+        requested.append(text)
+        yield APIResponse(data=TTSResponse(audio=bytes(2), text=text.split()[0]))
+
+        if len(requested) == 1:
+            await asyncio.sleep(10)  # stalls after the first message
+
+    mocker.patch.object(sse_client, "_stream", side_effect=stream)
+
+    policy = StreamPolicy(chunk_timeout=0.05)
+    texts = [
+        m.data.text async for m in sse_client.send("One two.", stream_policy=policy)
+    ]
+
+    assert texts == ["One", "two."]
+    assert requested == ["One two.", "two."]
+    assert sse_client.metrics.time_lost >= 0.05
+
+
+def test_sse_coalesce(client: Neuphonic, mocker: MockerFixture):
+    sse_clients = [client.tts.SSEClient(), client.tts.SSEClient()]
+    released = threading.Event()
+    requested = []
+
+    def stream(text, tts_config, timeout, priority):
+        requested.append(text)
+        yield APIResponse(data=TTSResponse(audio=bytes(2), text="Hello,"))
+        released.wait()
+        yield APIResponse(data=TTSResponse(audio=bytes(2), text="world."))
+
+    for sse_client in sse_clients:
+        mocker.patch.object(sse_client, "_stream", side_effect=stream)
+
+    first = sse_clients[0].send("Hello, world.", coalesce=True)
+    assert next(first).data.text == "Hello,"
+
+    # joins the request in flight, and is sent the messages already received too
+    second = sse_clients[1].send("Hello, world.", coalesce=True)
+    released.set()
+
+    first, second = list(first), list(second)
+    assert [message.data.text for message in second] == ["Hello,", "world."]
+    assert first[0] is second[1]
+    assert requested == ["Hello, world."]
+    assert sse_clients[1].metrics.coalesced == 1
+
+    # once the request has finished, the next is made afresh
+    list(sse_clients[1].send("Hello, world.", coalesce=True))
+    assert len(requested) == 2
+
+    # once every caller has stopped listening, the request is abandoned
+    closed = threading.Event()
+
+    def endless_stream(text, tts_config, timeout, priority):
+        requested.append(text)
+
+        try:
+            while True:
+                yield APIResponse(data=TTSResponse(audio=bytes(2), text="Hello,"))
+                time.sleep(0.001)
+        finally:
+            closed.set()
+
+    mocker.patch.object(sse_clients[0], "_stream", side_effect=endless_stream)
+    responses = [sse_clients[0].send("Hello, world.", coalesce=True) for _ in range(2)]
+
+    for response in responses:
+        next(response)
+        response.close()
+
+    assert closed.wait(timeout=1)
+    list(sse_clients[1].send("Hello, world.", coalesce=True))
+    assert len(requested) == 4
+
+
+@pytest.mark.asyncio
+async def test_async_sse_coalesce(client: Neuphonic, mocker: MockerFixture):
+    sse_client = client.tts.AsyncSSEClient()
+    requested = []
+
+    async def stream(text, tts_config, timeout, priority):
+        requested.append(text)
+
+        for word in text.split():
+            await asyncio.sleep(0.01)
+            yield APIResponse(data=TTSResponse(audio=bytes(2), text=word))
+
+    mocker.patch.object(sse_client, "_stream", side_effect=stream)
+
+    async def texts():
+        response = sse_client.send("One two three.", coalesce=True)
+        return [message.data.text async for message in response]
+
+    results = await asyncio.gather(*[texts() for _ in range(3)])
+
+    assert results == [["One", "two", "three."]] * 3
+    assert requested == ["One two three."]
+    assert sse_client.metrics.coalesced == 2
+
+    # once every caller has stopped listening, the request is cancelled
+    cancelled = asyncio.Event()
+
+    async def endless_stream(text, tts_config, timeout, priority):
+        try:
+            while True:
+                await asyncio.sleep(0.001)
+                yield APIResponse(data=TTSResponse(audio=bytes(2), text="One"))
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+
+    mocker.patch.object(sse_client, "_stream", side_effect=endless_stream)
+    responses = [sse_client.send("One two three.", coalesce=True) for _ in range(2)]
+
+    for response in responses:
+        await anext(response)
+        await response.aclose()
+
+    await asyncio.wait_for(cancelled.wait(), timeout=1)
+
+    # if the request itself is cancelled, its callers are told rather than left waiting
+    response = sse_client.send("One two three.", coalesce=True)
+    await anext(response)
+    (flight,) = sse_client._flights._flights.values()
+    flight._task.cancel()
+
+    with pytest.raises(ConnectionError):
+        async for _ in response:
+            pass
+
+
+@pytest.mark.asyncio
+async def test_regions_hedge():
+    regions = Regions(["slow", "fast"], RoutingPolicy(hedge=True, hedge_delay=0.05))
+    cancelled = []
+
+    async def attempt(base_url):
+        try:
+            await asyncio.sleep(1 if base_url == "slow" else 0.01)
+        except asyncio.CancelledError:
+            cancelled.append(base_url)
+            raise
+
+        return base_url
+
+    async def discard(result):
+        pass
+
+    # the first region is tried first, then hedged once it takes longer than the delay
+    assert await regions.async_race("sse", attempt, discard) == ("fast", "fast")
+    assert cancelled == ["slow"]
+
+    # both regions have been measured, so the faster one is now tried first
+    assert regions.ranked("sse") == ["fast", "slow"]
+    stats = {stat.base_url: stat for stat in regions.stats("sse")}
+    assert stats["slow"].median_latency > stats["fast"].median_latency
+
+
+def test_regions_failover():
+    regions = Regions(["down", "up"], RoutingPolicy(cooldown=60))
+
+    def attempt(base_url):
+        if base_url == "down":
+            raise ConnectionError("refused")
+
+        return base_url
+
+    assert regions.race("websocket", attempt, lambda result: None) == ("up", "up")
+    # the failed region is avoided until its cooldown ends
+    assert regions.ranked("websocket") == ["up", "down"]
+    assert not regions.stats("websocket")[0].healthy
+
+    regions = Regions(["down"])
+    with pytest.raises(ConnectionError):
+        regions.race("websocket", attempt, lambda result: None)
+
+
+def test_regions_exclude_queueing(mocker: MockerFixture):
+    client = Neuphonic(
+        api_key="key",
+        base_url=["eu.example.com", "us.example.com"],
+        governor_policy=GovernorPolicy(initial_limit=1),
+    )
+    governor = client.governor
+    sse_client = client.tts.SSEClient()
+
+    mock_stream = mocker.patch("httpx.stream")
+    mock_response = mocker.Mock()
+    mock_response.iter_lines.return_value = iter(
+        ['data: {"status_code": 200, "data": {"audio": "AAAA"}}']
+    )
+    mock_stream.return_value.__enter__.return_value = mock_response
+
+    with governor.slot("sse"):
+        thread = threading.Thread(target=lambda: list(sse_client.send("Hello.")))
+        thread.start()
+        while governor.metrics.queued < 1:
+            time.sleep(0.001)
+
+        time.sleep(0.1)
+
+    thread.join(timeout=1)
+
+    # the request is admitted before the regions are raced, so its wait isn't their latency
+    stats = [stat for stat in client.regions.stats("sse") if stat.samples]
+    assert len(stats) == 1
+    assert stats[0].median_latency < 0.05
+
+
+def test_governor_queue():
+    governor = Governor(GovernorPolicy(initial_limit=1))
+    admitted = []
+
+    def request(i):
+        with governor.slot("sse"):
+            admitted.append(i)
+
+    with governor.slot("sse"):
+        threads = []
+
+        for i in range(3):
+            threads.append(threading.Thread(target=request, args=(i,)))
+            threads[-1].start()
+            # wait for each request to queue, so that the order is known
+            while governor.metrics.queued < i + 1:
+                time.sleep(0.001)
+
+        assert admitted == []
+        assert governor.metrics.in_flight == 1
+
+    for thread in threads:
+        thread.join(timeout=1)
+
+    # queued requests are admitted in the order they were made
+    assert admitted == [0, 1, 2]
+    assert governor.metrics.max_queued == 3
+
+
+def test_governor_priorities():
+    def queue_requests(governor, priorities):
+        """Queue a request of each priority in turn, while the limit is taken."""
+        admitted, threads = [], []
+
+        def request(priority):
+            with governor.slot("sse", priority):
+                admitted.append(priority)
+
+        with governor.slot("sse"):
+            for i, priority in enumerate(priorities):
+                threads.append(threading.Thread(target=request, args=(priority,)))
+                threads[-1].start()
+                while governor.metrics.queued < i + 1:
+                    time.sleep(0.001)
+
+            time.sleep(0.01)
+
+        for thread in threads:
+            thread.join(timeout=1)
+
+        return admitted
+
+    # more urgent requests go first, whatever the order they were made in
+    governor = Governor(GovernorPolicy(initial_limit=1))
+    priorities = [Priority.BULK, Priority.NORMAL, Priority.INTERACTIVE]
+    assert queue_requests(governor, priorities) == priorities[::-1]
+
+    # requests that have waited long enough are promoted, so they aren't starved
+    governor = Governor(GovernorPolicy(initial_limit=1, promote_after=0.001))
+    assert queue_requests(governor, priorities) == priorities
+
+    # bulk requests leave room for the others
+    governor = Governor(GovernorPolicy(initial_limit=2, reserved=1, max_wait=0.05))
+
+    with governor.slot("sse", Priority.BULK):
+        with governor.slot("sse", Priority.INTERACTIVE):
+            assert governor.metrics.in_flight == 2
+
+        with pytest.raises(TimeoutError):
+            with governor.slot("sse", Priority.BULK):
+                pass
+
+    # a promoted bulk request that doesn't fit doesn't hold up the reserved room
+    governor = Governor(
+        GovernorPolicy(initial_limit=2, reserved=1, promote_after=0.001, max_wait=1)
+    )
+    admitted = []
+
+    def bulk_request():
+        with governor.slot("sse", Priority.BULK):
+            admitted.append(Priority.BULK)
+
+    with governor.slot("sse", Priority.BULK):
+        thread = threading.Thread(target=bulk_request)
+        thread.start()
+        while governor.metrics.queued < 1:
+            time.sleep(0.001)
+        time.sleep(0.01)
+
+        with governor.slot("sse", Priority.INTERACTIVE):
+            assert governor.metrics.in_flight == 2
+            assert governor.metrics.queue_wait < 0.5
+
+    thread.join(timeout=1)
+    assert admitted == [Priority.BULK]
+
+
+def test_governor_adapts():
+    governor = Governor(GovernorPolicy(initial_limit=8, backoff=0.5))
+
+    # prompt responses grow the limit by about one per `limit` responses
+    for _ in range(9):
+        governor._observe("sse", 0.1)
+    assert governor.metrics.limit == 9
+
+    # a response much slower than the fastest recent one halves it
+    governor._observe("sse", 1.0)
+    assert governor.metrics.limit == 4
+
+    # latencies of other kinds of request aren't compared
+    governor._observe("websocket", 1.0)
+    assert governor.metrics.limit == 4
+
+    governor._reduced_at = 0
+    governor.slot("sse").throttled()
+    assert governor.metrics.limit == 2
+    assert governor.metrics.throttled == 1
+
+
+@pytest.mark.asyncio
+async def test_governor_rate_limit():
+    governor = Governor(GovernorPolicy(rate=50, burst=1, max_wait=1))
+    started = time.monotonic()
+
+    async def request():
+        async with governor.slot("sse"):
+            pass
+
+    await asyncio.gather(*(request() for _ in range(4)))
+
+    # the first request uses the burst, the rest wait for a token each
+    assert time.monotonic() - started >= 0.05
+    assert governor.metrics.queued == 0
+
+
+@pytest.mark.asyncio
+async def test_async_read_ahead():
+    async def source():
+        for i in range(4):
+            yield APIResponse(data=TTSResponse(audio=bytes(2), text=str(i)))
+
+    response = AsyncReadAhead(source(), max_messages=2, bytes_per_second=4)
+    await asyncio.sleep(0.01)
+
+    # reading stops once the buffer is full
+    assert response.buffered_messages == 2
+    assert response.buffered_seconds == 1.0
+    assert not response.exhausted
+
+    assert [message.data.text async for message in response] == ["0", "1", "2", "3"]
+    assert response.exhausted
+
+
 @pytest.mark.asyncio
 async def test_websocket_async(client: Neuphonic, mocker: MockerFixture):
     ws = client.tts.AsyncWebsocketClient()
@@ -345,3 +826,1075 @@ def test_list_single_agent(client: Neuphonic, mocker: MockerFixture):
         headers={"x-api-key": client._api_key},
         timeout=mocker.ANY,
     )
+
+
+def _tone(duration_s: float, sampling_rate: int = 16000, amplitude: float = 0.3):
+    t = np.arange(int(duration_s * sampling_rate)) / sampling_rate
+    return (amplitude * 32767 * np.sin(2 * np.pi * 220 * t)).astype(np.int16).tobytes()
+
+
+def _silence(duration_s: float, sampling_rate: int = 16000):
+    return bytes(2 * int(duration_s * sampling_rate))
+
+
+def test_vad_gates_silence():
+    vad = VoiceActivityDetector(sampling_rate=16000, hangover_ms=100, pre_roll_ms=40)
+
+    assert vad.process(_silence(0.5)) == b""
+    assert not vad.is_speech
+
+    speech = vad.process(_tone(0.2))
+    assert vad.is_speech
+    # the tone plus 40ms of pre-roll
+    assert len(speech) == len(_tone(0.2)) + 2 * 640
+
+    # 100ms of hangover is forwarded, the rest of the silence is dropped
+    tail = vad.process(_silence(0.5))
+    assert len(tail) == 2 * 1600
+    assert not vad.is_speech
+
+
+@pytest.mark.asyncio
+async def test_recorder_uplink_batching(mocker: MockerFixture):
+    ws = mocker.Mock()
+    ws.send = mocker.AsyncMock()
+
+    recorder = AsyncAudioRecorder(
+        sampling_rate=16000,
+        websocket=ws,
+        vad=VoiceActivityDetector(sampling_rate=16000, hangover_ms=0, pre_roll_ms=0),
+        send_window_ms=100,
+    )
+
+    for chunk in [_silence(0.064)] * 5 + [_tone(0.064)] * 5 + [_silence(0.064)] * 2:
+        recorder._queue.put_nowait(chunk)
+
+    send_task = asyncio.create_task(recorder._send())
+    await asyncio.sleep(0.05)
+    send_task.cancel()
+
+    sent = [base64.b64decode(call.args[0]["audio"]) for call in ws.send.call_args_list]
+
+    # 320ms of speech is sent in windows of at least 100ms, and no silence is sent
+    assert len(sent) == 3
+    assert sum(len(audio) for audio in sent) == len(_tone(0.32))
+
+
+@pytest.mark.asyncio
+async def test_recorder_barge_in(mocker: MockerFixture):
+    player = AsyncAudioPlayer()
+    player._playback_end = time.perf_counter() + 10  # simulate audio playing
+
+    ws = mocker.Mock()
+    ws.send = mocker.AsyncMock()
+
+    recorder = AsyncAudioRecorder(
+        sampling_rate=16000,
+        websocket=ws,
+        player=player,
+        barge_in=BargeInDetector(sampling_rate=16000, min_speech_ms=40),
+    )
+
+    await recorder._detect_barge_in(_silence(0.1))
+    assert player.is_playing and not player.is_interrupted
+
+    await recorder._detect_barge_in(_tone(0.04))
+    assert not player.is_playing and player.is_interrupted
+
+    # audio received while paused is kept until the server confirms the interruption
+    await player.play(b"\x00\x01" * 100)
+    assert player.playback_queue.qsize() == 1
+
+    await player.confirm_interruption()
+    assert not player.is_interrupted
+    assert player.playback_queue.empty()
+
+    with pytest.raises(ValueError):
+        AsyncAudioRecorder(sampling_rate=8000, barge_in=BargeInDetector())
+
+
+@pytest.mark.asyncio
+async def test_barge_in_false_positive():
+    player = AsyncAudioPlayer(interruption_timeout=0.05)
+    player._playback_end = time.perf_counter() + 10
+
+    await player.barge_in()
+    await player.play(b"\x00\x01" * 100)
+    assert player.check_interruption()
+
+    # the server never confirms, so playback resumes without losing any audio
+    await asyncio.wait_for(player._wait_until_resumed(), timeout=1)
+    assert not player.is_interrupted
+    assert player.playback_queue.qsize() == 1
+
+
+def test_codecs():
+    samples = np.array([0, 1000, -1000, 32767, -32768], dtype=np.int16)
+
+    mulaw = codecs.encode(samples, "pcm_mulaw")
+    alaw = codecs.encode(samples, "pcm_alaw")
+    assert mulaw[0] == 0xFF and alaw[0] == 0xD5
+
+    # companding is lossy, but should round trip to within a few percent
+    for encoded, encoding in [(mulaw, "pcm_mulaw"), (alaw, "pcm_alaw")]:
+        decoded = codecs.decode(memoryview(encoded.tobytes()), encoding)
+        error = np.abs(decoded.astype(int) - samples.astype(int))
+        assert np.all(error <= np.abs(samples.astype(int)) * 0.05 + 8)
+
+    # linear decoding is a view, not a copy
+    buffer = bytearray(samples.tobytes())
+    view = codecs.decode(memoryview(buffer), "pcm_linear")
+    buffer[0] = 1
+    assert view[0] == 1
+
+    with pytest.raises(ValueError):
+        codecs.sample_width("mp3")
+
+
+def test_streaming_transcoder():
+    samples = np.arange(-20000, 20000, 7, dtype=np.int16).tobytes()
+    transcoder = codecs.StreamingTranscoder("pcm_linear", "pcm_mulaw")
+
+    # chunks that split samples in half are reassembled correctly
+    streamed = b"".join(
+        transcoder.convert(samples[i : i + 333]) for i in range(0, len(samples), 333)
+    )
+
+    assert streamed == codecs.transcode(samples, "pcm_linear", "pcm_mulaw")
+
+
+def test_save_audio_mulaw():
+    with tempfile.TemporaryDirectory() as directory:
+        file_path = os.path.join(directory, "output.wav")
+
+        save_audio(b"\xff" * 800, file_path, sampling_rate=8000, encoding="pcm_mulaw")
+
+        with wave.open(file_path, "rb") as wav_file:
+            assert wav_file.getsampwidth() == 2
+            assert wav_file.getnframes() == 800
+
+
+@pytest.mark.parametrize(
+    "input_rate,output_rate",
+    [(8000, 16000), (24000, 16000), (22050, 48000), (16000, 8000), (48000, 8000)],
+)
+def test_resampler(input_rate: int, output_rate: int):
+    t = np.arange(input_rate) / input_rate
+    audio = (10000 * np.sin(2 * np.pi * 440 * t)).astype(np.int16).tobytes()
+
+    resampled = np.frombuffer(resample(audio, input_rate, output_rate), np.int16)
+    assert len(resampled) == output_rate
+
+    # the resampled signal is the same tone at the new rate
+    expected = 10000 * np.sin(2 * np.pi * 440 * np.arange(output_rate) / output_rate)
+    assert np.max(np.abs(resampled[50:-50] - expected[50:-50])) < 50
+
+    # chunk boundaries, including ones that split a sample, don't change the output
+    resampler = Resampler(input_rate, output_rate)
+    streamed = b"".join(
+        resampler.process(audio[i : i + 333]) for i in range(0, len(audio), 333)
+    )
+    assert streamed + resampler.flush() == resampled.tobytes()
+
+    if output_rate < input_rate:
+        # a tone just above the output's Nyquist frequency is filtered out, not aliased
+        tone = 10000 * np.sin(2 * np.pi * 0.5625 * output_rate * t)
+        aliased = resample(tone.astype(np.int16).tobytes(), input_rate, output_rate)
+        aliased = np.frombuffer(aliased, np.int16)[200:-200].astype(np.float64)
+        assert np.sqrt(np.mean(aliased**2)) < 10000 * 10 ** (-60 / 20)
+
+
+def test_save_audio_resampled():
+    with tempfile.TemporaryDirectory() as directory:
+        file_path = os.path.join(directory, "output.wav")
+
+        save_audio(bytes(48000), file_path, output_sampling_rate=8000)
+
+        with wave.open(file_path, "rb") as wav_file:
+            assert wav_file.getframerate() == 8000
+            assert wav_file.getnframes() == 8000
+
+
+def test_frame_rechunker():
+    rechunker = FrameRechunker(frame_ms=20, sampling_rate=8000, encoding="pcm_mulaw")
+    assert rechunker.frame_bytes == 160
+
+    audio = bytes(range(256)) * 4  # 1024 bytes of μ-law audio
+    chunks = [audio[:10], audio[10:500], audio[500:501], audio[501:]]
+
+    frames = [bytes(frame) for chunk in chunks for frame in rechunker.push(chunk)]
+    assert len(frames) == 6
+    assert b"".join(frames) == audio[:960]
+
+    # the tail is padded with μ-law silence
+    tail = bytes(rechunker.flush())
+    assert tail == audio[960:] + b"\xff" * 96
+    assert rechunker.flush() is None
+
+    # a trailing partial sample of linear PCM is replaced by silence
+    rechunker = FrameRechunker(frame_ms=20, sampling_rate=8000)
+    list(rechunker.push(b"\x01\x02\x03"))
+    assert bytes(rechunker.flush()) == b"\x01\x02" + bytes(318)
+
+
+@pytest.mark.asyncio
+async def test_async_rechunk():
+    async def stream():
+        for audio in [b"\x01" * 500, None, b"\x02" * 500]:
+            yield APIResponse[TTSResponse](data=TTSResponse(audio=audio))
+
+    frames = [
+        frame
+        async for frame in async_rechunk(
+            stream(), frame_ms=20, sampling_rate=16000, copy=True
+        )
+    ]
+
+    assert [len(frame) for frame in frames] == [640, 640]
+    assert frames[1][-280:] == b"\x00" * 280
+
+
+def test_tee():
+    chunks = [bytes([i]) * 4 for i in range(10)]
+    read = []
+
+    def stream():
+        for chunk in chunks:
+            read.append(chunk)
+            yield chunk
+
+    fast, slow = tee(stream(), max_chunks=3)
+    received = []
+    thread = threading.Thread(target=lambda: received.extend(fast))
+    thread.start()
+
+    # the fast branch can't get more than 3 chunks ahead of the slow one
+    time.sleep(0.05)
+    assert len(read) == 3
+
+    assert list(slow) == chunks
+    thread.join()
+
+    # each chunk was read once, and both branches yield the same objects
+    assert all(a is b for a, b in zip(received, chunks))
+    assert len(read) == 10
+
+    # a lagging branch skips the oldest chunks instead of holding the others up
+    fast, slow = tee(
+        iter(chunks), max_chunks=3, overflow_policy=OverflowPolicy.DROP_OLDEST
+    )
+    assert list(fast) == chunks
+    assert list(slow) == chunks[-3:]
+    assert slow.dropped == 7
+
+    with pytest.raises(ValueError):
+        tee(iter(chunks), overflow_policy=OverflowPolicy.DROP_NEWEST)
+
+
+@pytest.mark.asyncio
+async def test_async_tee():
+    async def stream():
+        for audio in [b"\x01" * 4, b"\x02" * 4]:
+            yield APIResponse[TTSResponse](data=TTSResponse(audio=audio))
+
+        raise httpx.ReadError("connection reset")
+
+    async def consume(branch):
+        audio = []
+
+        with pytest.raises(httpx.ReadError):
+            async for message in branch:
+                audio.append(message.data.audio)
+                await asyncio.sleep(0.01)
+
+        return audio
+
+    branches = async_tee(stream(), n=3)
+    results = await asyncio.gather(*[consume(branch) for branch in branches])
+
+    # every branch receives every chunk, and then the error
+    assert results == [[b"\x01" * 4, b"\x02" * 4]] * 3
+
+    # closing a branch stops it, without holding up the others
+    first, second = async_tee(stream(), max_chunks=1)
+    await first.aclose()
+    assert [m async for m in first] == []
+    assert len(await consume(second)) == 2
+
+
+def test_audio_stream():
+    closed = []
+
+    def response():
+        try:
+            for _ in range(10):
+                samples = (np.arange(1600) % 200 - 100) * 100
+                yield APIResponse(
+                    data=TTSResponse(audio=samples.astype(np.int16).tobytes())
+                )
+                yield APIResponse(data=TTSResponse(audio=None, text="no audio"))
+        finally:
+            closed.append(True)
+
+    tts_config = TTSConfig(sampling_rate=16000)
+    stream = AudioStream.from_response(response(), tts_config)
+
+    # nothing is read until the pipeline is iterated over
+    telephony = stream.resample(8000).transcode("pcm_mulaw").rechunk(frame_ms=20)
+    telephony = telephony.take(0.2)
+    assert (telephony.sampling_rate, telephony.encoding) == (8000, "pcm_mulaw")
+
+    frames = [bytes(frame) for frame in telephony]
+    assert [len(frame) for frame in frames] == [160] * 10
+
+    # taking 0.2s of the 1s response stops reading it
+    assert closed == [True]
+
+    with tempfile.TemporaryDirectory() as directory:
+        file_path = os.path.join(directory, "output.wav")
+        save_audio(AudioStream([b"".join(frames)], 8000, "pcm_mulaw"), file_path)
+
+        stream = AudioStream.from_file(file_path, chunk_ms=50)
+        assert stream.sampling_rate == 8000
+        assert [len(chunk) for chunk in stream] == [800] * 4
+
+    with pytest.raises(ValueError):
+        AudioStream.from_response(response(), TTSConfig(output_format="mp3"))
+
+
+@pytest.mark.asyncio
+async def test_async_audio_stream():
+    async def response():
+        yield APIResponse(data=TTSResponse(audio=bytes(480)))
+        await asyncio.sleep(10)
+
+    stream = AsyncAudioStream.from_response(response()).timeout(0.05)
+
+    with pytest.raises(TimeoutError):
+        async for chunk in stream.rechunk(frame_ms=10, pad=False):
+            assert len(chunk) == 480
+
+    # a synchronous stream, read without blocking the event loop
+    stream = AsyncAudioStream.from_sync(AudioStream([bytes(4), bytes(4)], 8000))
+    assert await stream.map(lambda chunk: chunk[:2]).read() == bytes(4)
+
+
+def test_numpy_audio():
+    audio = np.array([0, 16384, -32768, 32767], dtype=np.int16).tobytes()
+    message = APIResponse(data=TTSResponse(audio=audio))
+
+    # int16 samples are a view onto the audio, rather than a copy
+    samples = to_int16(message)
+    assert np.shares_memory(samples, np.frombuffer(audio, dtype=np.uint8))
+    assert samples.tolist() == [0, 16384, -32768, 32767]
+    assert to_float32(audio).tolist() == [0.0, 0.5, -1.0, 32767 / 32768]
+
+    # a sample split across two chunks is yielded with the second
+    chunks = [audio[:3], None, audio[3:]]
+    arrays = list(iter_arrays(APIResponse(data=TTSResponse(audio=c)) for c in chunks))
+    assert [a.tolist() for a in arrays] == [[0], [16384, -32768, 32767]]
+
+
+def test_sample_accumulator():
+    accumulator = SampleAccumulator(capacity=4)
+    chunk = np.arange(3, dtype=np.int16)
+
+    for _ in range(10):
+        accumulator.append(chunk.tobytes())
+
+    accumulator.append(np.array([7.0]))
+
+    assert len(accumulator) == 31
+    assert accumulator.capacity == 32  # doubled from 4, rather than grown per chunk
+    assert accumulator.samples.tolist() == [0, 1, 2] * 10 + [7]
+
+    # the buffer is kept for the next utterance
+    accumulator.clear()
+    assert (len(accumulator), accumulator.capacity) == (0, 32)
+
+    mulaw = codecs.encode(np.array([0, 1000, -1000], dtype=np.int16), "pcm_mulaw")
+    accumulator = SampleAccumulator(encoding="pcm_mulaw")
+    accumulator.extend([mulaw.tobytes(), mulaw.tobytes()])
+    assert (
+        accumulator.samples.tolist() == codecs.decode(mulaw, "pcm_mulaw").tolist() * 2
+    )
+
+
+def _process_in_chunks(effect, samples, chunk_size=333):
+    chunks = [samples[i : i + chunk_size] for i in range(0, len(samples), chunk_size)]
+
+    return np.concatenate([effect.process(c) for c in chunks] + [effect.flush()])
+
+
+def _rms_db(samples):
+    return 20 * np.log10(np.sqrt(np.mean(samples.astype(np.float64) ** 2)) / 32768)
+
+
+def test_audio_effects():
+    t = np.arange(16000) / 16000
+    sine = np.sin(2 * np.pi * 220 * t)
+
+    # voices at different levels are brought to the same loudness
+    for amplitude in [2000, 16000]:
+        samples = (sine * amplitude).astype(np.int16)
+        output = _process_in_chunks(LoudnessNormalizer(16000, target_db=-20), samples)
+
+        assert len(output) == len(samples)
+        assert _rms_db(output[4000:]) == pytest.approx(-20, abs=0.5)
+
+    # peaks are kept below the ceiling, and the result doesn't depend on the chunk size
+    samples = (sine * 32767).astype(np.int16)
+    output = _process_in_chunks(Limiter(16000, ceiling_db=-6), samples)
+
+    assert np.abs(output).max() <= 32768 * 10 ** (-6 / 20)
+    assert np.array_equal(
+        output, _process_in_chunks(Limiter(16000, ceiling_db=-6), samples, 1000)
+    )
+
+
+def test_audio_stream_trim_silence():
+    speech = np.where(np.sin(np.arange(800)) >= 0, 8000, -8000).astype(np.int16)
+    chunks = [bytes(1600), bytes(1000) + speech.tobytes(), bytes(400), bytes(3000)]
+
+    stream = AudioStream(chunks, sampling_rate=8000).trim_silence(padding_ms=10)
+    output = np.frombuffer(stream.read(), dtype=np.int16)
+
+    # 10ms of silence is left either side of the speech
+    assert len(output) == 80 + 800 + 80
+    assert np.array_equal(output[80:880], speech)
+    assert not output[:80].any() and not output[880:].any()
+
+
+def _block_ends(mixer, n_blocks):
+    # the gains ramp across each block, reaching their new values on its last sample
+    return [int(np.frombuffer(mixer.mix(), np.int16)[-1]) for _ in range(n_blocks)]
+
+
+def test_mixer():
+    mixer = Mixer(
+        sampling_rate=8000, block_ms=10, duck_db=-6, attack_ms=20, release_ms=20
+    )
+    music = mixer.add(gain=0.5)
+    speech = mixer.add(ducks=True)
+
+    music.write(np.full(8000, 10000, dtype=np.int16))
+    block = mixer.mix()
+
+    # streams are mixed at their own gains, into the same buffer for every block
+    assert np.frombuffer(block, np.int16).tolist() == [5000] * 80
+    assert mixer.mix().obj is block.obj
+
+    # the music is ducked while the speech plays, and recovers once it has finished
+    speech.feed([np.full(160, 1000, dtype=np.int16)])
+    assert _block_ends(mixer, 4) == [1000 + 3753, 1000 + 2506, 3753, 5000]
+
+    # a crossfade moves the gain from one stream to the other
+    voice = mixer.add(gain=0.0)
+    voice.feed([np.full(800, 2000, dtype=np.int16)])
+    mixer.crossfade(music, voice, ramp_ms=20)
+    assert _block_ends(mixer, 2) == [2500 + 500, 1000]
+    assert speech not in mixer.inputs
+
+
+def test_wav_writer():
+    with tempfile.TemporaryDirectory() as directory:
+        file_path = os.path.join(directory, "call.wav")
+        wav_file = WavWriter(
+            file_path, sampling_rate=8000, buffer_size=1600, header_interval_ms=200
+        )
+
+        # the header is valid from the start, and patched as each buffer is written
+        for _ in range(5):
+            wav_file.write(b"\x01\x00" * 400)
+
+        with wave.open(file_path, "rb") as partial:
+            assert partial.getnframes() == 1600
+
+        wav_file.close()
+
+        with wave.open(file_path, "rb") as complete:
+            assert complete.getnframes() == 2000
+            assert complete.readframes(1) == b"\x01\x00"
+
+        # mu-law is written as it is, with its own format tag and sample count
+        with WavWriter(file_path, sampling_rate=8000, encoding="pcm_mulaw") as mulaw:
+            mulaw.write(b"\xff" * 801)
+
+        with open(file_path, "rb") as f:
+            data = f.read()
+
+        assert len(data) == 58 + 802  # the audio is padded to an even length
+        assert int.from_bytes(data[20:22], "little") == 7
+        assert int.from_bytes(data[34:36], "little") == 8
+        assert int.from_bytes(data[46:50], "little") == 801
+        assert data[50:54] == b"data" and int.from_bytes(data[54:58], "little") == 801
+
+
+@pytest.mark.asyncio
+async def test_async_wav_writer():
+    with tempfile.TemporaryDirectory() as directory:
+        file_path = os.path.join(directory, "call.wav")
+
+        async with AsyncWavWriter(file_path, 8000, buffer_size=1000) as wav_file:
+            for i in range(10):
+                await wav_file.write(np.full(160, i, dtype=np.int16))
+
+            await wav_file.flush()
+
+            with wave.open(file_path, "rb") as partial:
+                assert partial.getnframes() == 1600
+
+            await wav_file.write(bytes(320))
+
+        with wave.open(file_path, "rb") as complete:
+            assert complete.getnframes() == 1760
+            samples = np.frombuffer(complete.readframes(1760), np.int16)
+            assert samples[::160].tolist() == list(range(10)) + [0]
+
+        # errors opening the file are raised by the writer
+        with pytest.raises(OSError):
+            async with AsyncWavWriter(os.path.join(directory, "missing", "a.wav")) as w:
+                await w.write(bytes(320))
+
+        # without a running loop the writer fails before the file is opened
+        file_path = os.path.join(directory, "no_loop.wav")
+        with pytest.raises(RuntimeError):
+            await asyncio.to_thread(AsyncWavWriter, file_path)
+        assert not os.path.exists(file_path)
+
+
+def _wav_bytes(samples: bytes, sampling_rate: int = 8000, **kwargs) -> bytes:
+    with tempfile.TemporaryDirectory() as directory:
+        file_path = os.path.join(directory, "audio.wav")
+
+        with WavWriter(file_path, sampling_rate, **kwargs) as wav_file:
+            wav_file.write(samples)
+
+        with open(file_path, "rb") as f:
+            return f.read()
+
+
+def test_wav_demuxer():
+    audio = np.arange(100, dtype=np.int16).tobytes()
+    wav = _wav_bytes(audio)
+    # a metadata chunk before the audio is skipped
+    wav = wav[:36] + b"LIST" + (3).to_bytes(4, "little") + b"abc\x00" + wav[36:]
+    wav = wav[:4] + (len(wav) - 8).to_bytes(4, "little") + wav[8:]
+
+    # the header is read a byte at a time, and the format is known before any audio
+    demuxer = WavDemuxer()
+    chunks = [demuxer.push(wav[i : i + 1]) for i in range(len(wav))]
+    first = next(i for i, chunk in enumerate(chunks) if len(chunk))
+    assert demuxer.format.sampling_rate == 8000 and demuxer.format.n_samples == 100
+    assert first == len(wav) - len(audio)
+    assert b"".join(bytes(chunk) for chunk in chunks) == audio
+
+    # files sent one after another, e.g. one per message, are read in turn
+    mulaw = _wav_bytes(b"\xff" * 7, encoding="pcm_mulaw")
+    assert b"".join(demux([mulaw, mulaw[:30], mulaw[30:]])) == b"\xff" * 14
+
+    with pytest.raises(ValueError):
+        list(demux([mulaw[:30]]))  # ends part way through the header
+
+    with pytest.raises(ValueError):
+        list(demux([mulaw, _wav_bytes(b"\xff" * 8, 16000, encoding="pcm_mulaw")]))
+
+
+def test_audio_stream_output_format():
+    audio = np.arange(800, dtype=np.int16).tobytes()
+    wav = _wav_bytes(audio, 16000)
+    messages = [
+        APIResponse(data=TTSResponse(audio=wav[i : i + 333]))
+        for i in range(0, len(wav), 333)
+    ]
+
+    tts_config = TTSConfig(sampling_rate=16000, output_format="wav")
+    assert AudioStream.from_response(iter(messages), tts_config).read() == audio
+
+    with pytest.raises(ValueError):  # the header doesn't match the config
+        AudioStream.from_response(iter(messages), TTSConfig(output_format="wav")).read()
+
+    with tempfile.TemporaryDirectory() as directory:
+        file_path = os.path.join(directory, "output.wav")
+        save_audio(iter(messages), file_path, 16000, output_format="wav")
+
+        with wave.open(file_path, "rb") as wav_file:
+            assert wav_file.readframes(1000) == audio
+
+
+class FakeWebsocket:
+    """Stands in for a websocket connection, yielding a fixed list of messages."""
+
+    def __init__(self, messages):
+        self.messages = messages
+        self.sent = []
+
+    async def __aiter__(self):
+        for message in self.messages:
+            yield message
+
+    async def send(self, message):
+        self.sent.append(message)
+
+    async def close(self):
+        pass
+
+
+def _tts_message(text: str) -> str:
+    return json.dumps({"data": {"text": text, "audio": ""}})
+
+
+@pytest.mark.asyncio
+async def test_websocket_slow_handler(client: Neuphonic, mocker: MockerFixture):
+    messages = [_tts_message(str(i)) for i in range(20)]
+    mocker.patch(
+        "websockets.connect",
+        new_callable=mocker.AsyncMock,
+        return_value=FakeWebsocket(messages),
+    )
+
+    ws = client.tts.AsyncWebsocketClient()
+    handled = []
+    closed = asyncio.Event()
+
+    async def on_message(message: APIResponse[TTSResponse]):
+        await asyncio.sleep(0.005)
+        handled.append(message.data.text)
+
+    async def on_close():
+        closed.set()
+
+    ws.on(WebsocketEvents.MESSAGE, on_message)
+    ws.on(WebsocketEvents.CLOSE, on_close)
+    await ws.open()
+
+    # the socket is read in full without waiting for the handler
+    await asyncio.sleep(0)
+    assert ws.metrics.messages_received == 20
+    assert ws.metrics.queue_depth > 0
+
+    await asyncio.wait_for(closed.wait(), timeout=1)
+    assert handled == [str(i) for i in range(20)]
+    assert ws.metrics.max_handler_lag > 0
+
+
+@pytest.mark.asyncio
+async def test_websocket_overflow_policy(mocker: MockerFixture):
+    messages = [_tts_message(str(i)) for i in range(10)]
+    mocker.patch(
+        "websockets.connect",
+        new_callable=mocker.AsyncMock,
+        return_value=FakeWebsocket(messages),
+    )
+
+    ws = AsyncTTSWebsocketClient(
+        api_key="key",
+        base_url="localhost",
+        max_queue_size=4,
+        overflow_policy=OverflowPolicy.DROP_OLDEST,
+    )
+    await ws.open()
+    await asyncio.sleep(0.01)
+
+    received = [(await ws.receive()).data.text for _ in range(4)]
+    assert received == ["6", "7", "8", "9"]
+    assert ws.metrics.messages_dropped == 6
+
+
+@pytest.mark.asyncio
+async def test_event_dispatcher():
+    dispatcher = EventDispatcher()
+    calls = []
+
+    async def on_audio(message):
+        calls.append("audio")
+
+    def on_any(message):
+        calls.append("any")
+
+    async def on_stop(message):
+        calls.append("stop")
+
+    dispatcher.subscribe(WebsocketEvents.MESSAGE, on_any)
+    dispatcher.subscribe(
+        WebsocketEvents.MESSAGE, on_audio, message_type="audio_response"
+    )
+    dispatcher.subscribe(
+        WebsocketEvents.MESSAGE,
+        on_stop,
+        message_type="stop_audio_response",
+        priority=10,
+    )
+
+    assert dispatcher.has_handlers(WebsocketEvents.MESSAGE)
+    assert not dispatcher.has_handlers(WebsocketEvents.OPEN)
+
+    await dispatcher.emit(WebsocketEvents.MESSAGE, None, message_type="audio_response")
+    await dispatcher.emit(
+        WebsocketEvents.MESSAGE, None, message_type="stop_audio_response"
+    )
+    await dispatcher.emit(WebsocketEvents.MESSAGE, None, message_type="llm_response")
+    assert calls == ["any", "audio", "stop", "any", "any"]
+
+    dispatcher.unsubscribe(WebsocketEvents.MESSAGE, on_any)
+    calls.clear()
+
+    await dispatcher.emit(WebsocketEvents.MESSAGE, None, message_type="audio_response")
+    assert calls == ["audio"]
+
+    with pytest.raises(ValueError):
+        dispatcher.subscribe(
+            WebsocketEvents.OPEN, on_any, message_type="audio_response"
+        )
+
+
+@pytest.mark.asyncio
+async def test_agent_on_message(client: Neuphonic, mocker: MockerFixture):
+    hooked = []
+    agent = Agent(client, on_message=hooked.append)
+    play = mocker.patch.object(agent.player, "play", new_callable=mocker.AsyncMock)
+    stop = mocker.patch.object(
+        agent.player, "confirm_interruption", new_callable=mocker.AsyncMock
+    )
+
+    audio = APIResponse(data=AgentResponse(type="audio_response", audio=b"\x00\x01"))
+    interrupt = APIResponse(data=AgentResponse(type="stop_audio_response"))
+    await agent.on_message(audio)
+    await agent.on_message(interrupt)
+
+    play.assert_awaited_once_with(b"\x00\x01")
+    stop.assert_awaited_once()
+    assert hooked == [audio, interrupt]
+
+
+class GatedWebsocket(FakeWebsocket):
+    """
+    A `FakeWebsocket` that only yields its messages once `release` is set, after which it
+    either drops the connection or stays open.
+    """
+
+    def __init__(self, messages, drop: bool = True):
+        super().__init__(messages)
+        self.release = asyncio.Event()
+        self.drop = drop
+
+    async def __aiter__(self):
+        await self.release.wait()
+
+        for message in self.messages:
+            yield message
+
+        if self.drop:
+            raise websockets.ConnectionClosedError(None, None)
+
+        await asyncio.Event().wait()
+
+
+@pytest.mark.asyncio
+async def test_websocket_reconnect(mocker: MockerFixture):
+    dropped = GatedWebsocket([_tts_message("Hello there,")])
+    resumed = GatedWebsocket([])
+    mocker.patch(
+        "websockets.connect",
+        new_callable=mocker.AsyncMock,
+        side_effect=[dropped, OSError(), resumed],
+    )
+
+    ws = AsyncTTSWebsocketClient(
+        api_key="key",
+        base_url="localhost",
+        reconnect_policy=ReconnectPolicy(initial_delay=0, standby=False),
+    )
+    reconnected = asyncio.Event()
+    events = []
+
+    def on_reconnect(event):
+        events.append(event)
+        reconnected.set()
+
+    ws.on(WebsocketEvents.RECONNECT, on_reconnect)
+
+    await ws.open()
+    await ws.send("Hello there, how are you?", autocomplete=True)
+    dropped.release.set()
+
+    await asyncio.wait_for(reconnected.wait(), timeout=1)
+    assert events[0].attempts == 2
+    assert events[0].replayed_text == " how are you? <STOP>"
+    assert resumed.sent == [json.dumps({"text": " how are you? <STOP>"})]
+    assert ws.metrics.reconnects == 1
+
+    await ws.close()
+
+
+@pytest.mark.asyncio
+async def test_websocket_send_after_close(mocker: MockerFixture):
+    socket = GatedWebsocket([], drop=False)
+    socket.send = mocker.AsyncMock(
+        side_effect=websockets.ConnectionClosedOK(None, None)
+    )
+    mocker.patch(
+        "websockets.connect", new_callable=mocker.AsyncMock, return_value=socket
+    )
+
+    ws = AsyncTTSWebsocketClient(
+        api_key="key",
+        base_url="localhost",
+        reconnect_policy=ReconnectPolicy(standby=False),
+    )
+    await ws.open()
+
+    # while open, a dropped connection is left for the receive loop to recover
+    await ws.send("Hello")
+
+    await ws.close()
+    with pytest.raises(websockets.ConnectionClosed):
+        await ws.send("Hello")
+
+
+@pytest.mark.asyncio
+async def test_websocket_close_from_handler(mocker: MockerFixture):
+    socket = GatedWebsocket([_tts_message("Hello")], drop=False)
+    mocker.patch(
+        "websockets.connect", new_callable=mocker.AsyncMock, return_value=socket
+    )
+
+    ws = AsyncTTSWebsocketClient(api_key="key", base_url="localhost")
+    closed = asyncio.Event()
+
+    async def on_message(message: APIResponse[TTSResponse]):
+        await ws.close()
+        closed.set()
+
+    ws.on(WebsocketEvents.MESSAGE, on_message)
+    await ws.open()
+    socket.release.set()
+
+    await asyncio.wait_for(closed.wait(), timeout=1)
+    _, pending = await asyncio.wait(ws._tasks, timeout=1)
+    assert not pending
+
+
+@pytest.mark.asyncio
+async def test_websocket_utterances(mocker: MockerFixture):
+    fake_ws = GatedWebsocket(
+        [
+            _tts_message("Hello"),
+            _tts_message("there."),
+            _tts_message("How are you?"),
+        ],
+        drop=False,
+    )
+    mocker.patch(
+        "websockets.connect", new_callable=mocker.AsyncMock, return_value=fake_ws
+    )
+
+    ws = AsyncTTSWebsocketClient(api_key="key", base_url="localhost")
+    await ws.open()
+
+    # both utterances are queued before any audio arrives
+    first = await ws.send("Hello there.", autocomplete=True)
+    second = await ws.send("How are you? <STOP>")
+    assert not first.done.done() and not second.done.done()
+
+    fake_ws.release.set()
+
+    assert [message.data.text async for message in first] == ["Hello", "there."]
+    assert [message.data.text async for message in second] == ["How are you?"]
+    await asyncio.wait_for(asyncio.gather(first.done, second.done), timeout=1)
+    assert ws.message_queue.empty()
+
+    await ws.close()
+
+
+class FakeSyncWebsocket:
+    """
+    Stands in for a `websockets.sync` connection, yielding its messages once `release` is set,
+    after which it either drops the connection or stays open until closed.
+    """
+
+    def __init__(self, messages, drop: bool = False):
+        self.messages = messages
+        self.drop = drop
+        self.sent = []
+        self.release = threading.Event()
+        self.closed = threading.Event()
+
+    def __iter__(self):
+        self.release.wait()
+        yield from self.messages
+
+        if self.drop:
+            raise websockets.ConnectionClosedError(None, None)
+
+        self.closed.wait()
+
+    def send(self, message):
+        self.sent.append(message)
+
+    def close(self):
+        self.release.set()
+        self.closed.set()
+
+
+def test_websocket_sync(mocker: MockerFixture):
+    fake_ws = FakeSyncWebsocket(
+        [_tts_message("Hello"), _tts_message("there."), _tts_message("Bye.")]
+    )
+    mocker.patch("websockets.sync.client.connect", return_value=fake_ws)
+
+    with TTSWebsocketClient(api_key="key", base_url="localhost") as ws:
+        first = ws.send("Hello there.", autocomplete=True)
+        second = ws.send("Bye.", autocomplete=True)
+        fake_ws.release.set()
+
+        assert [message.data.text for message in first] == ["Hello", "there."]
+        second.done.result(timeout=1)
+        assert ws.metrics.messages_received == 3
+
+    assert fake_ws.closed.is_set()
+    stop = json.dumps({"text": " <STOP>"})
+    assert fake_ws.sent == ["Hello there.", stop, "Bye.", stop]
+
+
+def test_websocket_sync_reconnect(mocker: MockerFixture):
+    dropped = FakeSyncWebsocket([_tts_message("Hello there,")], drop=True)
+    resumed = FakeSyncWebsocket([_tts_message("how are you?")])
+    mocker.patch(
+        "websockets.sync.client.connect", side_effect=[dropped, OSError(), resumed]
+    )
+
+    ws = TTSWebsocketClient(
+        api_key="key",
+        base_url="localhost",
+        reconnect_policy=ReconnectPolicy(initial_delay=0, standby=False),
+    )
+    events = []
+    ws.on(WebsocketEvents.OPEN, lambda: events.append("open"))
+    ws.on(WebsocketEvents.RECONNECT, events.append)
+    ws.on(WebsocketEvents.CLOSE, lambda: events.append("close"))
+
+    with pytest.raises(ValueError):
+        ws.on(WebsocketEvents.MESSAGE, events.append)
+
+    ws.open()
+
+    utterance = ws.send("Hello there, how are you?", autocomplete=True)
+    dropped.release.set()
+    resumed.release.set()
+
+    assert [message.data.text for message in utterance] == [
+        "Hello there,",
+        "how are you?",
+    ]
+    assert resumed.sent == [json.dumps({"text": " how are you? <STOP>"})]
+    assert ws.metrics.reconnects == 1
+    assert events[0] == "open"
+    assert events[1].attempts == 2
+    assert events[1].replayed_text == " how are you? <STOP>"
+
+    ws.close()
+    assert events[-1] == "close"
+
+
+@pytest.mark.asyncio
+async def test_text_stream(mocker: MockerFixture):
+    text = "Hello there, my friend. How are you today? I hope you are well."
+    tokens = [text[i : i + 4] for i in range(0, len(text), 4)]
+    # the server acknowledges each segment with the text its audio was generated from
+    fake_ws = GatedWebsocket(
+        [
+            _tts_message("Hello there, my friend."),
+            _tts_message("How are you today? I hope you are well."),
+        ],
+        drop=False,
+    )
+    mocker.patch(
+        "websockets.connect", new_callable=mocker.AsyncMock, return_value=fake_ws
+    )
+
+    async def token_stream():
+        for token in tokens:
+            yield token
+
+    ws = AsyncTTSWebsocketClient(api_key="key", base_url="localhost")
+    await ws.open()
+
+    async with ws.stream(timeout=1) as stream:
+        utterance = await stream.feed(token_stream())
+        assert not utterance.done()
+
+        fake_ws.release.set()
+
+    assert utterance.done()
+    assert [json.loads(message)["text"] for message in fake_ws.sent] == [
+        "Hello there, my friend.",
+        " How are you today? I hope you are well. <STOP>",
+    ]
+    assert ws.metrics.messages_sent == 2
+
+    await ws.close()
+
+
+@pytest.mark.asyncio
+async def test_text_stream_policies(mocker: MockerFixture):
+    fake_ws = GatedWebsocket([_tts_message("Hello there.")], drop=False)
+    mocker.patch(
+        "websockets.connect", new_callable=mocker.AsyncMock, return_value=fake_ws
+    )
+
+    ws = AsyncTTSWebsocketClient(api_key="key", base_url="localhost")
+    await ws.open()
+
+    # text that is sent straight away still leaves the utterance to be completed
+    async with ws.stream(FlushPolicy(segmenter=False), timeout=1) as stream:
+        await stream.write("Hello there.")
+        fake_ws.release.set()
+
+    assert [json.loads(message)["text"] for message in fake_ws.sent] == [
+        "Hello there.",
+        " <STOP>",
+    ]
+
+    # buffered text is sent after max_delay even if nothing else is written, with or without
+    # the segmenter
+    for policy in (
+        FlushPolicy(segmenter=False, clause_boundaries=False, max_delay=0.01),
+        FlushPolicy(max_delay=0.01),
+    ):
+        fake_ws.sent.clear()
+
+        # audio for "Hello" never arrives, so the session fails rather than hanging
+        with pytest.raises(asyncio.TimeoutError):
+            async with ws.stream(policy, timeout=0.05) as stream:
+                await stream.write("Hello")
+                await asyncio.sleep(0.03)
+                assert [json.loads(m)["text"] for m in fake_ws.sent] == ["Hello"]
+
+    await ws.close()
+
+
+def test_sentence_segmenter():
+    text = (
+        "Hi there, Dr. Smith. Pi is roughly 3.14, see neuphonic.com/docs for more. "
+        "J. K. Rowling wrote it, honestly! What do you think? I think it's great."
+    )
+    segments = segment(text, min_chars=40)
+
+    assert "".join(segments) == text
+    assert segments[:2] == [
+        "Hi there, Dr. Smith.",
+        " Pi is roughly 3.14, see neuphonic.com/docs for more.",
+    ]
+
+    # the same segments are produced when the text arrives a few characters at a time
+    segmenter = SentenceSegmenter(min_chars=40)
+    streamed = [
+        s for i in range(0, len(text), 3) for s in segmenter.push(text[i : i + 3])
+    ]
+    assert streamed + [segmenter.flush()] == segments
+
+    assert segment("Wir sehen uns am 1. Mai. Bis dann, tschüss!", lang_code="de") == [
+        "Wir sehen uns am 1. Mai.",
+        " Bis dann, tschüss!",
+    ]